@@ -1,11 +1,35 @@
 from fastapi import APIRouter, Depends
 from api.auth import get_current_active_admin
+from fastapi import HTTPException
 from services.scheduler_service import (
-    procesar_reservas_finalizadas
+    procesar_reservas_finalizadas,
+    reprocesar_rango,
+    leer_marca
 )
+from services.disponibilidad_service import indice
+from services.lease_service import estado_leases, LEASE_SCHEDULER, ejecucion_exclusiva, LeaseOcupadoError
+from services.job_run_service import ejecutar_registrando, estadisticas_ejecuciones
+from services.rollup_service import recalcular_rango, estado_pendientes, MAX_DIAS_MANUAL as ROLLUP_MAX_DIAS
+from services.cache_reportes import cache as cache_reportes
+from services.cache_usuarios import cache_usuarios
+from services.versiones_token import tabla_versiones
+from services.bcrypt_pool import pool_bcrypt
+from datetime import date, timedelta
+from typing import Optional
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+def _ejecutar_exclusivo(job: str, fn, *args, lease: str = None):
+    """
+    Ejecuta una tarea del scheduler con el lease `lease` (por defecto el de
+    la misma tarea); 409 si ya está corriendo.
+    """
+    try:
+        with ejecucion_exclusiva(lease or job):
+            return ejecutar_registrando(job, fn, *args)
+    except LeaseOcupadoError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 @router.post("/procesar-reservas-manual")
 def ejecutar_procesamiento_manual(current_user = Depends(get_current_active_admin)):
     """
@@ -15,23 +39,119 @@ def ejecutar_procesamiento_manual(current_user = Depends(get_current_active_admi
     Disponible solo para administradores.
     
     """
-    return procesar_reservas_finalizadas()
+    return _ejecutar_exclusivo('procesar_reservas', procesar_reservas_finalizadas)
+
+@router.post("/procesar-reservas-backfill")
+def ejecutar_backfill(
+    desde: date,
+    hasta: date,
+    dias_por_lote: int = 7,
+    current_user = Depends(get_current_active_admin)
+):
+    """
+    Vuelve a procesar las reservas que terminaron entre `desde` y `hasta`
+    en lotes de `dias_por_lote` días. No mueve la marca de agua del job.
+    """
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="hasta debe ser mayor o igual a desde")
+    if dias_por_lote < 1:
+        raise HTTPException(status_code=400, detail="dias_por_lote debe ser al menos 1")
+    # toca las mismas reservas que procesar_reservas: se excluye con esa tarea
+    return _ejecutar_exclusivo(
+        'reprocesar_reservas', reprocesar_rango, desde, hasta, dias_por_lote,
+        lease='procesar_reservas'
+    )
 
 @router.get("/estado-scheduler")
 def estado_scheduler(current_user = Depends(get_current_active_admin)):
-    """Ver estado de las tareas programadas"""
-    from main import scheduler
-    
-    jobs = []
-    for job in scheduler.get_jobs():
-        jobs.append({
-            "id": job.id,
-            "name": job.name,
-            "next_run": str(job.next_run_time),
-            "trigger": str(job.trigger)
-        })
-    
+    """Ver estado de las tareas programadas y qué nodo tiene el lease"""
+    leases = estado_leases()
+    lider = next((l for l in leases if l["job"] == LEASE_SCHEDULER), None)
+    marca = leer_marca()
     return {
-        "scheduler_activo": scheduler.running,
-        "tareas": jobs
+        "scheduler_activo": bool(lider and lider["vigente"]),
+        "nodo_lider": lider["nodo"] if lider and lider["vigente"] else None,
+        "tareas": lider["tareas"] if lider else [],
+        "leases": leases,
+        "marca_procesar_reservas": (
+            {"fecha": marca[0].isoformat(), "id_turno": marca[1]} if marca else None
+        )
     }
+
+@router.get("/ejecuciones")
+def ejecuciones_jobs(
+    job: Optional[str] = None,
+    recientes: int = 20,
+    current_user = Depends(get_current_active_admin)
+):
+    """Percentiles de duración por tarea y últimas ejecuciones (tabla job_run)"""
+    if recientes < 1 or recientes > 500:
+        raise HTTPException(status_code=400, detail="recientes debe estar entre 1 y 500")
+    return estadisticas_ejecuciones(job, recientes)
+
+@router.post("/rollups/recalcular")
+def recalcular_agregados(
+    desde: date,
+    hasta: date,
+    current_user = Depends(get_current_active_admin)
+):
+    """
+    Recalcula los agregados de los reportes (tablas rollup_*) entre dos
+    fechas, un día por transacción. No corre a la vez que el recálculo de
+    fechas pendientes del scheduler.
+    """
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="hasta debe ser mayor o igual a desde")
+    if (hasta - desde).days + 1 > ROLLUP_MAX_DIAS:
+        raise HTTPException(status_code=400, detail=f"El rango no puede superar {ROLLUP_MAX_DIAS} días")
+    _ejecutar_exclusivo(
+        'recalcular_rollups', recalcular_rango, desde, hasta,
+        lease='recalcular_rollups_pendientes'
+    )
+    return {"message": "Agregados recalculados", "desde": desde, "hasta": hasta}
+
+@router.get("/rollups/pendientes")
+def rollups_pendientes(current_user = Depends(get_current_active_admin)):
+    """
+    Fechas encoladas cuyos agregados todavía no se recalcularon, la más
+    vieja y las que fallaron (con intentos y último error)
+    """
+    return estado_pendientes()
+
+@router.get("/cache-reportes")
+def estado_cache_reportes(current_user = Depends(get_current_active_admin)):
+    """Hits/misses y tamaño de la caché de reportes (de este proceso)"""
+    return cache_reportes.estado()
+
+@router.delete("/cache-reportes")
+def vaciar_cache_reportes(current_user = Depends(get_current_active_admin)):
+    """Invalida la caché de reportes de este proceso"""
+    cache_reportes.invalidar()
+    return cache_reportes.estado()
+
+@router.get("/cache-usuarios")
+def estado_cache_usuarios(current_user = Depends(get_current_active_admin)):
+    """Caché email -> usuario y tabla de versiones de token que usa la autenticación (de este proceso)"""
+    return {**cache_usuarios.estado(), "versiones_token": tabla_versiones.estado()}
+
+@router.get("/bcrypt")
+def estado_pool_bcrypt(current_user = Depends(get_current_active_admin)):
+    """Pool de procesos de bcrypt: tamaño, cola, costo y pedidos rechazados por saturación"""
+    return pool_bcrypt.estado()
+
+@router.get("/disponibilidad/verificar")
+def verificar_indice_disponibilidad(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    corregir: bool = True,
+    current_user = Depends(get_current_active_admin)
+):
+    """
+    Compara el índice de disponibilidad en memoria con sala_turno_ocupado
+    (por defecto desde hoy y 30 días) y corrige las diferencias.
+    """
+    desde = desde or date.today()
+    hasta = hasta or desde + timedelta(days=30)
+    resultado = indice.verificar(desde, hasta, corregir)
+    resultado["estado"] = indice.estado()
+    return resultado
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException
+from api.auth import get_current_active_admin
+from models.reporte_model import FiltrosReporte
+from services.analitica_service import (
+    foto,
+    requerir_numpy,
+    REPORTES,
+    REPORTES_CON_LIMIT
+)
+
+router = APIRouter(prefix="/analitica", tags=["analitica"])
+
+@router.get("/estado")
+def estado_analitica(current_user = Depends(get_current_active_admin)):
+    """Estado de la foto en memoria (filas, último refresco, marca de updated_at)"""
+    return foto.estado()
+
+@router.post("/recargar")
+def recargar_analitica(current_user = Depends(get_current_active_admin)):
+    """Recarga completa de la foto en memoria de este proceso"""
+    foto.refrescar(forzar=True)
+    return foto.estado()
+
+@router.get("/{reporte}")
+def get_reporte_analitica(
+    reporte: str,
+    limit: int = 10,
+    filtros: FiltrosReporte = Depends(),
+    current_user = Depends(get_current_active_admin)
+):
+    """
+    Reportes calculados en memoria con NumPy: los mismos de /reportes
+    (salas-mas-reservadas, turnos-mas-demandados, ...) más mapa-ocupacion,
+    no-asistencia y utilizacion-capacidad.
+    """
+    requerir_numpy()
+    fn = REPORTES.get(reporte)
+    if fn is None:
+        raise HTTPException(status_code=404, detail=f"Reporte desconocido. Disponibles: {', '.join(REPORTES)}")
+    if reporte in REPORTES_CON_LIMIT:
+        return fn(limit, filtros=filtros)
+    return fn(filtros=filtros)
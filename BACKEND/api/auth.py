@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from models.auth_model import LoginRequest, TokenResponse, UserInToken, RegisterRequest
@@ -8,20 +8,41 @@ from services.auth_services import (
     ALGORITHM
 )
 from services.login_service import login_and_get_token
+from services.versiones_token import usuario_de_token
 from db import execute_query, fetch_all
+from context import userRol, rol_de_base
 
 router = APIRouter(prefix="/auth", tags=["autenticacion"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInToken:
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)) -> UserInToken:
     """Dependency para obtener el usuario actual del token"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudo validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+    # el middleware no pudo validar el token (falla de la base): el request
+    # corre con el rol 'login', así que no se reintenta acá
+    if getattr(request.state, "auth_error", False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No se pudo validar la sesión, intente nuevamente en unos segundos",
+            headers={"Retry-After": "1"},
+        )
+
+    # attach_user_role_middleware ya decodificó este mismo token y resolvió
+    # el usuario: se reutiliza sin volver a consultar
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        return UserInToken(
+            id_participante=user['id_participante'],
+            email=user['email'],
+            rol=request.state.role
+        )
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -30,21 +51,29 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInToken:
     except JWTError:
         raise credentials_exception
     
-    # Obtener datos actuales del usuario
-    query = """
-        SELECT id_participante, email, rol, activo
-        FROM participante
-        WHERE email = %s
-    """
-    result = fetch_all(query, (email,))
+    # Validar versión del token y estado actual del usuario
+    try:
+        result = usuario_de_token(payload)
+    except Exception:
+        # sin poder consultar la base no se puede saber si el token sigue
+        # valiendo: se rechaza, pero como falla transitoria y no como 401
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No se pudo validar la sesión, intente nuevamente en unos segundos",
+            headers={"Retry-After": "1"},
+        )
     
-    if not result or not result[0]['activo']:
+    if not result:
         raise credentials_exception
-    
+
+    # el middleware había dejado el request sin autenticar (rol 'login'):
+    # el endpoint tiene que correr con el usuario de base de su rol real
+    userRol.set(rol_de_base(result['rol']))
+
     return UserInToken(
-        id_participante=result[0]['id_participante'],
-        email=result[0]['email'],
-        rol=result[0]['rol']
+        id_participante=result['id_participante'],
+        email=result['email'],
+        rol=result['rol']
     )
 
 async def get_current_active_admin(current_user: UserInToken = Depends(get_current_user)) -> UserInToken:
@@ -101,9 +130,9 @@ def register(user: RegisterRequest):
         raise HTTPException(status_code=500, detail=f"Error al registrar: {str(e)}")
 
 @router.post("/login", response_model=TokenResponse)
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """Login y generación de token JWT"""
-    access_token = login_and_get_token(form_data.username, form_data.password)
+    access_token = await login_and_get_token(form_data.username, form_data.password)
     return TokenResponse(access_token=access_token)
 
 @router.get("/me", response_model=UserInToken)
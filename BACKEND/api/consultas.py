@@ -8,86 +8,165 @@ from services.consultas_service import (
     reservas_asistencias_por_rol,
     sanciones_por_rol,
     porcentaje_reservas_utilizadas,
+    reservas_por_estado,
     reservas_por_dia_semana,
     salas_menos_utilizadas,
     participantes_mas_activos
 )
 
-from services.consultas_service import dia_con_mas_creaciones_reservas
+from services.consultas_service import dia_con_mas_creaciones_reservas, reporte_filtrado
+from models.reporte_model import FiltrosReporte
+from services.dashboard_service import dashboard, TIMEOUT_REPORTE
+from services.utilizacion_service import utilizacion
+from fastapi import HTTPException
 from api.auth import get_current_active_admin
 from datetime import date
-from typing import Optional
+from typing import Literal, Optional
 
 router = APIRouter(prefix="/reportes", tags=["reportes"])
 
+@router.get("/dashboard")
+def get_dashboard(
+    limit: int = 5,
+    timeout: float = TIMEOUT_REPORTE,
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
+    current_user = Depends(get_current_active_admin)
+):
+    """Todos los reportes en un solo documento, calculados en paralelo"""
+    if timeout <= 0 or timeout > 60:
+        raise HTTPException(status_code=400, detail="timeout debe estar entre 0 y 60 segundos")
+    return dashboard(limit, timeout, filtros, comparar)
+
+@router.get("/utilizacion")
+def get_utilizacion(
+    agrupar: Literal['dia', 'semana', 'mes'] = 'semana',
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
+    current_user = Depends(get_current_active_admin)
+):
+    """Turnos reservados / disponibles y asientos ocupados / ofrecidos por sala, edificio y período"""
+    return reporte_filtrado(utilizacion, filtros, comparar, agrupar)
+
 @router.get("/salas-mas-reservadas")
 def get_salas_mas_reservadas(
     limit: int = 10,
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
     current_user = Depends(get_current_active_admin)
 ):
     """Top N salas más reservadas"""
-    return salas_mas_reservadas(limit)
+    return reporte_filtrado(salas_mas_reservadas, filtros, comparar, limit)
 
 @router.get("/turnos-mas-demandados")
-def get_turnos_mas_demandados(current_user = Depends(get_current_active_admin)):
+def get_turnos_mas_demandados(
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
+    current_user = Depends(get_current_active_admin)
+):
     """Turnos más demandados"""
-    return turnos_mas_demandados()
+    return reporte_filtrado(turnos_mas_demandados, filtros, comparar)
 
 @router.get("/promedio-participantes-sala")
-def get_promedio_participantes(current_user = Depends(get_current_active_admin)):
+def get_promedio_participantes(
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
+    current_user = Depends(get_current_active_admin)
+):
     """Promedio de participantes por sala"""
-    return promedio_participantes_por_sala()
+    return reporte_filtrado(promedio_participantes_por_sala, filtros, comparar)
 
 @router.get("/reservas-por-carrera-facultad")
-def get_reservas_carrera_facultad(current_user = Depends(get_current_active_admin)):
+def get_reservas_carrera_facultad(
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
+    current_user = Depends(get_current_active_admin)
+):
     """Cantidad de reservas por carrera y facultad"""
-    return reservas_por_carrera_facultad()
+    return reporte_filtrado(reservas_por_carrera_facultad, filtros, comparar)
 
 @router.get("/ocupacion-salas-edificio")
-def get_ocupacion_edificio(current_user = Depends(get_current_active_admin)):
+def get_ocupacion_edificio(
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
+    current_user = Depends(get_current_active_admin)
+):
     """Porcentaje de ocupación de salas por edificio"""
-    return ocupacion_salas_por_edificio()
+    return reporte_filtrado(ocupacion_salas_por_edificio, filtros, comparar)
 
 @router.get("/reservas-asistencias-por-rol")
-def get_reservas_asistencias(current_user = Depends(get_current_active_admin)):
+def get_reservas_asistencias(
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
+    current_user = Depends(get_current_active_admin)
+):
     """Cantidad de reservas y asistencias por rol"""
-    return reservas_asistencias_por_rol()
+    return reporte_filtrado(reservas_asistencias_por_rol, filtros, comparar)
 
 @router.get("/sanciones-por-rol")
-def get_sanciones(current_user = Depends(get_current_active_admin)):
+def get_sanciones(
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
+    current_user = Depends(get_current_active_admin)
+):
     """Cantidad de sanciones por rol"""
-    return sanciones_por_rol()
+    return reporte_filtrado(sanciones_por_rol, filtros, comparar)
 
 @router.get("/porcentaje-reservas-utilizadas")
-def get_porcentaje_utilizadas(current_user = Depends(get_current_active_admin)):
+def get_porcentaje_utilizadas(
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
+    current_user = Depends(get_current_active_admin)
+):
     """Porcentaje de reservas utilizadas vs canceladas/no asistidas"""
-    return porcentaje_reservas_utilizadas()
+    return reporte_filtrado(porcentaje_reservas_utilizadas, filtros, comparar)
+
+@router.get("/reservas-por-estado")
+def get_reservas_por_estado(
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
+    current_user = Depends(get_current_active_admin)
+):
+    """Cantidad de reservas por estado, en total y con fecha de hoy"""
+    return reporte_filtrado(reservas_por_estado, filtros, comparar)
 
 # CONSULTAS ADICIONALES PROVISORIAS
 @router.get("/reservas-por-dia-semana")
-def get_reservas_dia_semana(current_user = Depends(get_current_active_admin)):
+def get_reservas_dia_semana(
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
+    current_user = Depends(get_current_active_admin)
+):
     """Distribución de reservas por día de la semana"""
-    return reservas_por_dia_semana()
+    return reporte_filtrado(reservas_por_dia_semana, filtros, comparar)
 
 @router.get("/salas-menos-utilizadas")
 def get_salas_menos_utilizadas(
     limit: int = 10,
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
     current_user = Depends(get_current_active_admin)
 ):
     """Salas menos utilizadas"""
-    return salas_menos_utilizadas(limit)
+    return reporte_filtrado(salas_menos_utilizadas, filtros, comparar, limit)
 
 @router.get("/participantes-mas-activos")
 def get_participantes_activos(
     limit: int = 10,
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
     current_user = Depends(get_current_active_admin)
 ):
     """Participantes con más reservas"""
-    return participantes_mas_activos(limit)
+    return reporte_filtrado(participantes_mas_activos, filtros, comparar, limit)
 
 
 @router.get("/dia-mas-creacion")
-def get_dia_mas_creacion(current_user = Depends(get_current_active_admin)):
+def get_dia_mas_creacion(
+    filtros: FiltrosReporte = Depends(),
+    comparar: bool = False,
+    current_user = Depends(get_current_active_admin)
+):
     """Día de la semana con más reservas creadas"""
-    return dia_con_mas_creaciones_reservas()
+    return reporte_filtrado(dia_con_mas_creaciones_reservas, filtros, comparar)
 
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from services.exportacion_service import (
+    FORMATOS,
+    exportar_reservas,
+    exportar_historial_participantes,
+    exportar_historial_sanciones
+)
+from api.auth import get_current_active_admin
+from datetime import date
+from typing import Literal, Optional
+
+router = APIRouter(prefix="/exportaciones", tags=["exportaciones"])
+
+Formato = Literal['ndjson', 'csv']
+EstadoReserva = Literal['activa','confirmada','cancelada','finalizada','no_asistencia']
+
+def _respuesta(contenido, nombre: str, formato: str):
+    return StreamingResponse(
+        contenido,
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'}
+    )
+
+@router.get("/reservas")
+def export_reservas(
+    formato: Formato = 'ndjson',
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    estado: Optional[EstadoReserva] = None,
+    current_user = Depends(get_current_active_admin)
+):
+    """Exportar todas las reservas (NDJSON o CSV, en streaming)"""
+    return _respuesta(exportar_reservas(formato, desde, hasta, estado), "reservas", formato)
+
+@router.get("/participantes/historial")
+def export_historial_participantes(
+    formato: Formato = 'ndjson',
+    id_participante: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    current_user = Depends(get_current_active_admin)
+):
+    """Exportar el historial de reservas de los participantes (o de uno)"""
+    return _respuesta(
+        exportar_historial_participantes(formato, id_participante, desde, hasta),
+        "historial_participantes", formato
+    )
+
+@router.get("/sanciones")
+def export_sanciones(
+    formato: Formato = 'ndjson',
+    id_participante: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    current_user = Depends(get_current_active_admin)
+):
+    """Exportar el historial de sanciones (NDJSON o CSV, en streaming)"""
+    return _respuesta(
+        exportar_historial_sanciones(formato, id_participante, desde, hasta),
+        "sanciones", formato
+    )
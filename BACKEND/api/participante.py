@@ -9,6 +9,7 @@ from services.participante_service import (
     obtener_reservas_por_participante
 )
 from api.auth import get_current_active_admin, get_current_user
+from typing import Literal, Optional
 
 router = APIRouter(prefix="/participantes", tags=["participante"])
 
@@ -18,9 +19,15 @@ def create(p: ParticipanteCreate, current_user = Depends(get_current_active_admi
     return crear_participante(p)
 
 @router.get("/")
-def list_all(current_user = Depends(get_current_user)):
+def list_all(
+    cursor: Optional[int] = None,
+    limit: int = 100,
+    rol: Optional[Literal['alumno_grado','alumno_posgrado','docente','admin']] = None,
+    activo: Optional[bool] = None,
+    current_user = Depends(get_current_user)
+):
     """Solo admin puede listar todos los participantes"""
-    return listar_participantes()
+    return listar_participantes(cursor, limit, rol, activo)
 
 @router.get("/{id_participante}")
 def get_one(id_participante: int, current_user = Depends(get_current_active_admin)):
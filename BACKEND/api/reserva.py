@@ -13,7 +13,7 @@ from services.reserva_service import (
 )
 from api.auth import get_current_user, UserInToken, get_current_active_admin
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal, Optional
 from datetime import date
 
 router = APIRouter(prefix="/reservas", tags=["reserva"])
@@ -34,20 +34,40 @@ class RegistrarAsistenciaRequest(BaseModel):
     id_reserva: int
     presente: bool
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=ReservaResponse)
 def create(r: ReservaCreateConParticipantes, current_user: UserInToken = Depends(get_current_user)):
     """Crear una reserva (cualquier usuario autenticado)"""
     return crear_reserva(r, current_user.id_participante)
 
+EstadoReserva = Literal['activa','confirmada','cancelada','finalizada','no_asistencia']
+
 @router.get("/")
-def list_all(current_user = Depends(get_current_user)):
-    """Listar todas las reservas (filtrable por admin)"""
-    return listar_reservas()
+def list_all(
+    cursor: Optional[int] = None,
+    limit: int = 100,
+    id_sala: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    estado: Optional[EstadoReserva] = None,
+    creado_por: Optional[int] = None,
+    rol: Optional[Literal['alumno_grado','alumno_posgrado','docente','admin']] = None,
+    current_user = Depends(get_current_user)
+):
+    """Listar reservas paginadas por cursor (filtrable por sala, fechas, estado, creador y su rol)"""
+    return listar_reservas(cursor, limit, id_sala, desde, hasta, estado, creado_por, rol)
 
 @router.get("/mis-reservas")
-def mis_reservas(current_user: UserInToken = Depends(get_current_user)):
+def mis_reservas(
+    cursor: Optional[int] = None,
+    limit: int = 100,
+    id_sala: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    estado: Optional[EstadoReserva] = None,
+    current_user: UserInToken = Depends(get_current_user)
+):
     """Listar mis reservas"""
-    return listar_mis_reservas(current_user.id_participante)
+    return listar_mis_reservas(current_user.id_participante, cursor, limit, id_sala, desde, hasta, estado)
 
 @router.get("/{id_reserva}")
 def get_one(id_reserva: int, current_user = Depends(get_current_user)):
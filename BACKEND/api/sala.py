@@ -8,9 +8,12 @@ from services.sala_service import (
     eliminar_sala,
     listar_salas_disponibles,
     sala_ocupada,
+    turnos_ocupados_sala,
+    disponibilidad_salas,
 )
 from api.auth import get_current_active_admin, get_current_user
 from datetime import date
+from typing import Literal, Optional
 
 router = APIRouter(prefix="/salas", tags=["sala"])
 
@@ -20,9 +23,15 @@ def create(s: SalaCreate, current_user = Depends(get_current_active_admin)):
     return crear_sala(s)
 
 @router.get("/")
-def list_all(current_user = Depends(get_current_user)):
-    """Listar todas las salas"""
-    return listar_salas()
+def list_all(
+    cursor: Optional[int] = None,
+    limit: int = 100,
+    id_edificio: Optional[int] = None,
+    tipo: Optional[Literal['libre', 'posgrado', 'docente']] = None,
+    current_user = Depends(get_current_user)
+):
+    """Listar salas (filtrable por edificio y tipo)"""
+    return listar_salas(cursor, limit, id_edificio, tipo)
 
 @router.get("/disponibles")
 def list_disponibles(
@@ -34,6 +43,18 @@ def list_disponibles(
     """Listar salas disponibles para una fecha y horario específico"""
     return listar_salas_disponibles(fecha, start_turn_id, end_turn_id)
 
+@router.get("/disponibilidad")
+def grilla_disponibilidad(
+    desde: date,
+    hasta: Optional[date] = None,
+    id_edificio: Optional[int] = None,
+    tipo: Optional[Literal['libre', 'posgrado', 'docente']] = None,
+    capacidad_min: Optional[int] = None,
+    current_user = Depends(get_current_user)
+):
+    """Turnos libres/ocupados de cada sala para un rango de fechas (máx. 31 días)"""
+    return disponibilidad_salas(desde, hasta or desde, id_edificio, tipo, capacidad_min)
+
 @router.get("/{id_sala}")
 def get_one(id_sala: int, current_user = Depends(get_current_user)):
     """Obtener una sala por ID"""
@@ -46,6 +67,11 @@ def esta_ocupada(id_sala: int, fecha: date):
     """
     return sala_ocupada(id_sala, fecha)
 
+@router.get("/{id_sala}/{fecha}/ocupados")
+def get_turnos_ocupados(id_sala: int, fecha: date, current_user = Depends(get_current_user)):
+    """Turnos ocupados de una sala en una fecha"""
+    return turnos_ocupados_sala(id_sala, fecha)
+
 @router.put("/{id_sala}")
 def update(id_sala: int, s: SalaUpdate, current_user = Depends(get_current_active_admin)):
     """Actualizar sala"""
@@ -9,6 +9,8 @@ from services.sancion_service import (
     tiene_sancion_vigente
 )
 from api.auth import get_current_active_admin, get_current_user
+from datetime import date
+from typing import Literal, Optional
 
 router = APIRouter(prefix="/sanciones", tags=["sancion"])
 
@@ -21,10 +23,15 @@ def create(s: SancionCreate, current_user = Depends(get_current_active_admin)):
 def list_all(
     id_participante: int = None,
     vigentes_solo: bool = False,
+    cursor: Optional[int] = None,
+    limit: int = 100,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    rol: Optional[Literal['alumno_grado','alumno_posgrado','docente','admin']] = None,
     current_user = Depends(get_current_active_admin)
 ):
-    """Listar sanciones (filtrable por participante y vigencia)"""
-    return listar_sanciones(id_participante, vigentes_solo)
+    """Listar sanciones (filtrable por participante, vigencia, período y rol)"""
+    return listar_sanciones(id_participante, vigentes_solo, cursor, limit, desde, hasta, rol)
 
 @router.get("/{id_sancion}")
 def get_one(id_sancion: int, current_user = Depends(get_current_active_admin)):
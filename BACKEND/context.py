@@ -1,3 +1,21 @@
+from contextlib import contextmanager
 from contextvars import ContextVar
 
-userRol = ContextVar("userRol", default=None)
\ No newline at end of file
+userRol = ContextVar("userRol", default=None)
+
+def rol_de_base(rol_participante):
+    """Usuario de la base que corresponde al rol del participante."""
+    if rol_participante == 'admin':
+        return 'admin'
+    if rol_participante in ('alumno_grado', 'alumno_posgrado', 'docente'):
+        return 'user'
+    return 'login'
+
+@contextmanager
+def con_rol(rol):
+    """Usa las credenciales de `rol` dentro del bloque (tareas fuera de un request)."""
+    token = userRol.set(rol)
+    try:
+        yield
+    finally:
+        userRol.reset(token)
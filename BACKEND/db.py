@@ -1,20 +1,28 @@
 import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from queue import LifoQueue, Empty, Full
 import mysql.connector
 from context import userRol
 
+logger = logging.getLogger(__name__)
+
 def _get_env(name, required=True, default=None):
     val = os.getenv(name, default)
     if required and (val is None or val == ""):
         raise RuntimeError(f"Falta la variable de entorno: {name}")
     return val
 
-def connection():
-    rol = userRol.get()
-    print(f"Conectando a la base de datos con rol: {rol}")
-    host = os.getenv("DB_HOST", "localhost")
-    port = int(os.getenv("DB_PORT", 3306))
-    db = os.getenv("DB_NAME", "reserva_salas")
+def _get_env_bool(name, default):
+    val = os.getenv(name)
+    if val is None or val == "":
+        return default
+    return val.strip().lower() in ("1", "true", "yes", "si", "on")
 
+def _credenciales(rol):
     if rol == 'admin':
         user = _get_env("DB_USER_ADMIN", required=True)
         pwd  = _get_env("DB_PASSWORD_ADMIN", required=True)
@@ -26,6 +34,19 @@ def connection():
         pwd  = _get_env("DB_PASSWORD_USER", required=True)
     else:
         raise Exception("No se seteó userRol antes de llamar a connection()")
+    return user, pwd
+
+def connection(rol=None):
+    """
+    Abre una conexión nueva (sin pool) con las credenciales del rol indicado
+    o, si no se indica, del userRol actual.
+    """
+    rol = rol or userRol.get()
+    user, pwd = _credenciales(rol)
+    print(f"Conectando a la base de datos con rol: {rol}")
+    host = os.getenv("DB_HOST", "localhost")
+    port = int(os.getenv("DB_PORT", 3306))
+    db = os.getenv("DB_NAME", "reserva_salas")
 
     cnx = mysql.connector.connect(
         user=user,
@@ -37,41 +58,362 @@ def connection():
     )
     return cnx
 
-def fetch_all(query, params=None):
-    conn = connection()
+
+# ==================== POOL DE CONEXIONES POR ROL ====================
+# Cada rol (admin/login/user) tiene su propio pool acotado. Configuración:
+#   DB_POOL_SIZE          conexiones que se mantienen abiertas (default 5)
+#   DB_POOL_MAX_OVERFLOW  conexiones extra temporales en picos (default 10)
+#   DB_POOL_RECYCLE       segundos de vida máxima de una conexión (default 1800)
+#   DB_POOL_PRE_PING      hacer ping antes de entregar una conexión (default true)
+#   DB_POOL_TIMEOUT       segundos a esperar una conexión libre (default 30)
+
+class PoolAgotadoError(Exception):
+    pass
+
+class _PoolRol:
+    def __init__(self, rol, size, max_overflow, recycle, pre_ping, timeout):
+        self.rol = rol
+        self.size = size
+        self.max_overflow = max_overflow
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.timeout = timeout
+        # LIFO: se reutilizan primero las conexiones más recientes y las
+        # ociosas quedan al fondo hasta que se reciclan
+        self._libres = LifoQueue(maxsize=size)
+        self._cupo = threading.BoundedSemaphore(size + max_overflow)
+        self._creadas_en = {}
+        self._lock = threading.Lock()
+        self._abiertas = 0
+
+    def _abrir(self):
+        conn = connection(self.rol)
+        with self._lock:
+            self._creadas_en[id(conn)] = time.monotonic()
+            self._abiertas += 1
+        return conn
+
+    def _cerrar(self, conn):
+        with self._lock:
+            if self._creadas_en.pop(id(conn), None) is not None:
+                self._abiertas -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _vencida(self, conn):
+        if self.recycle <= 0:
+            return False
+        creada = self._creadas_en.get(id(conn))
+        return creada is None or time.monotonic() - creada > self.recycle
+
+    def _viva(self, conn):
+        if not self.pre_ping:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def obtener(self):
+        if not self._cupo.acquire(timeout=self.timeout):
+            raise PoolAgotadoError(
+                f"No hay conexiones disponibles para el rol '{self.rol}' "
+                f"(size={self.size}, overflow={self.max_overflow})"
+            )
+        try:
+            while True:
+                try:
+                    conn = self._libres.get_nowait()
+                except Empty:
+                    return self._abrir()
+                if self._vencida(conn) or not self._viva(conn):
+                    self._cerrar(conn)
+                    continue
+                return conn
+        except Exception:
+            self._cupo.release()
+            raise
+
+    def devolver(self, conn):
+        try:
+            # dejar la conexión limpia para el próximo que la use
+            conn.rollback()
+            self._libres.put_nowait(conn)
+        except Full:
+            # conexión de overflow: se cierra
+            self._cerrar(conn)
+        except Exception:
+            self._cerrar(conn)
+        finally:
+            self._cupo.release()
+
+    def descartar(self, conn):
+        """Cierra una conexión prestada en vez de devolverla (estado dudoso)."""
+        try:
+            self._cerrar(conn)
+        finally:
+            self._cupo.release()
+
+    def cerrar(self):
+        while True:
+            try:
+                conn = self._libres.get_nowait()
+            except Empty:
+                break
+            self._cerrar(conn)
+
+    def estado(self):
+        return {
+            "rol": self.rol,
+            "size": self.size,
+            "max_overflow": self.max_overflow,
+            "abiertas": self._abiertas,
+            "libres": self._libres.qsize(),
+        }
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _pool(rol):
+    pool = _pools.get(rol)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        if rol not in _pools:
+            _credenciales(rol)  # valida el rol antes de crear el pool
+            _pools[rol] = _PoolRol(
+                rol,
+                size=int(os.getenv("DB_POOL_SIZE", 5)),
+                max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", 10)),
+                recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+                pre_ping=_get_env_bool("DB_POOL_PRE_PING", True),
+                timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+            )
+        return _pools[rol]
+
+@contextmanager
+def pooled_connection():
+    """Presta una conexión del pool del userRol actual y la devuelve al salir."""
+    pool = _pool(userRol.get())
+    conn = pool.obtener()
     try:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(query, params or ())
-        results = cur.fetchall()
-        return results
+        yield conn
     finally:
-        cur.close()
-        conn.close()
+        pool.devolver(conn)
 
-def execute_query(query, params=None):
-    conn = connection()
+def estado_pools():
+    return [pool.estado() for pool in _pools.values()]
+
+def cerrar_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.cerrar()
+        _pools.clear()
+
+
+# ==================== TRANSACCIONES (UNIDAD DE TRABAJO) ====================
+
+class Transaccion:
+    """
+    Unidad de trabajo: todas las consultas usan la misma conexión y se
+    confirman con un único commit al salir de `transaction()`.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self._al_confirmar = []
+
+    def al_confirmar(self, fn):
+        """Registra una función a ejecutar después del commit (no si hay rollback)."""
+        self._al_confirmar.append(fn)
+
+    def fetch_all(self, query, params=None):
+        cur = self.conn.cursor(dictionary=True)
+        try:
+            cur.execute(query, params or ())
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+    def execute_query(self, query, params=None):
+        cur = self.conn.cursor()
+        try:
+            cur.execute(query, params or ())
+            return cur.lastrowid
+        finally:
+            cur.close()
+
+    def execute_rowcount(self, query, params=None):
+        cur = self.conn.cursor()
+        try:
+            cur.execute(query, params or ())
+            return cur.rowcount
+        finally:
+            cur.close()
+
+    def execute_many_queries(self, query, params_list):
+        cur = self.conn.cursor()
+        try:
+            cur.executemany(query, params_list)
+            return cur.rowcount
+        finally:
+            cur.close()
+
+_transaccion_actual = ContextVar("_transaccion_actual", default=None)
+
+@contextmanager
+def transaction():
+    """
+    Abre una transacción sobre una conexión del pool. Commit al salir sin
+    errores, rollback si se lanza una excepción. Mientras está abierta,
+    fetch_all/execute_query/execute_many_queries la usan automáticamente, así
+    las validaciones que se llamen adentro leen lo que la transacción escribió.
+    Si ya hay una transacción abierta, se reutiliza (no se anida).
+    """
+    actual = _transaccion_actual.get()
+    if actual is not None:
+        yield actual
+        return
+
+    with pooled_connection() as conn:
+        tx = Transaccion(conn)
+        token = _transaccion_actual.set(tx)
+        try:
+            yield tx
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            _transaccion_actual.reset(token)
+
+    for fn in tx._al_confirmar:
+        _ejecutar_hook(fn)
+
+def _ejecutar_hook(fn):
+    # El commit ya se hizo: si un hook falla no hay que cortar los demás ni
+    # devolver un error por una escritura que quedó guardada.
     try:
+        fn()
+    except Exception as e:
+        logger.error(f"Falló un hook posterior al commit ({getattr(fn, '__name__', fn)}): {e}")
+
+def al_confirmar(fn):
+    """
+    Ejecuta `fn` cuando la transacción actual haga commit, o en el momento si
+    no hay ninguna abierta. Sirve para mantener cachés en memoria en sintonía
+    con lo que realmente quedó en la base.
+    """
+    tx = _transaccion_actual.get()
+    if tx is None:
+        _ejecutar_hook(fn)
+    else:
+        tx.al_confirmar(fn)
+
+
+def fetch_all(query, params=None):
+    tx = _transaccion_actual.get()
+    if tx is not None:
+        return tx.fetch_all(query, params)
+
+    with pooled_connection() as conn:
+        cur = conn.cursor(dictionary=True)
+        try:
+            cur.execute(query, params or ())
+            results = cur.fetchall()
+            return results
+        finally:
+            cur.close()
+
+def execute_query(query, params=None):
+    tx = _transaccion_actual.get()
+    if tx is not None:
+        return tx.execute_query(query, params)
+
+    with pooled_connection() as conn:
         cur = conn.cursor()
-        cur.execute(query, params or ())
-        conn.commit()
-        return cur.lastrowid
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        cur.close()
-        conn.close()
+        try:
+            cur.execute(query, params or ())
+            conn.commit()
+            return cur.lastrowid
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+def execute_rowcount(query, params=None):
+    """Como execute_query, pero devuelve la cantidad de filas afectadas."""
+    tx = _transaccion_actual.get()
+    if tx is not None:
+        return tx.execute_rowcount(query, params)
+
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params or ())
+            conn.commit()
+            return cur.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
 
 def execute_many_queries(query, params_list):
-    conn = connection()
-    try:
+    tx = _transaccion_actual.get()
+    if tx is not None:
+        return tx.execute_many_queries(query, params_list)
+
+    with pooled_connection() as conn:
         cur = conn.cursor()
-        cur.executemany(query, params_list)
-        conn.commit()
-        return cur.rowcount
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        cur.close()
-        conn.close()
+        try:
+            cur.executemany(query, params_list)
+            conn.commit()
+            return cur.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+def fetch_iter(query, params=None, chunk_size=1000):
+    """
+    Igual que fetch_all pero sin cargar todo el resultado en memoria: usa un
+    cursor no bufferizado (las filas se leen del servidor a medida que se
+    piden) y devuelve un generador que entrega listas de hasta `chunk_size`
+    filas. La conexión queda tomada del pool hasta que el generador termina
+    o se cierra. No participa de la transacción abierta, si la hay.
+    """
+    # el rol se resuelve ahora: el generador puede consumirse en otro hilo
+    # (StreamingResponse) donde userRol ya no tiene el valor del request
+    pool = _pool(userRol.get())
+
+    def _filas():
+        conn = pool.obtener()
+        completo = False
+        try:
+            cur = conn.cursor(dictionary=True, buffered=False)
+            try:
+                cur.execute(query, params or ())
+                while True:
+                    filas = cur.fetchmany(chunk_size)
+                    if not filas:
+                        break
+                    yield filas
+                completo = True
+            finally:
+                if completo:
+                    cur.close()
+        finally:
+            if completo:
+                pool.devolver(conn)
+            else:
+                # el cliente cortó la descarga o hubo un error: quedan filas
+                # sin leer y limpiar la conexión implicaría traerlas todas,
+                # así que se cierra
+                pool.descartar(conn)
+
+    return _filas()
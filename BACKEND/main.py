@@ -11,47 +11,52 @@ from api import (
     facultad,
     turno,
     consultas,
-    admin
+    admin,
+    exportacion,
+    analitica
 )
 from contextlib import asynccontextmanager
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-from services.scheduler_service import (
-    procesar_reservas_finalizadas
-)
+import logging
+import multiprocessing
+import os
+import scheduler_worker
 
 # Para decodificar token y consultar rol
 from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
 from services.auth_services import SECRET_KEY, ALGORITHM
-from db import fetch_all
-from context import userRol
+from services.versiones_token import tabla_versiones, usuario_de_claims, usuario_de_token
+from db import cerrar_pools
+from services.bcrypt_pool import pool_bcrypt
+from context import userRol, rol_de_base
 
-scheduler = BackgroundScheduler()
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manejo del ciclo de vida de la aplicación"""
     
-    print("\n Iniciando jobs")
-    
-    # 1. Procesar reservas finalizadas: cada hora en punto
-    scheduler.add_job(
-        procesar_reservas_finalizadas,
-        trigger=CronTrigger(minute=0), 
-        id='procesar_reservas',
-        name='Procesar reservas finalizadas',
-        replace_existing=True
-    )
-    print("✓ Tarea 'procesar_reservas' configurada (cada hora en punto)")
-    
-    
-    # Iniciar scheduler
-    scheduler.start()
-    print("✅ Scheduler iniciado correctamente\n")
+    # Las tareas programadas corren en un proceso aparte (ver
+    # scheduler_worker.py). Con SCHEDULER_EN_API=false la API no lo lanza y
+    # el worker se corre como servicio propio.
+    proceso_scheduler = None
+    if os.getenv("SCHEDULER_EN_API", "true").strip().lower() in ("1", "true", "yes", "si", "on"):
+        print("\n Iniciando jobs")
+        proceso_scheduler = multiprocessing.get_context("spawn").Process(
+            target=scheduler_worker.main,
+            name="scheduler_worker",
+            daemon=True
+        )
+        proceso_scheduler.start()
+        print(f"✓ Scheduler lanzado en el proceso {proceso_scheduler.pid}")
     yield  
-    print("\n🛑 Deteniendo tareas programadas...")
-    scheduler.shutdown()
-    print("✅ Scheduler detenido\n")
+    if proceso_scheduler is not None:
+        print("\n🛑 Deteniendo tareas programadas...")
+        proceso_scheduler.terminate()
+        proceso_scheduler.join(timeout=10)
+        print("✅ Scheduler detenido\n")
+    pool_bcrypt.cerrar()
+    cerrar_pools()
 
 
 
@@ -62,23 +67,19 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-from starlette.concurrency import run_in_threadpool
-from jose import JWTError, jwt
-from services.auth_services import SECRET_KEY, ALGORITHM
-from db import fetch_all
-from context import userRol
-
 @app.middleware("http")
 async def attach_user_role_middleware(request: Request, call_next):
     """Middleware que extrae token y carga request.state.user / request.state.role.
-       - Ejecuta el fetch en threadpool.
-       - Forza userRol('login') antes de la consulta para garantizar credenciales read-only.
+       - Valida el token con sus claims (id, rol, versión) contra la tabla de
+         versiones en memoria; solo refresca la tabla o consulta la base (en
+         threadpool) cuando hace falta.
+       - get_current_user reutiliza request.state.user en lugar de repetir la consulta.
        - Luego mapea userRol según rol real del participante antes de ejecutar el request.
     """
     request.state.user = None
     request.state.role = None
+    request.state.auth_error = False
 
-    token_ctx_before = None
     token_ctx_after = None
 
     auth_header = request.headers.get("Authorization")
@@ -90,38 +91,32 @@ async def attach_user_role_middleware(request: Request, call_next):
             email = payload.get("sub")
 
             if email:
-                # 1) Seteamos userRol a 'login' temporalmente para que fetch_all
-                #    use el usuario read-only correcto en la consulta.
-                token_ctx_before = userRol.set("login")
                 try:
-                    q = """
-                        SELECT id_participante, email, rol, activo
-                        FROM participante
-                        WHERE email = %s
-                    """
-                    # Ejecutar la consulta en threadpool (no bloquear event loop)
-                    res = await run_in_threadpool(fetch_all, q, (email,))
-
-                    if res and res[0].get("activo"):
+                    # camino habitual: claims + tabla de versiones, sin I/O
+                    usuario, resuelto = (None, False) if tabla_versiones.vencida() else usuario_de_claims(payload)
+                    if not resuelto:
+                        usuario = await run_in_threadpool(usuario_de_token, payload)
+
+                    if usuario:
                         request.state.user = {
-                            "id_participante": res[0]["id_participante"],
-                            "email": res[0]["email"]
+                            "id_participante": usuario["id_participante"],
+                            "email": usuario["email"]
                         }
-                        request.state.role = res[0]["rol"]
+                        request.state.role = usuario["rol"]
                     else:
-                        # usuario inexistente o inactivo -> no autenticado
+                        # usuario inexistente, inactivo o token revocado -> no autenticado
                         request.state.user = None
                         request.state.role = None
                 except Exception as ex_fetch:
-                    # Si la consulta falla por cualquier motivo, fallback al rol en token
-                    request.state.role = payload.get("rol")
-                finally:
-                    # revertimos el contexto temporal dejado por token_ctx_before
-                    if token_ctx_before is not None:
-                        try:
-                            userRol.reset(token_ctx_before)
-                        except Exception:
-                            pass
+                    # Si la consulta falla, no se confía en el rol del token
+                    # (puede estar revocado o el usuario inactivo): el request
+                    # sigue como no autenticado (rol 'login') y get_current_user
+                    # responde 503 sin reintentar: el endpoint nunca corre con
+                    # un rol de base que no le corresponde
+                    logger.error(f"No se pudo validar el usuario del token: {ex_fetch}")
+                    request.state.user = None
+                    request.state.role = None
+                    request.state.auth_error = True
 
         except JWTError:
             # Token inválido/expirado -> dejamos user/role en None
@@ -129,12 +124,7 @@ async def attach_user_role_middleware(request: Request, call_next):
 
     
     try:
-        if request.state.role == 'admin':
-            token_ctx_after = userRol.set('admin')
-        elif request.state.role in ['alumno_grado', 'alumno_posgrado', 'docente']:
-            token_ctx_after = userRol.set('user')
-        else:
-            token_ctx_after = userRol.set('login')
+        token_ctx_after = userRol.set(rol_de_base(request.state.role))
 
         # Continuar con el request (ahora con userRol correcto)
         response = await call_next(request)
@@ -171,6 +161,8 @@ api_router.include_router(facultad.router)
 api_router.include_router(turno.router)
 api_router.include_router(consultas.router)
 api_router.include_router(admin.router)
+api_router.include_router(exportacion.router)
+api_router.include_router(analitica.router)
 
 app.include_router(api_router)
 
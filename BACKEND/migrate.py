@@ -0,0 +1,128 @@
+"""
+migrate: aplica las migraciones SQL numeradas de /migrations (docker-compose).
+
+Cada archivo se llama NNN_descripcion.sql y se aplica una sola vez; las
+versiones aplicadas quedan en la tabla schema_version. Se corre después de
+wait-for-db.py y antes de seed_data.py.
+"""
+import os
+import re
+import sys
+from pathlib import Path
+import mysql.connector
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+# errores que indican que el objeto ya existe: permiten re-ejecutar una
+# migración que quedó a medias (el DDL en MySQL hace commit implícito)
+ERRORES_YA_APLICADO = {
+    1050,  # ER_TABLE_EXISTS_ERROR
+    1060,  # ER_DUP_FIELDNAME
+    1061,  # ER_DUP_KEYNAME
+    1826,  # ER_FK_DUP_NAME
+}
+
+def get_connection():
+    """Usa DB_USER/DB_PASSWORD (root, puede otorgar permisos) o, si no están, el usuario admin."""
+    user = os.getenv("DB_USER") or os.getenv("DB_USER_ADMIN")
+    pwd = os.getenv("DB_PASSWORD") if os.getenv("DB_USER") else os.getenv("DB_PASSWORD_ADMIN")
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", 3306)),
+        user=user,
+        password=pwd or "",
+        database=os.getenv("DB_NAME", "reserva_salas"),
+        autocommit=False
+    )
+
+def split_statements(sql):
+    """
+    Separa un archivo SQL en sentencias. Soporta `DELIMITER` para poder
+    definir triggers/procedimientos igual que en init.sql.
+    """
+    statements = []
+    delimiter = ";"
+    buffer = []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not buffer and (not stripped or stripped.startswith("--")):
+            continue
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = "\n".join(buffer).rstrip()
+            statement = statement[: -len(delimiter)].strip()
+            if statement:
+                statements.append(statement)
+            buffer = []
+    resto = "\n".join(buffer).strip()
+    if resto:
+        statements.append(resto)
+    return statements
+
+def pending_migrations(aplicadas):
+    migraciones = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        match = re.match(r"^(\d+)_(.+)\.sql$", path.name)
+        if not match:
+            print(f"WARNING: se ignora {path.name} (formato esperado NNN_nombre.sql)")
+            continue
+        version = int(match.group(1))
+        if version not in aplicadas:
+            migraciones.append((version, match.group(2), path))
+    return migraciones
+
+def main():
+    print("--- migrate: starting ---")
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+              version INT PRIMARY KEY,
+              nombre VARCHAR(200) NOT NULL,
+              aplicado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+
+        cur.execute("SELECT version FROM schema_version")
+        aplicadas = {row[0] for row in cur.fetchall()}
+
+        pendientes = pending_migrations(aplicadas)
+        if not pendientes:
+            print("✅ Esquema al día, no hay migraciones pendientes.")
+            return 0
+
+        for version, nombre, path in pendientes:
+            print(f"-> Aplicando {path.name}...")
+            for statement in split_statements(path.read_text(encoding="utf-8")):
+                try:
+                    cur.execute(statement)
+                except mysql.connector.Error as e:
+                    if e.errno in ERRORES_YA_APLICADO:
+                        print(f"   (ya existía, se omite: {e.msg})")
+                        continue
+                    raise
+            cur.execute(
+                "INSERT INTO schema_version (version, nombre) VALUES (%s, %s)",
+                (version, nombre)
+            )
+            conn.commit()
+            print(f"✅ Migración {version:03d} aplicada")
+
+        print("--- migrate: finished ---")
+        return 0
+    except Exception as e:
+        conn.rollback()
+        print(f"🚨 Error aplicando migraciones: {e}")
+        return 1
+    finally:
+        cur.close()
+        conn.close()
+
+if __name__ == "__main__":
+    code = main()
+    sys.exit(code)
@@ -0,0 +1,41 @@
+-- Tabla de turnos ocupados (ver init.sql) para bases creadas antes de que
+-- existiera, con backfill desde reserva y trigger sin escaneo de solapamiento.
+
+CREATE TABLE IF NOT EXISTS sala_turno_ocupado (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  id_sala INT NOT NULL,
+  fecha DATE NOT NULL,
+  id_turno INT NOT NULL,
+  id_reserva INT NOT NULL,
+  UNIQUE KEY uq_sala_fecha_turno (id_sala, fecha, id_turno),
+  KEY idx_ocupado_reserva (id_reserva),
+  FOREIGN KEY (id_sala) REFERENCES sala(id_sala) ON DELETE CASCADE,
+  FOREIGN KEY (id_turno) REFERENCES turno(id_turno),
+  FOREIGN KEY (id_reserva) REFERENCES reserva(id_reserva) ON DELETE CASCADE
+);
+
+INSERT IGNORE INTO sala_turno_ocupado (id_sala, fecha, id_turno, id_reserva)
+SELECT r.id_sala, r.fecha, t.id_turno, r.id_reserva
+FROM reserva r
+JOIN turno t ON t.id_turno BETWEEN r.start_turn_id AND r.end_turn_id
+WHERE r.estado IN ('activa', 'confirmada');
+
+DROP TRIGGER IF EXISTS trg_reserva_before_insert;
+
+DELIMITER $$
+CREATE TRIGGER trg_reserva_before_insert
+BEFORE INSERT ON reserva
+FOR EACH ROW
+BEGIN
+  IF NEW.start_turn_id > NEW.end_turn_id THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Error: start_turn_id debe ser <= end_turn_id';
+  END IF;
+
+  IF NEW.fecha < CURDATE() AND (NEW.estado = 'confirmada' OR NEW.estado = 'activa') THEN
+    SIGNAL SQLSTATE '45000'
+      SET MESSAGE_TEXT = 'La fecha debe ser hoy o futura';
+  END IF;
+END$$
+DELIMITER ;
+
+GRANT SELECT, INSERT, DELETE ON reserva_salas.sala_turno_ocupado TO 'user'@'%';
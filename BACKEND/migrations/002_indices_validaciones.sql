@@ -0,0 +1,14 @@
+-- Índices compuestos para las consultas de services/validaciones.py y de
+-- disponibilidad, que filtran exactamente por estas columnas.
+
+CREATE INDEX idx_reserva_sala_fecha_estado
+  ON reserva (id_sala, fecha, estado);
+
+CREATE INDEX idx_reserva_participante_part_reserva
+  ON reserva_participante (id_participante, id_reserva);
+
+CREATE INDEX idx_sancion_part_fechas
+  ON sancion_participante (id_participante, fecha_inicio, fecha_fin);
+
+CREATE INDEX idx_participante_ci
+  ON participante (ci);
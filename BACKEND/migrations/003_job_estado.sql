@@ -0,0 +1,13 @@
+-- Estado persistente de las tareas programadas. Para procesar_reservas guarda
+-- la marca de agua: la última (fecha, turno) cuyas reservas ya se cerraron.
+
+CREATE TABLE IF NOT EXISTS job_estado (
+  job VARCHAR(100) PRIMARY KEY,
+  marca_fecha DATE NULL,
+  marca_turno INT NULL,
+  actualizado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- el procesamiento incremental busca reservas por fecha y turno de fin
+CREATE INDEX idx_reserva_fecha_fin
+  ON reserva (fecha, end_turn_id);
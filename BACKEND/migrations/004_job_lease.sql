@@ -0,0 +1,13 @@
+-- Lease del scheduler: entre todos los procesos que corren el scheduler
+-- (workers de uvicorn, réplicas), solo el que tiene el lease vigente ejecuta
+-- las tareas. Las fechas se toman del reloj de la base para no depender del
+-- reloj de cada nodo.
+
+CREATE TABLE IF NOT EXISTS job_lease (
+  job VARCHAR(100) PRIMARY KEY,
+  nodo VARCHAR(255) NOT NULL,
+  adquirido_en DATETIME NOT NULL,
+  renovado_en DATETIME NOT NULL,
+  expira_en DATETIME NOT NULL,
+  tareas TEXT NULL
+);
@@ -0,0 +1,16 @@
+-- Historial de ejecuciones de las tareas programadas (y de las manuales),
+-- para ver cuánto tarda cada una a medida que crecen las tablas.
+
+CREATE TABLE IF NOT EXISTS job_run (
+  id_run INT AUTO_INCREMENT PRIMARY KEY,
+  job VARCHAR(100) NOT NULL,
+  nodo VARCHAR(255) NOT NULL,
+  inicio DATETIME(3) NOT NULL,
+  fin DATETIME(3) NULL,
+  duracion_ms INT NULL,
+  filas_escaneadas INT NULL,
+  filas_actualizadas INT NULL,
+  sanciones_creadas INT NULL,
+  error TEXT NULL,
+  KEY idx_job_run_job_inicio (job, inicio)
+);
@@ -0,0 +1,76 @@
+-- Agregados diarios para los reportes (services/consultas_service.py). Se
+-- mantienen desde services/rollup_service.py, que recalcula días completos:
+-- por eso no tienen clave única, cada recálculo borra e inserta el día.
+
+-- reservas por día, sala, turno de inicio, estado y rol de quien la creó
+CREATE TABLE IF NOT EXISTS rollup_reserva_dia (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  fecha DATE NOT NULL,
+  id_sala INT NOT NULL,
+  id_turno INT NOT NULL,
+  estado VARCHAR(20) NOT NULL,
+  rol_creador VARCHAR(30) NULL,
+  n_reservas INT NOT NULL,
+  n_turnos INT NOT NULL,
+  n_participantes INT NOT NULL,
+  n_confirmados INT NOT NULL,
+  n_presentes INT NOT NULL,
+  KEY idx_rollup_reserva_fecha (fecha, id_sala)
+);
+
+-- reservas por día, fecha de creación, sala y creador
+CREATE TABLE IF NOT EXISTS rollup_creador_dia (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  fecha DATE NOT NULL,
+  fecha_creacion DATE NOT NULL,
+  id_sala INT NOT NULL,
+  creado_por INT NOT NULL,
+  n_reservas INT NOT NULL,
+  KEY idx_rollup_creador_fecha (fecha, id_sala),
+  KEY idx_rollup_creador_part (creado_por)
+);
+
+-- participaciones por día, sala y rol del participante
+CREATE TABLE IF NOT EXISTS rollup_participacion_dia (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  fecha DATE NOT NULL,
+  id_sala INT NOT NULL,
+  rol VARCHAR(30) NOT NULL,
+  n_participaciones INT NOT NULL,
+  n_confirmadas INT NOT NULL,
+  n_presentes INT NOT NULL,
+  KEY idx_rollup_participacion_fecha (fecha, id_sala)
+);
+
+-- carga inicial con toda la historia
+INSERT INTO rollup_reserva_dia
+  (fecha, id_sala, id_turno, estado, rol_creador, n_reservas, n_turnos,
+   n_participantes, n_confirmados, n_presentes)
+SELECT r.fecha, r.id_sala, r.start_turn_id, r.estado, p.rol,
+       COUNT(*), SUM(r.end_turn_id - r.start_turn_id + 1),
+       COALESCE(SUM(x.n), 0), COALESCE(SUM(x.confirmados), 0), COALESCE(SUM(x.presentes), 0)
+FROM reserva r
+LEFT JOIN participante p ON p.id_participante = r.creado_por
+LEFT JOIN (
+  SELECT id_reserva, COUNT(*) AS n,
+         SUM(estado_participacion = 'confirmada') AS confirmados,
+         SUM(asistencia = 'presente') AS presentes
+  FROM reserva_participante
+  GROUP BY id_reserva
+) x ON x.id_reserva = r.id_reserva
+GROUP BY r.fecha, r.id_sala, r.start_turn_id, r.estado, p.rol;
+
+INSERT INTO rollup_creador_dia (fecha, fecha_creacion, id_sala, creado_por, n_reservas)
+SELECT r.fecha, DATE(r.created_at), r.id_sala, r.creado_por, COUNT(*)
+FROM reserva r
+WHERE r.creado_por IS NOT NULL
+GROUP BY r.fecha, DATE(r.created_at), r.id_sala, r.creado_por;
+
+INSERT INTO rollup_participacion_dia
+  (fecha, id_sala, rol, n_participaciones, n_confirmadas, n_presentes)
+SELECT r.fecha, r.id_sala, p.rol, COUNT(*),
+       SUM(rp.estado_participacion = 'confirmada'), SUM(rp.asistencia = 'presente')
+FROM reserva_participante rp
+JOIN reserva r ON r.id_reserva = rp.id_reserva
+JOIN participante p ON p.id_participante = rp.id_participante
+GROUP BY r.fecha, r.id_sala, p.rol;
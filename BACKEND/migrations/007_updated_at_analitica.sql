@@ -0,0 +1,15 @@
+-- Refresco incremental de la foto en memoria de services/analitica_service.py:
+-- se releen solo las reservas cuyo registro o cuyos participantes cambiaron
+-- desde la última lectura.
+
+ALTER TABLE reserva_participante
+  ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+
+CREATE INDEX idx_reserva_updated_at
+  ON reserva (updated_at);
+
+CREATE INDEX idx_reserva_participante_updated_at
+  ON reserva_participante (updated_at);
+
+CREATE INDEX idx_participante_updated_at
+  ON participante (updated_at);
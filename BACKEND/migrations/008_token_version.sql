@@ -0,0 +1,6 @@
+-- Versión de los tokens de cada participante: el JWT lleva la versión con la
+-- que se emitió y deja de valer cuando se incrementa (desactivación o cambio
+-- de rol/email). Ver services/versiones_token.py.
+
+ALTER TABLE participante
+  ADD COLUMN token_version INT NOT NULL DEFAULT 0;
@@ -0,0 +1,6 @@
+-- El login rehashea la contraseña cuando su costo bcrypt no es el
+-- configurado (BCRYPT_ROUNDS), y lo hace con el usuario de la base 'login'.
+
+GRANT UPDATE (password_hash) ON reserva_salas.login TO 'login'@'%';
+
+FLUSH PRIVILEGES;
@@ -0,0 +1,18 @@
+-- Fechas con reservas modificadas cuyos agregados (rollup_*) falta
+-- recalcular. Las escrituras sobre reservas insertan una fila en su propia
+-- transacción (sin clave única: cada escritura agrega su fila y no compite
+-- por locks con las demás) y el scheduler las recalcula y borra. Si un
+-- recálculo falla la fila queda, con intentos y el último error, y se
+-- reintenta en la próxima corrida. Ver services/rollup_service.py.
+
+CREATE TABLE IF NOT EXISTS rollup_pendiente (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  fecha DATE NOT NULL,
+  marcada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  intentos INT NOT NULL DEFAULT 0,
+  ultimo_error TEXT NULL
+);
+
+GRANT INSERT ON reserva_salas.rollup_pendiente TO 'user'@'%';
+
+FLUSH PRIVILEGES;
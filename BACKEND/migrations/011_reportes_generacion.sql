@@ -0,0 +1,11 @@
+-- Generación de los datos de los reportes, compartida entre procesos: cada
+-- recálculo de rollups la incrementa en su misma transacción y las cachés de
+-- reportes de la API la consultan cada pocos segundos para invalidarse (ver
+-- services/cache_reportes.py). Una sola fila.
+
+CREATE TABLE IF NOT EXISTS reportes_generacion (
+  id TINYINT PRIMARY KEY,
+  generacion BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT IGNORE INTO reportes_generacion (id, generacion) VALUES (1, 0);
@@ -0,0 +1,6 @@
+-- dia_con_mas_creaciones_reservas (services/consultas_service.py) filtra el
+-- período por fecha_creacion, no por fecha: sin este índice recorre todo
+-- rollup_creador_dia.
+
+CREATE INDEX idx_rollup_creador_creacion
+  ON rollup_creador_dia (fecha_creacion, id_sala);
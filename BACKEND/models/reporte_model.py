@@ -0,0 +1,23 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Literal, Optional
+from datetime import date, timedelta
+
+
+class FiltrosReporte(BaseModel):
+	# inmutable (y por lo tanto hashable) para poder ser parte de la clave
+	# de la caché de reportes
+	model_config = ConfigDict(frozen=True)
+
+	desde: Optional[date] = None
+	hasta: Optional[date] = None
+	id_edificio: Optional[int] = None
+	tipo: Optional[Literal['libre', 'posgrado', 'docente']] = None
+	rol: Optional[Literal['alumno_grado', 'alumno_posgrado', 'docente', 'admin']] = None
+
+	def periodo_anterior(self) -> "FiltrosReporte":
+		"""Mismos filtros sobre el período de igual largo inmediatamente anterior."""
+		dias = (self.hasta - self.desde).days + 1
+		return self.model_copy(update={
+			"desde": self.desde - timedelta(days=dias),
+			"hasta": self.desde - timedelta(days=1),
+		})
@@ -0,0 +1,129 @@
+"""
+scheduler_worker: proceso que ejecuta las tareas programadas.
+
+Corre aparte de la API (main.py lo lanza como proceso hijo, o se puede
+correr solo con `python scheduler_worker.py`), así el trabajo batch no usa
+el threadpool de los requests. Si hay varios procesos (workers de uvicorn o
+réplicas) todos mantienen su scheduler, pero solo el que tiene el lease de
+job_lease ejecuta las tareas.
+"""
+import logging
+import signal
+import sys
+from functools import wraps
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from db import cerrar_pools
+from services.lease_service import Lease, LEASE_RENOVACION, ejecucion_exclusiva, LeaseOcupadoError
+from services.job_run_service import ejecutar_registrando
+from services.rollup_service import recalcular_pendientes, INTERVALO as ROLLUP_INTERVALO
+from services.scheduler_service import (
+    procesar_reservas_finalizadas,
+    trigger_fin_de_turnos
+)
+
+logger = logging.getLogger("scheduler_worker")
+
+def _solo_lider(lease, job_id, fn):
+    @wraps(fn)
+    def tarea(*args, **kwargs):
+        # se vuelve a confirmar contra la base justo antes de ejecutar: el
+        # flag local puede haber quedado viejo si la renovación falló
+        try:
+            es_lider = lease.adquirir()
+        except Exception as e:
+            logger.error(f"No se pudo verificar el lease: {e}")
+            return None
+        if not es_lider:
+            logger.info(f"'{job_id}' se omite: el lease lo tiene otro nodo")
+            return None
+        # además del liderazgo, la tarea en sí: puede estar corriendo una
+        # ejecución manual lanzada desde la API
+        try:
+            with ejecucion_exclusiva(job_id):
+                return ejecutar_registrando(job_id, fn, *args, **kwargs)
+        except LeaseOcupadoError as e:
+            logger.info(f"'{job_id}' se omite: {e}")
+            return None
+    return tarea
+
+def _tareas(scheduler):
+    return [
+        {
+            "id": job.id,
+            "name": job.name,
+            "next_run": str(job.next_run_time),
+            "trigger": str(job.trigger)
+        }
+        for job in scheduler.get_jobs()
+        if job.id != 'renovar_lease'
+    ]
+
+def main():
+    lease = Lease()
+    scheduler = BlockingScheduler()
+
+    def renovar():
+        try:
+            era_lider = lease.es_lider
+            if lease.adquirir():
+                if not era_lider:
+                    logger.info(f"Nodo {lease.nodo}: lease adquirido")
+                lease.publicar_tareas(_tareas(scheduler))
+            elif era_lider:
+                logger.warning(f"Nodo {lease.nodo}: se perdió el lease")
+        except Exception as e:
+            logger.error(f"Error renovando el lease: {e}")
+
+    scheduler.add_job(
+        renovar,
+        trigger=IntervalTrigger(seconds=LEASE_RENOVACION),
+        id='renovar_lease',
+        name='Renovar lease del scheduler',
+        replace_existing=True
+    )
+
+    # 1. Procesar reservas finalizadas: al terminar cada turno
+    scheduler.add_job(
+        _solo_lider(lease, 'procesar_reservas', procesar_reservas_finalizadas),
+        trigger=trigger_fin_de_turnos(),
+        id='procesar_reservas',
+        name='Procesar reservas finalizadas',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+
+    # 2. Recalcular los agregados de reportes de las fechas encoladas
+    scheduler.add_job(
+        _solo_lider(lease, 'recalcular_rollups_pendientes', recalcular_pendientes),
+        trigger=IntervalTrigger(seconds=ROLLUP_INTERVALO),
+        id='recalcular_rollups_pendientes',
+        name='Recalcular agregados de reportes pendientes',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+
+    def detener(signum, frame):
+        scheduler.shutdown(wait=False)
+
+    signal.signal(signal.SIGTERM, detener)
+    signal.signal(signal.SIGINT, detener)
+
+    renovar()
+    print(f"✅ Scheduler iniciado en {lease.nodo} ({'líder' if lease.es_lider else 'en espera'})")
+    try:
+        scheduler.start()
+    finally:
+        try:
+            if lease.es_lider:
+                lease.liberar()
+        except Exception as e:
+            logger.error(f"No se pudo liberar el lease: {e}")
+        cerrar_pools()
+        print(f"🛑 Scheduler detenido en {lease.nodo}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
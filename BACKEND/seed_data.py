@@ -6,9 +6,11 @@ from pathlib import Path
 # Agregar el directorio padre al path para importar módulos
 sys.path.append(str(Path(__file__).parent.parent))
 
-from db import execute_query, execute_many_queries, fetch_all
+from db import execute_query, execute_many_queries, fetch_all, transaction
 from context import userRol
 from services.auth_services import hash_password
+from services.ocupacion_service import ocupar_turnos, ESTADOS_OCUPAN
+from services.rollup_service import recalcular_rollups
 
 # Colores para consola
 class Color:
@@ -270,19 +272,28 @@ def cargar_reservas(archivo_csv):
             
             for row in reader:
                 try:
-                    id_reserva = execute_query(
-                        """INSERT INTO reserva 
-                           (id_sala, fecha, start_turn_id, end_turn_id, estado, creado_por) 
-                           VALUES (%s, %s, %s, %s, %s, %s)""",
-                        (
-                            int(row['id_sala']),
-                            row['fecha'],
-                            int(row['start_turn_id']),
-                            int(row['end_turn_id']),
-                            row['estado'],
-                            int(row['creado_por']) if row.get('creado_por') else None
+                    with transaction():
+                        id_reserva = execute_query(
+                            """INSERT INTO reserva 
+                               (id_sala, fecha, start_turn_id, end_turn_id, estado, creado_por) 
+                               VALUES (%s, %s, %s, %s, %s, %s)""",
+                            (
+                                int(row['id_sala']),
+                                row['fecha'],
+                                int(row['start_turn_id']),
+                                int(row['end_turn_id']),
+                                row['estado'],
+                                int(row['creado_por']) if row.get('creado_por') else None
+                            )
                         )
-                    )
+                        if row['estado'] in ESTADOS_OCUPAN:
+                            ocupar_turnos(
+                                id_reserva,
+                                int(row['id_sala']),
+                                row['fecha'],
+                                int(row['start_turn_id']),
+                                int(row['end_turn_id'])
+                            )
                     insertados += 1
                     print_success(f"Reserva {id_reserva} insertada")
                 
@@ -401,6 +412,11 @@ def main():
     execute_query("SET FOREIGN_KEY_CHECKS = 0;")
     
     # Eliminar datos de tablas dependientes primero
+    execute_query("DELETE FROM sala_turno_ocupado;")
+    execute_query("DELETE FROM rollup_reserva_dia;")
+    execute_query("DELETE FROM rollup_creador_dia;")
+    execute_query("DELETE FROM rollup_participacion_dia;")
+    execute_query("DELETE FROM rollup_pendiente;")
     execute_query("DELETE FROM reserva_participante;")
     execute_query("DELETE FROM sancion_participante;")
     execute_query("DELETE FROM reserva;")
@@ -413,6 +429,7 @@ def main():
     execute_query("DELETE FROM facultad;")
 
     # Resetear AUTO_INCREMENT para todas las tablas con PK auto_incrementable
+    execute_query("ALTER TABLE sala_turno_ocupado AUTO_INCREMENT = 1;")
     execute_query("ALTER TABLE reserva_participante AUTO_INCREMENT = 1;")
     execute_query("ALTER TABLE sancion_participante AUTO_INCREMENT = 1;")
     execute_query("ALTER TABLE reserva AUTO_INCREMENT = 1;")
@@ -449,6 +466,12 @@ def main():
     
     # 7. Sanciones
     cargar_sanciones(csv_dir / "sanciones.csv")
+
+    # 8. Agregados de los reportes para todas las fechas cargadas
+    rango = fetch_all("SELECT MIN(fecha) AS desde, MAX(fecha) AS hasta FROM reserva")
+    if rango and rango[0]["desde"] is not None:
+        recalcular_rollups(rango[0]["desde"], rango[0]["hasta"])
+        print_success("Agregados de reportes (rollup_*) recalculados")
     
     print("\n" + "="*60)
     print("CARGA COMPLETADA")
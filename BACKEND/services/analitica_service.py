@@ -0,0 +1,625 @@
+import os
+import threading
+import time
+from datetime import date
+from fastapi import HTTPException
+from db import fetch_all, fetch_iter
+from context import con_rol
+from models.reporte_model import FiltrosReporte
+from services.disponibilidad_service import TURNOS, a_fecha
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él los endpoints de /analitica responden 503
+    np = None
+
+# Motor de analítica en memoria: una foto columnar (arrays de NumPy) de
+# reserva + reserva_participante + sala + turno + participante sobre la que
+# los reportes se calculan con bincount/máscaras en lugar de GROUP BY en
+# MySQL. La foto se refresca de forma incremental, a lo sumo cada
+# ANALITICA_TTL segundos: se releen solo las reservas cuyo updated_at (o el
+# de alguno de sus participantes) es posterior a la última lectura, más las
+# que este proceso marcó como cambiadas (las borradas no tienen updated_at).
+# Cada ANALITICA_RECARGA_COMPLETA segundos se recarga todo, lo que también
+# recoge borrados hechos por otros procesos.
+
+TTL = float(os.getenv("ANALITICA_TTL", 30))
+RECARGA_COMPLETA = float(os.getenv("ANALITICA_RECARGA_COMPLETA", 3600))
+LOTE_IDS = 1000
+
+ESTADOS = ('activa', 'confirmada', 'cancelada', 'finalizada', 'no_asistencia')
+ESTADOS_PARTICIPACION = ('pendiente', 'confirmada', 'rechazada')
+ASISTENCIAS = ('presente', 'ausente', 'no_registrado')
+ROLES = ('alumno_grado', 'alumno_posgrado', 'docente', 'admin')
+TIPOS = ('libre', 'posgrado', 'docente')
+# mismos nombres que devuelve DAYNAME() en los reportes SQL
+DIAS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+ACTIVA, CONFIRMADA, CANCELADA, FINALIZADA, NO_ASISTENCIA = range(len(ESTADOS))
+PRESENTE, AUSENTE, NO_REGISTRADO = range(len(ASISTENCIAS))
+
+COLUMNAS_RESERVA = """
+    SELECT r.id_reserva, r.id_sala, r.fecha, r.start_turn_id, r.end_turn_id,
+           r.estado, r.creado_por, DATE(r.created_at) AS creada
+    FROM reserva r
+"""
+COLUMNAS_PARTICIPACION = """
+    SELECT rp.id_reserva, rp.id_participante, rp.estado_participacion, rp.asistencia
+    FROM reserva_participante rp
+"""
+
+def requerir_numpy():
+    if np is None:
+        raise HTTPException(
+            status_code=503,
+            detail="El módulo de analítica requiere numpy (pip install numpy)"
+        )
+
+def _codigo(valores: tuple):
+    codigos = {v: i for i, v in enumerate(valores)}
+    return lambda v: codigos.get(v, -1)
+
+_cod_estado = _codigo(ESTADOS)
+_cod_estado_participacion = _codigo(ESTADOS_PARTICIPACION)
+_cod_asistencia = _codigo(ASISTENCIAS)
+_cod_rol = _codigo(ROLES)
+_cod_tipo = _codigo(TIPOS)
+
+
+# ==================== COLUMNAS ====================
+
+def _reservas_a_columnas(filas: list) -> dict:
+    n = len(filas)
+    return {
+        "id": np.fromiter((f["id_reserva"] for f in filas), np.int64, n),
+        "sala": np.fromiter((f["id_sala"] for f in filas), np.int64, n),
+        "fecha": np.fromiter((a_fecha(f["fecha"]).toordinal() for f in filas), np.int64, n),
+        "inicio": np.fromiter((f["start_turn_id"] for f in filas), np.int64, n),
+        "fin": np.fromiter((f["end_turn_id"] for f in filas), np.int64, n),
+        "estado": np.fromiter((_cod_estado(f["estado"]) for f in filas), np.int64, n),
+        "creador": np.fromiter(
+            (f["creado_por"] if f["creado_por"] is not None else -1 for f in filas), np.int64, n
+        ),
+        "creada": np.fromiter((a_fecha(f["creada"]).toordinal() for f in filas), np.int64, n),
+    }
+
+def _participaciones_a_columnas(filas: list) -> dict:
+    n = len(filas)
+    return {
+        "reserva": np.fromiter((f["id_reserva"] for f in filas), np.int64, n),
+        "participante": np.fromiter((f["id_participante"] for f in filas), np.int64, n),
+        "estado": np.fromiter((_cod_estado_participacion(f["estado_participacion"]) for f in filas), np.int64, n),
+        "asistencia": np.fromiter((_cod_asistencia(f["asistencia"]) for f in filas), np.int64, n),
+    }
+
+def _unir(a: dict, b: dict) -> dict:
+    return {k: np.concatenate([a[k], b[k]]) for k in a}
+
+def _filtrar(columnas: dict, mascara) -> dict:
+    return {k: v[mascara] for k, v in columnas.items()}
+
+def _posiciones(ids_ordenados, valores):
+    """Posición de cada valor en `ids_ordenados` y si efectivamente está."""
+    if len(ids_ordenados) == 0:
+        return np.zeros(len(valores), np.int64), np.zeros(len(valores), bool)
+    pos = np.searchsorted(ids_ordenados, valores)
+    pos = np.minimum(pos, len(ids_ordenados) - 1)
+    return pos, ids_ordenados[pos] == valores
+
+def _tomar(valores, pos, existe, defecto: int = -1):
+    if len(valores) == 0:
+        return np.full(len(pos), defecto, np.int64)
+    return np.where(existe, valores[pos], defecto)
+
+
+class Foto:
+    """
+    Foto inmutable de los datos: los reportes toman una referencia y
+    trabajan sobre ella sin locks mientras el refresco arma la siguiente.
+    Además de las columnas leídas guarda las derivadas que usan casi todos
+    los reportes (posición de la sala, rol del creador, conteos de
+    participantes por reserva).
+    """
+    def __init__(self, reservas: dict, participaciones: dict, salas: list, participantes: dict, turnos: list):
+        # salas
+        self.sala_id = np.array([s["id_sala"] for s in salas], np.int64)
+        self.sala_nombre = [s["nombre"] for s in salas]
+        self.sala_capacidad = np.array([s["capacidad"] for s in salas], np.int64)
+        self.sala_edificio = np.array([s["id_edificio"] for s in salas], np.int64)
+        self.sala_tipo = np.array([_cod_tipo(s["tipo"]) for s in salas], np.int64)
+        self.edificios = {s["id_edificio"]: s["edificio"] for s in salas}
+
+        # participantes (ordenados por id)
+        orden = np.argsort(participantes["id"], kind="stable")
+        self.part_id = participantes["id"][orden]
+        self.part_rol = participantes["rol"][orden]
+        self.part_nombre = [participantes["nombre"][i] for i in orden]
+
+        self.turno_descripcion = {t["id_turno"]: t["descripcion"] for t in turnos}
+
+        # reservas (ordenadas por id), sin las de salas que ya no existen
+        pos_sala, existe = _posiciones(self.sala_id, reservas["sala"])
+        reservas = _filtrar(reservas, existe)
+        pos_sala = pos_sala[existe]
+        orden = np.argsort(reservas["id"], kind="stable")
+        self.reservas = _filtrar(reservas, orden)
+        self.r_sala_pos = pos_sala[orden]
+        pos, existe = _posiciones(self.part_id, self.reservas["creador"])
+        self.r_creador_pos = np.where(existe, pos, -1)
+        self.r_rol_creador = _tomar(self.part_rol, pos, existe)
+
+        # participaciones, referidas por posición de reserva y de participante
+        pos_reserva, existe = _posiciones(self.reservas["id"], participaciones["reserva"])
+        pos_part, existe_part = _posiciones(self.part_id, participaciones["participante"])
+        validas = existe & existe_part
+        self.participaciones = _filtrar(participaciones, validas)
+        self.p_reserva_pos = pos_reserva[validas]
+        self.p_rol = self.part_rol[pos_part[validas]]
+
+        n = len(self.reservas["id"])
+        p = self.participaciones
+        self.r_participantes = np.bincount(self.p_reserva_pos, minlength=n)
+        self.r_confirmados = np.bincount(
+            self.p_reserva_pos, weights=p["estado"] == _cod_estado_participacion('confirmada'), minlength=n
+        ).astype(np.int64)
+        self.r_presentes = np.bincount(
+            self.p_reserva_pos, weights=p["asistencia"] == PRESENTE, minlength=n
+        ).astype(np.int64)
+
+    def __len__(self):
+        return len(self.reservas["id"])
+
+
+# ==================== FOTO E INCREMENTOS ====================
+
+def _leer(query: str, params=()) -> list:
+    filas = []
+    for lote in fetch_iter(query, params):
+        filas.extend(lote)
+    return filas
+
+def _por_lotes(ids: list):
+    for i in range(0, len(ids), LOTE_IDS):
+        yield ids[i:i + LOTE_IDS]
+
+
+class FotoAnalitica:
+    def __init__(self, ttl: float = TTL, recarga_completa: float = RECARGA_COMPLETA):
+        self.ttl = ttl
+        self.recarga_completa = recarga_completa
+        self._foto = None
+        self._reservas = None          # columnas crudas, base de los incrementos
+        self._participaciones = None
+        self._participantes = None
+        self._marca = None             # NOW() de la base al empezar la última lectura
+        self._refrescada_en = 0.0
+        self._completa_en = 0.0
+        self._cambiadas = set()        # id_reserva tocados por este proceso
+        self._lock = threading.Lock()
+        self.refrescos = 0
+        self.recargas = 0
+        self.ultimo_refresco_ms = None
+
+    # ---------- lectura ----------
+
+    def _leer_tablas_chicas(self):
+        salas = fetch_all(
+            """
+            SELECT s.id_sala, s.nombre, s.tipo, s.capacidad, s.id_edificio, e.nombre AS edificio
+            FROM sala s
+            JOIN edificio e ON e.id_edificio = s.id_edificio
+            ORDER BY s.id_sala
+            """
+        )
+        turnos = fetch_all("SELECT id_turno, descripcion FROM turno ORDER BY id_turno")
+        return salas, turnos
+
+    def _participantes_a_columnas(self, filas: list) -> dict:
+        n = len(filas)
+        return {
+            "id": np.fromiter((f["id_participante"] for f in filas), np.int64, n),
+            "rol": np.fromiter((_cod_rol(f["rol"]) for f in filas), np.int64, n),
+            "nombre": [f"{f['nombre']} {f['apellido']}" for f in filas],
+        }
+
+    def _recargar(self):
+        marca = fetch_all("SELECT NOW() AS ahora")[0]["ahora"]
+        self._reservas = _reservas_a_columnas(_leer(COLUMNAS_RESERVA))
+        self._participaciones = _participaciones_a_columnas(_leer(COLUMNAS_PARTICIPACION))
+        self._participantes = self._participantes_a_columnas(
+            _leer("SELECT id_participante, nombre, apellido, rol FROM participante")
+        )
+        self._marca = marca
+        self._completa_en = time.monotonic()
+        self.recargas += 1
+
+    def _incrementar(self, cambiadas: set):
+        marca = fetch_all("SELECT NOW() AS ahora")[0]["ahora"]
+        ids = set(cambiadas)
+        ids.update(f["id_reserva"] for f in fetch_all(
+            "SELECT id_reserva FROM reserva WHERE updated_at >= %s", (self._marca,)
+        ))
+        ids.update(f["id_reserva"] for f in fetch_all(
+            "SELECT DISTINCT id_reserva FROM reserva_participante WHERE updated_at >= %s", (self._marca,)
+        ))
+
+        if ids:
+            ids = sorted(ids)
+            reservas, participaciones = [], []
+            for lote in _por_lotes(ids):
+                marcadores = ", ".join(["%s"] * len(lote))
+                reservas += fetch_all(f"{COLUMNAS_RESERVA} WHERE r.id_reserva IN ({marcadores})", lote)
+                participaciones += fetch_all(f"{COLUMNAS_PARTICIPACION} WHERE rp.id_reserva IN ({marcadores})", lote)
+            # las que ya no vienen de la base (borradas) simplemente no vuelven
+            ids = np.array(ids, np.int64)
+            self._reservas = _unir(
+                _filtrar(self._reservas, ~np.isin(self._reservas["id"], ids)),
+                _reservas_a_columnas(reservas)
+            )
+            self._participaciones = _unir(
+                _filtrar(self._participaciones, ~np.isin(self._participaciones["reserva"], ids)),
+                _participaciones_a_columnas(participaciones)
+            )
+
+        cambiados = fetch_all(
+            "SELECT id_participante, nombre, apellido, rol FROM participante WHERE updated_at >= %s",
+            (self._marca,)
+        )
+        if cambiados:
+            nuevos = self._participantes_a_columnas(cambiados)
+            quedan = ~np.isin(self._participantes["id"], nuevos["id"])
+            self._participantes = {
+                "id": np.concatenate([self._participantes["id"][quedan], nuevos["id"]]),
+                "rol": np.concatenate([self._participantes["rol"][quedan], nuevos["rol"]]),
+                "nombre": [n for n, q in zip(self._participantes["nombre"], quedan) if q] + nuevos["nombre"],
+            }
+        self._marca = marca
+        return len(ids)
+
+    def refrescar(self, forzar: bool = False) -> Foto:
+        """
+        Devuelve la foto, refrescándola si venció el TTL. Si otro hilo ya está
+        refrescando, devuelve la foto actual en lugar de esperar.
+        """
+        requerir_numpy()
+        ahora = time.monotonic()
+        if not forzar and self._foto is not None and ahora - self._refrescada_en <= self.ttl:
+            return self._foto
+        if not self._lock.acquire(blocking=self._foto is None or forzar):
+            return self._foto
+        try:
+            ahora = time.monotonic()
+            if not forzar and self._foto is not None and ahora - self._refrescada_en <= self.ttl:
+                return self._foto
+            inicio = time.perf_counter()
+            cambiadas, self._cambiadas = self._cambiadas, set()
+            try:
+                with con_rol("admin"):
+                    if self._reservas is None or forzar or ahora - self._completa_en > self.recarga_completa:
+                        self._recargar()
+                    else:
+                        self._incrementar(cambiadas)
+                    salas, turnos = self._leer_tablas_chicas()
+            except Exception:
+                # que no se pierdan las marcas de este proceso
+                self._cambiadas |= cambiadas
+                raise
+            self._foto = Foto(self._reservas, self._participaciones, salas, self._participantes, turnos)
+            self._refrescada_en = time.monotonic()
+            self.refrescos += 1
+            self.ultimo_refresco_ms = round((time.perf_counter() - inicio) * 1000, 1)
+            return self._foto
+        finally:
+            self._lock.release()
+
+    # ---------- escrituras de este proceso ----------
+
+    def marcar_reserva(self, id_reserva: int):
+        """Releer la reserva en el próximo refresco (p. ej. porque se borró)."""
+        self._cambiadas.add(id_reserva)
+
+    def invalidar(self):
+        """Forzar una recarga completa en el próximo refresco."""
+        self._completa_en = float("-inf")
+        self._refrescada_en = float("-inf")
+
+    def estado(self) -> dict:
+        foto = self._foto
+        return {
+            "numpy": np is not None,
+            "cargada": foto is not None,
+            "reservas": len(foto) if foto is not None else 0,
+            "participaciones": len(foto.p_reserva_pos) if foto is not None else 0,
+            "marca": self._marca,
+            "refrescos": self.refrescos,
+            "recargas_completas": self.recargas,
+            "ultimo_refresco_ms": self.ultimo_refresco_ms,
+            "pendientes": len(self._cambiadas),
+            "ttl": self.ttl,
+            "recarga_completa": self.recarga_completa,
+        }
+
+
+foto = FotoAnalitica()
+
+
+# ==================== FILTROS ====================
+
+def _mascara_salas(f: Foto, filtros: FiltrosReporte):
+    m = np.ones(len(f.sala_id), bool)
+    if filtros.id_edificio is not None:
+        m &= f.sala_edificio == filtros.id_edificio
+    if filtros.tipo is not None:
+        m &= f.sala_tipo == _cod_tipo(filtros.tipo)
+    return m
+
+def _mascara_reservas(f: Foto, filtros: FiltrosReporte, columna_fecha: str = "fecha", con_rol_creador: bool = True):
+    """Reservas que cumplen los filtros; el rol es el de quien creó la reserva."""
+    if filtros.desde is not None and filtros.hasta is not None and filtros.desde > filtros.hasta:
+        raise HTTPException(status_code=400, detail="desde debe ser anterior o igual a hasta")
+    fechas = f.reservas[columna_fecha]
+    m = _mascara_salas(f, filtros)[f.r_sala_pos]
+    if filtros.desde is not None:
+        m &= fechas >= filtros.desde.toordinal()
+    if filtros.hasta is not None:
+        m &= fechas <= filtros.hasta.toordinal()
+    if con_rol_creador and filtros.rol is not None:
+        m &= f.r_rol_creador == _cod_rol(filtros.rol)
+    return m
+
+def _mascara_participaciones(f: Foto, filtros: FiltrosReporte):
+    """Participaciones en reservas que cumplen los filtros; el rol es el del participante."""
+    m = _mascara_reservas(f, filtros, con_rol_creador=False)[f.p_reserva_pos]
+    if filtros.rol is not None:
+        m &= f.p_rol == _cod_rol(filtros.rol)
+    return m
+
+def _periodo(f: Foto, filtros: FiltrosReporte, mascara):
+    """Período del reporte: el de los filtros o, si falta, el de los datos."""
+    fechas = f.reservas["fecha"][mascara]
+    desde = filtros.desde.toordinal() if filtros.desde else (int(fechas.min()) if len(fechas) else date.today().toordinal())
+    hasta = filtros.hasta.toordinal() if filtros.hasta else (int(fechas.max()) if len(fechas) else desde)
+    return desde, hasta
+
+def _dia_semana(ordinales):
+    # date.fromordinal(1) es lunes
+    return (ordinales - 1) % 7
+
+def _tasa(numerador, denominador):
+    """numerador/denominador redondeado, None donde el denominador es 0."""
+    numerador = np.asarray(numerador, float)
+    denominador = np.asarray(denominador, float)
+    con_datos = denominador > 0
+    tasa = np.divide(numerador, denominador, out=np.zeros_like(numerador), where=con_datos)
+    return [round(float(t), 4) if c else None for t, c in zip(tasa, con_datos)]
+
+
+# ==================== REPORTES DE consultas_service ====================
+# Mismas claves que los reportes SQL, para poder usarlos indistintamente.
+
+SIN_FILTROS = FiltrosReporte()
+
+def _ranking_salas(f: Foto, filtros: FiltrosReporte, limit: int, ascendente: bool, clave: str, todas: bool):
+    m = _mascara_reservas(f, filtros)
+    conteo = np.bincount(f.r_sala_pos[m], minlength=len(f.sala_id))
+    candidatas = np.flatnonzero(_mascara_salas(f, filtros) if todas else conteo > 0)
+    orden = np.argsort(conteo[candidatas] if ascendente else -conteo[candidatas], kind="stable")
+    return [
+        {"id_sala": int(f.sala_id[i]), "nombre": f.sala_nombre[i], clave: int(conteo[i])}
+        for i in candidatas[orden][:limit]
+    ]
+
+def salas_mas_reservadas(limit: int = 10, filtros: FiltrosReporte = SIN_FILTROS):
+    return _ranking_salas(foto.refrescar(), filtros, limit, False, "cantidad", todas=False)
+
+def salas_menos_utilizadas(limit: int = 10, filtros: FiltrosReporte = SIN_FILTROS):
+    return _ranking_salas(foto.refrescar(), filtros, limit, True, "reservas", todas=True)
+
+def turnos_mas_demandados(filtros: FiltrosReporte = SIN_FILTROS):
+    f = foto.refrescar()
+    m = _mascara_reservas(f, filtros)
+    conteo = np.bincount(f.reservas["inicio"][m], minlength=TURNOS + 1)
+    orden = np.argsort(-conteo, kind="stable")
+    return [
+        {"id_turno": int(t), "descripcion": f.turno_descripcion.get(int(t)), "cantidad": int(conteo[t])}
+        for t in orden if conteo[t] > 0
+    ]
+
+def promedio_participantes_por_sala(filtros: FiltrosReporte = SIN_FILTROS):
+    f = foto.refrescar()
+    m = _mascara_reservas(f, filtros)
+    n = len(f.sala_id)
+    reservas = np.bincount(f.r_sala_pos[m], minlength=n)
+    participantes = np.bincount(f.r_sala_pos[m], weights=f.r_participantes[m], minlength=n)
+    promedio = [p if p is not None else 0 for p in _tasa(participantes, reservas)]
+    salas = np.flatnonzero(_mascara_salas(f, filtros))
+    orden = sorted(salas, key=lambda i: -promedio[i])
+    return [
+        {"id_sala": int(f.sala_id[i]), "nombre": f.sala_nombre[i], "promedio": round(promedio[i], 2)}
+        for i in orden
+    ]
+
+def reservas_asistencias_por_rol(filtros: FiltrosReporte = SIN_FILTROS):
+    f = foto.refrescar()
+    m = _mascara_participaciones(f, filtros)
+    p = f.participaciones
+    roles = f.p_rol[m]
+    confirmadas = np.bincount(roles, weights=p["estado"][m] == _cod_estado_participacion('confirmada'), minlength=len(ROLES))
+    presentes = np.bincount(roles, weights=p["asistencia"][m] == PRESENTE, minlength=len(ROLES))
+    hay = np.bincount(roles, minlength=len(ROLES)) > 0
+    return [
+        {"rol": ROLES[i], "reservas_confirmadas": int(confirmadas[i]), "asistencias": int(presentes[i])}
+        for i in range(len(ROLES)) if hay[i]
+    ]
+
+def porcentaje_reservas_utilizadas(filtros: FiltrosReporte = SIN_FILTROS):
+    f = foto.refrescar()
+    estados = f.reservas["estado"][_mascara_reservas(f, filtros)]
+    utilizadas = np.count_nonzero((estados != NO_ASISTENCIA) & (estados != CANCELADA))
+    return [{"porcentaje": round(100.0 * utilizadas / len(estados), 4) if len(estados) else None}]
+
+def reservas_por_dia_semana(filtros: FiltrosReporte = SIN_FILTROS):
+    f = foto.refrescar()
+    m = _mascara_reservas(f, filtros)
+    conteo = np.bincount(_dia_semana(f.reservas["fecha"][m]), minlength=7)
+    return [{"dia": DIAS[d], "reservas": int(conteo[d])} for d in range(7) if conteo[d] > 0]
+
+def participantes_mas_activos(limit: int = 10, filtros: FiltrosReporte = SIN_FILTROS):
+    f = foto.refrescar()
+    m = _mascara_reservas(f, filtros) & (f.r_creador_pos >= 0)
+    conteo = np.bincount(f.r_creador_pos[m], minlength=len(f.part_id))
+    candidatos = np.flatnonzero(conteo > 0)
+    orden = candidatos[np.argsort(-conteo[candidatos], kind="stable")][:limit]
+    return [
+        {"id_participante": int(f.part_id[i]), "nombre": f.part_nombre[i], "reservas": int(conteo[i])}
+        for i in orden
+    ]
+
+def dia_con_mas_creaciones_reservas(filtros: FiltrosReporte = SIN_FILTROS):
+    # como en el reporte SQL, el período se refiere a cuándo se crearon
+    f = foto.refrescar()
+    m = _mascara_reservas(f, filtros, columna_fecha="creada")
+    conteo = np.bincount(_dia_semana(f.reservas["creada"][m]), minlength=7)
+    if not conteo.any():
+        return None
+    dia = int(np.argmax(conteo))
+    return {"dia": DIAS[dia], "reservas": int(conteo[dia])}
+
+
+# ==================== REPORTES NUEVOS ====================
+
+def _expandir_turnos(inicio, fin):
+    """
+    Una fila por cada turno que ocupa cada reserva: devuelve la posición de
+    la reserva (en los arrays recibidos) y el turno 0..TURNOS-1.
+    """
+    largo = fin - inicio + 1
+    fila = np.repeat(np.arange(len(largo)), largo)
+    desplazamiento = np.arange(len(fila)) - np.repeat(np.cumsum(largo) - largo, largo)
+    return fila, inicio[fila] - 1 + desplazamiento
+
+def mapa_ocupacion(filtros: FiltrosReporte = SIN_FILTROS):
+    """
+    Mapa de calor sala × día de la semana × turno: fracción de los días del
+    período (de ese día de la semana) en que el turno estuvo reservado. Las
+    reservas canceladas no ocupan; las no asistidas sí (la sala quedó tomada).
+    """
+    f = foto.refrescar()
+    m = _mascara_reservas(f, filtros) & (f.reservas["estado"] != CANCELADA)
+    desde, hasta = _periodo(f, filtros, m)
+    idx = np.flatnonzero(m)
+    fila, turno = _expandir_turnos(f.reservas["inicio"][idx], f.reservas["fin"][idx])
+    idx = idx[fila]
+
+    n = len(f.sala_id)
+    celda = (f.r_sala_pos[idx] * 7 + _dia_semana(f.reservas["fecha"][idx])) * TURNOS + turno
+    conteo = np.bincount(celda, minlength=n * 7 * TURNOS).reshape(n, 7, TURNOS)
+    # cuántas veces aparece cada día de la semana en el período
+    ocurrencias = np.bincount(_dia_semana(np.arange(desde, hasta + 1)), minlength=7)
+    divisor = np.maximum(ocurrencias, 1)[None, :, None]
+    tasa = np.round(conteo / divisor, 4)
+
+    salas = np.flatnonzero(_mascara_salas(f, filtros))
+    total = conteo[salas].sum(axis=0) / (divisor[0] * max(len(salas), 1))
+    return {
+        "desde": date.fromordinal(desde),
+        "hasta": date.fromordinal(hasta),
+        "dias": list(DIAS),
+        "turnos": [f.turno_descripcion.get(t) for t in range(1, TURNOS + 1)],
+        "total": np.round(total, 4).tolist(),
+        "salas": [
+            {"id_sala": int(f.sala_id[i]), "nombre": f.sala_nombre[i], "ocupacion": tasa[i].tolist()}
+            for i in salas
+        ],
+    }
+
+def tasas_no_asistencia(filtros: FiltrosReporte = SIN_FILTROS):
+    """
+    Reservas terminadas sin asistencia (no_asistencia / terminadas) por sala
+    y participantes ausentes (ausentes / con asistencia registrada) por rol.
+    """
+    f = foto.refrescar()
+    estados = f.reservas["estado"]
+    m = _mascara_reservas(f, filtros) & ((estados == FINALIZADA) | (estados == NO_ASISTENCIA))
+    n = len(f.sala_id)
+    terminadas = np.bincount(f.r_sala_pos[m], minlength=n)
+    no_asistidas = np.bincount(f.r_sala_pos[m], weights=estados[m] == NO_ASISTENCIA, minlength=n)
+    tasa_sala = _tasa(no_asistidas, terminadas)
+
+    asistencia = f.participaciones["asistencia"]
+    mp = _mascara_participaciones(f, filtros) & ((asistencia == PRESENTE) | (asistencia == AUSENTE))
+    registradas = np.bincount(f.p_rol[mp], minlength=len(ROLES))
+    ausentes = np.bincount(f.p_rol[mp], weights=asistencia[mp] == AUSENTE, minlength=len(ROLES))
+    tasa_rol = _tasa(ausentes, registradas)
+
+    return {
+        "reservas_terminadas": int(terminadas.sum()),
+        "tasa_no_asistencia": _tasa([no_asistidas.sum()], [terminadas.sum()])[0],
+        "por_sala": [
+            {
+                "id_sala": int(f.sala_id[i]), "nombre": f.sala_nombre[i],
+                "terminadas": int(terminadas[i]), "no_asistidas": int(no_asistidas[i]),
+                "tasa": tasa_sala[i],
+            }
+            for i in np.flatnonzero(terminadas)
+        ],
+        "por_rol": [
+            {
+                "rol": ROLES[i], "registradas": int(registradas[i]), "ausentes": int(ausentes[i]),
+                "tasa": tasa_rol[i],
+            }
+            for i in np.flatnonzero(registradas)
+        ],
+    }
+
+def utilizacion_capacidad(filtros: FiltrosReporte = SIN_FILTROS):
+    """
+    Qué fracción de la capacidad de la sala usan las reservas: participantes
+    (inscriptos y presentes) sobre capacidad, promediado por sala. Solo
+    reservas no canceladas; los presentes solo cuentan en las terminadas.
+    """
+    f = foto.refrescar()
+    estados = f.reservas["estado"]
+    m = _mascara_reservas(f, filtros) & (estados != CANCELADA)
+    terminadas = m & ((estados == FINALIZADA) | (estados == NO_ASISTENCIA))
+    capacidad = np.maximum(f.sala_capacidad[f.r_sala_pos], 1)
+    n = len(f.sala_id)
+
+    reservas = np.bincount(f.r_sala_pos[m], minlength=n)
+    inscriptos = np.bincount(f.r_sala_pos[m], weights=(f.r_participantes / capacidad)[m], minlength=n)
+    n_terminadas = np.bincount(f.r_sala_pos[terminadas], minlength=n)
+    presentes = np.bincount(f.r_sala_pos[terminadas], weights=(f.r_presentes / capacidad)[terminadas], minlength=n)
+    tasa_inscriptos = _tasa(inscriptos, reservas)
+    tasa_presentes = _tasa(presentes, n_terminadas)
+
+    return {
+        "reservas": int(reservas.sum()),
+        "utilizacion_inscriptos": _tasa([inscriptos.sum()], [reservas.sum()])[0],
+        "utilizacion_presentes": _tasa([presentes.sum()], [n_terminadas.sum()])[0],
+        "por_sala": [
+            {
+                "id_sala": int(f.sala_id[i]), "nombre": f.sala_nombre[i],
+                "capacidad": int(f.sala_capacidad[i]), "reservas": int(reservas[i]),
+                "utilizacion_inscriptos": tasa_inscriptos[i],
+                "utilizacion_presentes": tasa_presentes[i],
+            }
+            for i in np.flatnonzero(_mascara_salas(f, filtros))
+        ],
+    }
+
+
+REPORTES = {
+    "salas-mas-reservadas": salas_mas_reservadas,
+    "salas-menos-utilizadas": salas_menos_utilizadas,
+    "participantes-mas-activos": participantes_mas_activos,
+    "turnos-mas-demandados": turnos_mas_demandados,
+    "promedio-participantes-sala": promedio_participantes_por_sala,
+    "reservas-asistencias-por-rol": reservas_asistencias_por_rol,
+    "porcentaje-reservas-utilizadas": porcentaje_reservas_utilizadas,
+    "reservas-por-dia-semana": reservas_por_dia_semana,
+    "dia-mas-creacion": dia_con_mas_creaciones_reservas,
+    "mapa-ocupacion": mapa_ocupacion,
+    "no-asistencia": tasas_no_asistencia,
+    "utilizacion-capacidad": utilizacion_capacidad,
+}
+REPORTES_CON_LIMIT = {"salas-mas-reservadas", "salas-menos-utilizadas", "participantes-mas-activos"}
@@ -1,22 +1,26 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import logging
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
-from db import fetch_all
+from starlette.concurrency import run_in_threadpool
+from db import fetch_all, execute_query
+from services.bcrypt_pool import hashear, verificar, verificar_async
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "clave_por_defecto")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "120")) #CAMBIAR TIEMPO EN PRODUCCION
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
 
+# bcrypt corre en un pool de procesos acotado (services/bcrypt_pool.py)
 def hash_password(password) :
-    return pwd_context.hash(password)
+    return hashear(password)
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    valida, _ = verificar(plain_password, hashed_password)
+    return valida
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -29,31 +33,57 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def authenticate_user(email, password):
+def _leer_login(email):
+    result = fetch_all("SELECT email, password_hash FROM login WHERE email = %s", (email,))
+    return result[0] if result else None
+
+def _leer_participante(email):
+    participante = fetch_all(
+        """
+        SELECT id_participante, ci, nombre, apellido, email, rol, activo, token_version
+        FROM participante
+        WHERE email = %s
+        """,
+        (email,)
+    )
+    return participante[0] if participante else None
+
+async def authenticate_user(email, password):
+    """
+    Async para que el login no ocupe un hilo del threadpool mientras espera
+    a bcrypt; las consultas (cortas) sí corren en el threadpool.
+    """
     try:
-        query = "SELECT email, password_hash FROM login WHERE email = %s"
-        result = fetch_all(query, (email,))
-        
-        if not result:
+        user_login = await run_in_threadpool(_leer_login, email)
+        if not user_login:
             return None
-        
-        user_login = result[0]
-        
-        if not verify_password(password, user_login['password_hash']):
+
+        valida, nuevo_hash = await verificar_async(password, user_login['password_hash'])
+        if not valida:
             return None
-        
-        query = """
-            SELECT id_participante, ci, nombre, apellido, email, rol, activo
-            FROM participante
-            WHERE email = %s
-        """
-        participante = fetch_all(query, (email,))
-        
-        if not participante or not participante[0]['activo']:
+        if nuevo_hash:
+            await run_in_threadpool(actualizar_hash, email, nuevo_hash)
+
+        participante = await run_in_threadpool(_leer_participante, email)
+        if not participante or not participante['activo']:
             return None
-        
-        return participante[0]
-    
+
+        return participante
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en autenticación: {str(e)}")
 
+def actualizar_hash(email, nuevo_hash):
+    """
+    Guarda el hash rehecho con el costo configurado (BCRYPT_ROUNDS). Si
+    falla, el login sigue igual y se reintenta en el próximo.
+    """
+    try:
+        execute_query(
+            "UPDATE login SET password_hash = %s WHERE email = %s",
+            (nuevo_hash, email)
+        )
+    except Exception as e:
+        logger.error(f"No se pudo actualizar el hash de {email}: {e}")
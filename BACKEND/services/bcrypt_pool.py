@@ -0,0 +1,161 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# bcrypt es CPU puro y deliberadamente lento: corriendo en el threadpool de
+# FastAPI, una ola de logins ocupa todos los núcleos y frena al resto de los
+# endpoints. Acá el hash y la verificación corren en un pool de procesos
+# propio y acotado:
+#   BCRYPT_WORKERS  procesos del pool (default: la mitad de los núcleos)
+#   BCRYPT_COLA     pedidos que pueden esperar además de los que están
+#                   corriendo; pasado ese límite se responde 503 en el acto
+#   BCRYPT_TIMEOUT  segundos máximos de espera por un resultado
+#   BCRYPT_ROUNDS   costo de los hashes; los que tengan otro costo se
+#                   rehashean en el próximo login correcto (needs_update)
+#
+# El login espera el resultado con ejecutar_async: mientras bcrypt corre no
+# ocupa ningún hilo del threadpool de FastAPI (40 en total, compartidos con
+# todos los endpoints sync). Los que esperan con ejecutar (registro y altas
+# de participantes, poco frecuentes) sí ocupan un hilo cada uno.
+#
+# Los procesos del pool se lanzan con spawn e importan este módulo de cero:
+# por eso no depende de db ni de otros servicios.
+
+WORKERS = int(os.getenv("BCRYPT_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+COLA = int(os.getenv("BCRYPT_COLA", 32))
+TIMEOUT = float(os.getenv("BCRYPT_TIMEOUT", 10))
+ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+# min = max = default: needs_update marca cualquier hash con otro costo,
+# tanto más alto como más bajo
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=ROUNDS,
+    bcrypt__min_rounds=ROUNDS,
+    bcrypt__max_rounds=ROUNDS,
+)
+
+# ---------- funciones que corren en los procesos del pool ----------
+
+def _hashear(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verificar(password: str, password_hash: str):
+    """(válida, hash nuevo o None): el hash nuevo viene si el costo cambió."""
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+# ---------- pool ----------
+
+def _no_disponible(detalle: str):
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=detalle,
+        headers={"Retry-After": "1"},
+    )
+
+class PoolBcrypt:
+    def __init__(self, workers: int = WORKERS, cola: int = COLA, timeout: float = TIMEOUT):
+        self.workers = workers
+        self.cola = cola
+        self.timeout = timeout
+        self._executor = None
+        self._cupo = threading.BoundedSemaphore(workers + cola)
+        self._lock = threading.Lock()
+        self.rechazados = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _descartar_pool(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _enviar(self, fn, *args):
+        """
+        Manda `fn` al pool y devuelve (executor, futuro). Si ya hay workers +
+        cola pedidos en curso no espera: responde 503 para que el cliente
+        reintente.
+        """
+        if not self._cupo.acquire(blocking=False):
+            self.rechazados += 1
+            raise _no_disponible("Demasiados inicios de sesión simultáneos, intente nuevamente en unos segundos")
+        executor = self._pool()
+        try:
+            futuro = executor.submit(fn, *args)
+        except BaseException as e:
+            self._cupo.release()
+            if isinstance(e, BrokenProcessPool):
+                self._descartar_pool(executor)
+                raise _no_disponible("Servicio de autenticación reiniciándose, intente nuevamente en unos segundos")
+            raise
+        # el cupo se libera cuando termina el trabajo, aunque quien esperaba
+        # se haya ido por timeout
+        futuro.add_done_callback(lambda _: self._cupo.release())
+        return executor, futuro
+
+    def ejecutar(self, fn, *args):
+        """Corre `fn` en el pool y espera el resultado bloqueando el hilo actual."""
+        executor, futuro = self._enviar(fn, *args)
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FuturesTimeout:
+            futuro.cancel()
+            raise _no_disponible("Tiempo de espera agotado verificando credenciales")
+        except BrokenProcessPool:
+            # murió un proceso del pool: se arma uno nuevo para el próximo pedido
+            self._descartar_pool(executor)
+            raise _no_disponible("Servicio de autenticación reiniciándose, intente nuevamente en unos segundos")
+
+    async def ejecutar_async(self, fn, *args):
+        """Como ejecutar, pero espera en el event loop sin ocupar un hilo."""
+        executor, futuro = self._enviar(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(futuro), self.timeout)
+        except asyncio.TimeoutError:
+            futuro.cancel()
+            raise _no_disponible("Tiempo de espera agotado verificando credenciales")
+        except BrokenProcessPool:
+            self._descartar_pool(executor)
+            raise _no_disponible("Servicio de autenticación reiniciándose, intente nuevamente en unos segundos")
+
+    def cerrar(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def estado(self) -> dict:
+        return {
+            "workers": self.workers,
+            "cola": self.cola,
+            "rounds": ROUNDS,
+            "activo": self._executor is not None,
+            "rechazados": self.rechazados,
+        }
+
+
+pool_bcrypt = PoolBcrypt()
+
+def hashear(password: str) -> str:
+    return pool_bcrypt.ejecutar(_hashear, password)
+
+def verificar(password: str, password_hash: str):
+    return pool_bcrypt.ejecutar(_verificar, password, password_hash)
+
+async def verificar_async(password: str, password_hash: str):
+    return await pool_bcrypt.ejecutar_async(_verificar, password, password_hash)
@@ -0,0 +1,142 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from db import al_confirmar, execute_query, fetch_all
+from context import con_rol
+
+# Caché de resultados de reportes, por función y parámetros. Cada entrada
+# guarda la "generación" vigente cuando se empezó a calcular; incrementar la
+# generación invalida todo lo anterior sin recorrer la caché.
+#
+# Los reportes leen las tablas rollup_*, que recalcula el scheduler (otro
+# proceso): cada recálculo incrementa además la fila de reportes_generacion
+# en su misma transacción, y la caché la consulta a lo sumo cada
+# REPORTES_GENERACION_REFRESCO segundos; si cambió, se invalida. Así una
+# reserva se ve en los reportes apenas se recalcula su fecha, sin esperar el
+# TTL. Las escrituras de este proceso sobre participantes y sanciones
+# (que los reportes leen directo) invalidan la caché después del commit.
+
+logger = logging.getLogger(__name__)
+
+TTL = float(os.getenv("REPORTES_CACHE_TTL", 60))
+MAX_ENTRADAS = int(os.getenv("REPORTES_CACHE_MAX", 256))
+REFRESCO_GENERACION = float(os.getenv("REPORTES_GENERACION_REFRESCO", 2))
+
+
+class CacheReportes:
+    def __init__(self, ttl: float = TTL, max_entradas: int = MAX_ENTRADAS, refresco: float = REFRESCO_GENERACION):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.refresco = refresco
+        self._entradas = OrderedDict()  # clave -> (generacion, vence_en, valor)
+        self._generacion = 0
+        self._generacion_base = None    # última reportes_generacion leída
+        self._consultada_en = float("-inf")
+        self._lock = threading.Lock()
+        self._lock_base = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.desalojos = 0
+
+    @property
+    def generacion(self) -> int:
+        return self._generacion
+
+    def _sincronizar(self):
+        """
+        Si pasaron `refresco` segundos, lee reportes_generacion y, si cambió
+        desde la última lectura, invalida. Si otro hilo ya la está leyendo,
+        no espera; si la lectura falla, sigue con lo que tiene (el TTL acota).
+        """
+        if time.monotonic() - self._consultada_en < self.refresco:
+            return
+        if not self._lock_base.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._consultada_en < self.refresco:
+                return
+            self._consultada_en = time.monotonic()
+            with con_rol("admin"):
+                filas = fetch_all("SELECT generacion FROM reportes_generacion WHERE id = 1")
+            base = filas[0]["generacion"] if filas else 0
+            if self._generacion_base is not None and base != self._generacion_base:
+                self.invalidar()
+            self._generacion_base = base
+        except Exception as e:
+            logger.error(f"No se pudo leer reportes_generacion: {e}")
+        finally:
+            self._lock_base.release()
+
+    def obtener(self, clave, calcular):
+        self._sincronizar()
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                generacion, vence_en, valor = entrada
+                if generacion == self._generacion and ahora < vence_en:
+                    self._entradas.move_to_end(clave)
+                    self.hits += 1
+                    return valor
+                del self._entradas[clave]
+            self.misses += 1
+            generacion = self._generacion
+
+        valor = calcular()
+
+        with self._lock:
+            # si hubo una escritura mientras se calculaba, el valor puede
+            # estar viejo: se devuelve pero no se guarda
+            if generacion == self._generacion:
+                self._entradas[clave] = (generacion, time.monotonic() + self.ttl, valor)
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+                    self.desalojos += 1
+        return valor
+
+    def invalidar(self):
+        with self._lock:
+            self._generacion += 1
+            self._entradas.clear()
+
+    def estado(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / consultas, 3) if consultas else None,
+                "desalojos": self.desalojos,
+                "entradas": len(self._entradas),
+                "generacion": self._generacion,
+                "generacion_base": self._generacion_base,
+                "refresco": self.refresco,
+                "ttl": self.ttl,
+                "max_entradas": self.max_entradas,
+            }
+
+
+cache = CacheReportes()
+
+def cacheado(fn):
+    """Cachea el resultado de una función de reporte según sus argumentos."""
+    @wraps(fn)
+    def envoltura(*args, **kwargs):
+        clave = (fn.__name__, args, tuple(sorted(kwargs.items())))
+        return cache.obtener(clave, lambda: fn(*args, **kwargs))
+    return envoltura
+
+def invalidar_reportes():
+    """Invalida la caché cuando la transacción actual haga commit."""
+    al_confirmar(cache.invalidar)
+
+def incrementar_generacion():
+    """
+    Incrementa reportes_generacion en la transacción actual: las cachés de
+    todos los procesos se invalidan en su próxima consulta después del commit.
+    """
+    execute_query("UPDATE reportes_generacion SET generacion = generacion + 1 WHERE id = 1")
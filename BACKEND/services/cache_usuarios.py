@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from db import fetch_all, al_confirmar
+from context import con_rol
+
+# Caché email -> (id_participante, rol, activo, token_version) para
+# autenticar requests sin consultar participante en cada uno. Acotada (LRU) y
+# con TTL; los cambios de este proceso (actualizar/eliminar participante) la
+# invalidan después del commit y los de otros procesos se ven cuando vence el
+# TTL.
+
+TTL = float(os.getenv("USUARIOS_CACHE_TTL", 60))
+MAX_ENTRADAS = int(os.getenv("USUARIOS_CACHE_MAX", 10000))
+
+
+class CacheUsuarios:
+    def __init__(self, ttl: float = TTL, max_entradas: int = MAX_ENTRADAS):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()  # email -> (vence_en, usuario)
+        self._generacion = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _leer(self, email: str):
+        # la tabla participante se lee con el usuario read-only de login,
+        # sea cual sea el rol del request
+        with con_rol("login"):
+            filas = fetch_all(
+                """
+                SELECT id_participante, email, rol, activo, token_version
+                FROM participante
+                WHERE email = %s
+                """,
+                (email,)
+            )
+        return filas[0] if filas else None
+
+    def obtener(self, email: str):
+        """Datos del participante con ese email (None si no existe)."""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(email)
+            if entrada is not None:
+                vence_en, usuario = entrada
+                if ahora < vence_en:
+                    self._entradas.move_to_end(email)
+                    self.hits += 1
+                    return usuario
+                del self._entradas[email]
+            self.misses += 1
+            generacion = self._generacion
+
+        usuario = self._leer(email)
+
+        with self._lock:
+            # si se invalidó mientras se leía, el dato puede estar viejo
+            if usuario is not None and generacion == self._generacion:
+                self._entradas[email] = (time.monotonic() + self.ttl, usuario)
+                self._entradas.move_to_end(email)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+        return usuario
+
+    def invalidar(self, *emails):
+        """Descarta los emails indicados (o todo, sin argumentos)."""
+        with self._lock:
+            self._generacion += 1
+            if not emails:
+                self._entradas.clear()
+            for email in emails:
+                self._entradas.pop(email, None)
+
+    def estado(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / consultas, 3) if consultas else None,
+                "entradas": len(self._entradas),
+                "ttl": self.ttl,
+                "max_entradas": self.max_entradas,
+            }
+
+
+cache_usuarios = CacheUsuarios()
+
+def resolver_usuario(email: str):
+    return cache_usuarios.obtener(email)
+
+def invalidar_usuario(*emails):
+    """Invalida los emails cuando la transacción actual haga commit."""
+    al_confirmar(lambda: cache_usuarios.invalidar(*emails))
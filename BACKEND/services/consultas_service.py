@@ -1,15 +1,100 @@
-from http.client import HTTPException
+from fastapi import HTTPException
 from db import fetch_all
+from models.reporte_model import FiltrosReporte
+from services.cache_reportes import cacheado
+from services.utilizacion_service import utilizacion_edificios
 
-def salas_mas_reservadas(limit=int):
-    salas = fetch_all("""
-        SELECT s.id_sala, s.nombre, COUNT(r.id_reserva) AS cantidad
-        FROM reserva r
-        JOIN sala s ON s.id_sala = r.id_sala
+# Los reportes de reservas leen las tablas rollup_* (agregados por día, ver
+# services/rollup_service.py) en lugar de agrupar reserva/reserva_participante
+# completas en cada consulta. Todos aceptan FiltrosReporte (período, edificio,
+# tipo de sala y rol); el período filtra por el índice (fecha, id_sala) de
+# cada rollup.
+
+SIN_FILTROS = FiltrosReporte()
+
+def _filtros(f: FiltrosReporte, columna_fecha: str = "x.fecha", columna_rol: str = None):
+    """
+    Condiciones sobre el rollup (período y rol) y sobre la sala (edificio y
+    tipo), por separado: en los reportes con LEFT JOIN desde sala las del
+    rollup van en el ON y las de la sala en el WHERE.
+    """
+    if f.desde is not None and f.hasta is not None and f.desde > f.hasta:
+        raise HTTPException(status_code=400, detail="desde debe ser anterior o igual a hasta")
+
+    rollup, params_rollup = [], []
+    if f.desde is not None:
+        rollup.append(f"{columna_fecha} >= %s")
+        params_rollup.append(f.desde)
+    if f.hasta is not None:
+        rollup.append(f"{columna_fecha} <= %s")
+        params_rollup.append(f.hasta)
+    if f.rol is not None and columna_rol is not None:
+        rollup.append(f"{columna_rol} = %s")
+        params_rollup.append(f.rol)
+
+    sala, params_sala = [], []
+    if f.id_edificio is not None:
+        sala.append("s.id_edificio = %s")
+        params_sala.append(f.id_edificio)
+    if f.tipo is not None:
+        sala.append("s.tipo = %s")
+        params_sala.append(f.tipo)
+
+    return (rollup, params_rollup), (sala, params_sala)
+
+def _where(*grupos) -> tuple:
+    condiciones, params = [], []
+    for c, p in grupos:
+        condiciones += c
+        params += p
+    return ("WHERE " + " AND ".join(condiciones)) if condiciones else "", params
+
+def _and(condiciones: list) -> str:
+    return "".join(f" AND {c}" for c in condiciones)
+
+def con_periodo_anterior(reporte, f: FiltrosReporte, *args):
+    """
+    Ejecuta `reporte` sobre el período pedido y sobre el período anterior de
+    igual largo (p. ej. esta semana contra la anterior).
+    """
+    if f.desde is None or f.hasta is None:
+        raise HTTPException(status_code=400, detail="Para comparar períodos hay que indicar desde y hasta")
+    anterior = f.periodo_anterior()
+
+    def _o_vacio(filtros):
+        try:
+            return reporte(*args, filtros=filtros)
+        except HTTPException as e:
+            if e.status_code == 409:  # el reporte no tiene datos en el período
+                return None
+            raise
+
+    return {
+        "periodo": {"desde": f.desde, "hasta": f.hasta},
+        "actual": _o_vacio(f),
+        "periodo_anterior": {"desde": anterior.desde, "hasta": anterior.hasta},
+        "anterior": _o_vacio(anterior),
+    }
+
+def reporte_filtrado(reporte, f: FiltrosReporte, comparar: bool = False, *args):
+    """Punto de entrada de los endpoints: el reporte solo o comparado con el período anterior."""
+    if comparar:
+        return con_periodo_anterior(reporte, f, *args)
+    return reporte(*args, filtros=f)
+
+@cacheado
+def salas_mas_reservadas(limit=int, filtros: FiltrosReporte = SIN_FILTROS):
+    rollup, sala = _filtros(filtros, columna_rol="x.rol_creador")
+    where, params = _where(rollup, sala)
+    salas = fetch_all(f"""
+        SELECT s.id_sala, s.nombre, CAST(SUM(x.n_reservas) AS SIGNED) AS cantidad
+        FROM rollup_reserva_dia x
+        JOIN sala s ON s.id_sala = x.id_sala
+        {where}
         GROUP BY s.id_sala
         ORDER BY cantidad DESC
         LIMIT %s;
-    """, (limit,))
+    """, (*params, limit))
 
     if not salas:
         raise HTTPException(
@@ -19,14 +104,19 @@ def salas_mas_reservadas(limit=int):
 
     return salas
 
-def turnos_mas_demandados():
-    turnos = fetch_all("""
-        SELECT t.id_turno, t.descripcion, COUNT(r.id_reserva) AS cantidad
-        FROM reserva r
-        JOIN turno t ON t.id_turno = r.start_turn_id
+@cacheado
+def turnos_mas_demandados(filtros: FiltrosReporte = SIN_FILTROS):
+    rollup, sala = _filtros(filtros, columna_rol="x.rol_creador")
+    where, params = _where(rollup, sala)
+    turnos = fetch_all(f"""
+        SELECT t.id_turno, t.descripcion, CAST(SUM(x.n_reservas) AS SIGNED) AS cantidad
+        FROM rollup_reserva_dia x
+        JOIN turno t ON t.id_turno = x.id_turno
+        JOIN sala s ON s.id_sala = x.id_sala
+        {where}
         GROUP BY t.id_turno
         ORDER BY cantidad DESC;
-    """)
+    """, params)
     if not turnos:
         raise HTTPException(
             status_code=409,
@@ -34,21 +124,20 @@ def turnos_mas_demandados():
         )
     return turnos
 
-def promedio_participantes_por_sala():
-    promedio = fetch_all("""
+@cacheado
+def promedio_participantes_por_sala(filtros: FiltrosReporte = SIN_FILTROS):
+    (rollup, params_rollup), sala = _filtros(filtros, columna_rol="x.rol_creador")
+    where, params_sala = _where(sala)
+    promedio = fetch_all(f"""
         SELECT s.id_sala,
                s.nombre,
-               ROUND(AVG(COALESCE(rp.participantes, 0)), 2) AS promedio
+               ROUND(COALESCE(SUM(x.n_participantes) / SUM(x.n_reservas), 0), 2) AS promedio
         FROM sala s
-        LEFT JOIN reserva r ON r.id_sala = s.id_sala
-        LEFT JOIN (
-            SELECT id_reserva, COUNT(*) AS participantes
-            FROM reserva_participante
-            GROUP BY id_reserva
-        ) rp ON rp.id_reserva = r.id_reserva
+        LEFT JOIN rollup_reserva_dia x ON x.id_sala = s.id_sala{_and(rollup)}
+        {where}
         GROUP BY s.id_sala, s.nombre
         ORDER BY promedio DESC;
-    """)
+    """, (*params_rollup, *params_sala))
     if not promedio:
         raise HTTPException(
             status_code=409,
@@ -56,15 +145,21 @@ def promedio_participantes_por_sala():
         )
     return promedio
 
-def reservas_por_carrera_facultad():
-    reservasPorCarrera = fetch_all("""
-        SELECT f.nombre AS facultad, c.nombre AS carrera, COUNT(r.id_reserva) AS reservas
-        FROM reserva r
-        JOIN participante_programa p ON p.id_participante = r.creado_por
+@cacheado
+def reservas_por_carrera_facultad(filtros: FiltrosReporte = SIN_FILTROS):
+    rollup, sala = _filtros(filtros, columna_rol="cr.rol")
+    where, params = _where(rollup, sala)
+    reservasPorCarrera = fetch_all(f"""
+        SELECT f.nombre AS facultad, c.nombre AS carrera, CAST(SUM(x.n_reservas) AS SIGNED) AS reservas
+        FROM rollup_creador_dia x
+        JOIN sala s ON s.id_sala = x.id_sala
+        JOIN participante cr ON cr.id_participante = x.creado_por
+        JOIN participante_programa p ON p.id_participante = x.creado_por
         JOIN programa_academico c ON c.id_programa = p.id_programa
         JOIN facultad f ON f.id_facultad = c.id_facultad
+        {where}
         GROUP BY f.id_facultad, c.id_programa;
-    """)
+    """, params)
     if not reservasPorCarrera:
         raise HTTPException(
             status_code=409,
@@ -72,15 +167,17 @@ def reservas_por_carrera_facultad():
         )
     return reservasPorCarrera
 
-def ocupacion_salas_por_edificio():
-    ocupacion = fetch_all("""
-        SELECT e.id_edificio, e.nombre,
-               COUNT(r.id_reserva) AS reservas
-        FROM sala s
-        JOIN edificio e ON e.id_edificio = s.id_edificio
-        LEFT JOIN reserva r ON r.id_sala = s.id_sala
-        GROUP BY e.id_edificio;
-    """)
+@cacheado
+def ocupacion_salas_por_edificio(filtros: FiltrosReporte = SIN_FILTROS):
+    """
+    Porcentaje de ocupación por edificio: turnos reservados sobre turnos
+    disponibles (salas del edificio × turnos × días del período; sin período,
+    los últimos 30 días). Ver services/utilizacion_service.py.
+    """
+    ocupacion = [
+        {**e, "porcentaje_ocupacion": round(100 * (e["utilizacion"] or 0), 2)}
+        for e in utilizacion_edificios(filtros)
+    ]
     if not ocupacion:
         raise HTTPException(
             status_code=409,
@@ -88,15 +185,19 @@ def ocupacion_salas_por_edificio():
         )
     return ocupacion
 
-def reservas_asistencias_por_rol():
-    reservaAsistencia = fetch_all("""
-        SELECT p.rol, 
-               SUM(CASE WHEN r.estado_participacion = 'confirmada' THEN 1 ELSE 0 END) AS reservas_confirmadas,
-               SUM(CASE WHEN r.asistencia = 'presente' THEN 1 ELSE 0 END) AS asistencias
-        FROM reserva_participante r
-        JOIN participante p ON p.id_participante = r.id_participante
-        GROUP BY p.rol;
-    """)
+@cacheado
+def reservas_asistencias_por_rol(filtros: FiltrosReporte = SIN_FILTROS):
+    rollup, sala = _filtros(filtros, columna_rol="x.rol")
+    where, params = _where(rollup, sala)
+    reservaAsistencia = fetch_all(f"""
+        SELECT x.rol, 
+               CAST(SUM(x.n_confirmadas) AS SIGNED) AS reservas_confirmadas,
+               CAST(SUM(x.n_presentes) AS SIGNED) AS asistencias
+        FROM rollup_participacion_dia x
+        JOIN sala s ON s.id_sala = x.id_sala
+        {where}
+        GROUP BY x.rol;
+    """, params)
     if not reservaAsistencia:
         raise HTTPException(
             status_code=409,
@@ -104,15 +205,27 @@ def reservas_asistencias_por_rol():
         )
     return reservaAsistencia
 
-def sanciones_por_rol():
-    sancionesRol = fetch_all("""
+@cacheado
+def sanciones_por_rol(filtros: FiltrosReporte = SIN_FILTROS):
+    # las sanciones no están asociadas a una sala: se filtran por período
+    # (sanciones vigentes en algún momento del período) y rol
+    (rollup, params), _ = _filtros(
+        filtros.model_copy(update={"desde": None, "hasta": None}), columna_rol="p.rol"
+    )
+    if filtros.desde is not None:
+        rollup.append("s.fecha_fin >= %s")
+        params.append(filtros.desde)
+    if filtros.hasta is not None:
+        rollup.append("s.fecha_inicio <= %s")
+        params.append(filtros.hasta)
+    sancionesRol = fetch_all(f"""
         SELECT
             SUM(CASE WHEN p.rol = 'docente' THEN 1 ELSE 0 END) AS docentes,
             SUM(CASE WHEN p.rol IN ('alumno_grado','alumno_posgrado') THEN 1 ELSE 0 END) AS alumnos
         FROM sancion_participante s
         JOIN participante p ON p.id_participante = s.id_participante
-        WHERE p.rol IN ('docente','alumno_grado','alumno_posgrado');
-    """)
+        WHERE p.rol IN ('docente','alumno_grado','alumno_posgrado'){_and(rollup)};
+    """, params)
     if not sancionesRol:
         raise HTTPException(
             status_code=409,
@@ -120,15 +233,20 @@ def sanciones_por_rol():
         )
     return sancionesRol
 
-def porcentaje_reservas_utilizadas():
-    porcentaje = fetch_all("""
+@cacheado
+def porcentaje_reservas_utilizadas(filtros: FiltrosReporte = SIN_FILTROS):
+    rollup, sala = _filtros(filtros, columna_rol="x.rol_creador")
+    where, params = _where(rollup, sala)
+    porcentaje = fetch_all(f"""
         SELECT
             
-                100.0 * SUM(CASE WHEN estado NOT IN ('no_asistencia','cancelada') THEN 1 ELSE 0 END)
-                / COUNT(*) 
+                100.0 * SUM(CASE WHEN x.estado NOT IN ('no_asistencia','cancelada') THEN x.n_reservas ELSE 0 END)
+                / SUM(x.n_reservas) 
              AS porcentaje
-        FROM reserva;
-    """)
+        FROM rollup_reserva_dia x
+        JOIN sala s ON s.id_sala = x.id_sala
+        {where};
+    """, params)
     if not porcentaje:
         raise HTTPException(
             status_code=409,
@@ -136,12 +254,32 @@ def porcentaje_reservas_utilizadas():
         )
     return porcentaje
 
-def reservas_por_dia_semana():
-    reservasDias = fetch_all("""
-        SELECT DAYNAME(fecha) AS dia, COUNT(*) AS reservas
-        FROM reserva
+@cacheado
+def reservas_por_estado(filtros: FiltrosReporte = SIN_FILTROS):
+    # sin reservas los conteos son cero, no un error: se devuelve la lista vacía
+    rollup, sala = _filtros(filtros, columna_rol="x.rol_creador")
+    where, params = _where(rollup, sala)
+    return fetch_all(f"""
+        SELECT x.estado,
+               CAST(SUM(x.n_reservas) AS SIGNED) AS reservas,
+               CAST(SUM(CASE WHEN x.fecha = CURDATE() THEN x.n_reservas ELSE 0 END) AS SIGNED) AS reservas_hoy
+        FROM rollup_reserva_dia x
+        JOIN sala s ON s.id_sala = x.id_sala
+        {where}
+        GROUP BY x.estado;
+    """, params)
+
+@cacheado
+def reservas_por_dia_semana(filtros: FiltrosReporte = SIN_FILTROS):
+    rollup, sala = _filtros(filtros, columna_rol="x.rol_creador")
+    where, params = _where(rollup, sala)
+    reservasDias = fetch_all(f"""
+        SELECT DAYNAME(x.fecha) AS dia, CAST(SUM(x.n_reservas) AS SIGNED) AS reservas
+        FROM rollup_reserva_dia x
+        JOIN sala s ON s.id_sala = x.id_sala
+        {where}
         GROUP BY dia;
-    """)
+    """, params)
     if not reservasDias:
         raise HTTPException(
             status_code=409,
@@ -149,15 +287,19 @@ def reservas_por_dia_semana():
         )
     return reservasDias
 
-def salas_menos_utilizadas(limit):
-    salasMenos = fetch_all("""
-        SELECT s.id_sala, s.nombre, COUNT(r.id_reserva) AS reservas
+@cacheado
+def salas_menos_utilizadas(limit, filtros: FiltrosReporte = SIN_FILTROS):
+    (rollup, params_rollup), sala = _filtros(filtros, columna_rol="x.rol_creador")
+    where, params_sala = _where(sala)
+    salasMenos = fetch_all(f"""
+        SELECT s.id_sala, s.nombre, CAST(COALESCE(SUM(x.n_reservas), 0) AS SIGNED) AS reservas
         FROM sala s
-        LEFT JOIN reserva r ON r.id_sala = s.id_sala
+        LEFT JOIN rollup_reserva_dia x ON x.id_sala = s.id_sala{_and(rollup)}
+        {where}
         GROUP BY s.id_sala
         ORDER BY reservas ASC
         LIMIT %s;
-    """, (limit,))
+    """, (*params_rollup, *params_sala, limit))
     if not salasMenos:
         raise HTTPException(
             status_code=409,
@@ -165,15 +307,20 @@ def salas_menos_utilizadas(limit):
         )
     return salasMenos
 
-def participantes_mas_activos(limit):
-    participantesMasActivos = fetch_all("""
-        SELECT p.id_participante, p.nombre, COUNT(r.id_reserva) AS reservas
+@cacheado
+def participantes_mas_activos(limit, filtros: FiltrosReporte = SIN_FILTROS):
+    rollup, sala = _filtros(filtros, columna_rol="p.rol")
+    where, params = _where(rollup, sala)
+    participantesMasActivos = fetch_all(f"""
+        SELECT p.id_participante, p.nombre, CAST(SUM(x.n_reservas) AS SIGNED) AS reservas
         FROM participante p
-        JOIN reserva r ON r.creado_por = p.id_participante
+        JOIN rollup_creador_dia x ON x.creado_por = p.id_participante
+        JOIN sala s ON s.id_sala = x.id_sala
+        {where}
         GROUP BY p.id_participante
         ORDER BY reservas DESC
         LIMIT %s;
-    """, (limit,))
+    """, (*params, limit))
     if not participantesMasActivos:
         raise HTTPException(
             status_code=409,
@@ -182,25 +329,21 @@ def participantes_mas_activos(limit):
     return participantesMasActivos
 
 
-def dia_con_mas_creaciones_reservas():
-
-    try:
-        resultado = fetch_all("""
-            SELECT DAYNAME(created_at) AS dia, COUNT(*) AS reservas
-            FROM reserva
-            GROUP BY dia
-            ORDER BY reservas DESC
-            LIMIT 1;
-        """)
-    except Exception as e:
-        print("Warning: fallo query con created_at, intentando con fecha. Error:", e)
-        resultado = fetch_all("""
-            SELECT DAYNAME(fecha) AS dia, COUNT(*) AS reservas
-            FROM reserva
-            GROUP BY dia
-            ORDER BY reservas DESC
-            LIMIT 1;
-        """)
+@cacheado
+def dia_con_mas_creaciones_reservas(filtros: FiltrosReporte = SIN_FILTROS):
+    # acá el período se refiere a cuándo se crearon las reservas
+    rollup, sala = _filtros(filtros, columna_fecha="x.fecha_creacion", columna_rol="p.rol")
+    where, params = _where(rollup, sala)
+    resultado = fetch_all(f"""
+        SELECT DAYNAME(x.fecha_creacion) AS dia, CAST(SUM(x.n_reservas) AS SIGNED) AS reservas
+        FROM rollup_creador_dia x
+        JOIN sala s ON s.id_sala = x.id_sala
+        JOIN participante p ON p.id_participante = x.creado_por
+        {where}
+        GROUP BY dia
+        ORDER BY reservas DESC
+        LIMIT 1;
+    """, params)
 
     if not resultado:
         raise HTTPException(
@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from contextvars import copy_context
+from fastapi import HTTPException, status
+from db import transaction
+from services.consultas_service import (
+    salas_mas_reservadas,
+    salas_menos_utilizadas,
+    participantes_mas_activos,
+    turnos_mas_demandados,
+    porcentaje_reservas_utilizadas,
+    reservas_por_estado,
+    reservas_por_dia_semana,
+    reservas_por_carrera_facultad,
+    reservas_asistencias_por_rol,
+    sanciones_por_rol,
+    promedio_participantes_por_sala,
+    dia_con_mas_creaciones_reservas,
+    ocupacion_salas_por_edificio,
+    reporte_filtrado
+)
+from models.reporte_model import FiltrosReporte
+
+# Todos los reportes del dashboard en un solo request: cada reporte corre en
+# un hilo propio (y por lo tanto con su propia conexión del pool) y tiene su
+# propio plazo; si uno falla o se pasa de tiempo, los demás se devuelven igual.
+#
+# El plazo también se aplica en la base (max_execution_time de la sesión):
+# cancelar el futuro no frena un reporte que ya está corriendo, así que es
+# MySQL quien corta la consulta y libera el hilo. Además, a lo sumo
+# DASHBOARD_WORKERS + DASHBOARD_COLA reportes pueden estar en curso o en
+# espera; si no hay lugar para un dashboard completo se responde 503.
+
+TIMEOUT_REPORTE = float(os.getenv("DASHBOARD_TIMEOUT", 10))
+WORKERS = int(os.getenv("DASHBOARD_WORKERS", 8))
+COLA = int(os.getenv("DASHBOARD_COLA", 16))
+# compartido entre requests: acota cuántas conexiones del pool admin puede
+# tomar el dashboard a la vez
+_executor = ThreadPoolExecutor(
+    max_workers=WORKERS,
+    thread_name_prefix="dashboard"
+)
+_cupo = threading.BoundedSemaphore(WORKERS + COLA)
+# error de MySQL cuando una consulta supera max_execution_time
+ER_QUERY_TIMEOUT = 3024
+
+def _reportes(limit: int, filtros: FiltrosReporte, comparar: bool) -> dict:
+    con_limit = {
+        "salas_mas_reservadas": salas_mas_reservadas,
+        "salas_menos_utilizadas": salas_menos_utilizadas,
+        "participantes_mas_activos": participantes_mas_activos,
+    }
+    sin_limit = {
+        "turnos_mas_demandados": turnos_mas_demandados,
+        "porcentaje_reservas_utilizadas": porcentaje_reservas_utilizadas,
+        "reservas_por_estado": reservas_por_estado,
+        "reservas_por_dia_semana": reservas_por_dia_semana,
+        "reservas_por_carrera_facultad": reservas_por_carrera_facultad,
+        "reservas_asistencias_por_rol": reservas_asistencias_por_rol,
+        "sanciones_por_rol": sanciones_por_rol,
+        "promedio_participantes_por_sala": promedio_participantes_por_sala,
+        "dia_con_mas_creaciones_reservas": dia_con_mas_creaciones_reservas,
+        "ocupacion_salas_por_edificio": ocupacion_salas_por_edificio,
+    }
+    reportes = {
+        nombre: (lambda fn=fn: reporte_filtrado(fn, filtros, comparar, limit))
+        for nombre, fn in con_limit.items()
+    }
+    reportes.update({
+        nombre: (lambda fn=fn: reporte_filtrado(fn, filtros, comparar))
+        for nombre, fn in sin_limit.items()
+    })
+    return reportes
+
+def _medir(fn, limite: float):
+    inicio = time.perf_counter()
+    restante_ms = int((limite - inicio) * 1000)
+    if restante_ms <= 0:
+        # esperó en la cola todo su plazo: ni se empieza
+        raise FuturesTimeout()
+    # todas las consultas del reporte van por la misma conexión, con el
+    # plazo restante como límite en el servidor; la variable es de la
+    # sesión, así que se restablece antes de devolver la conexión al pool
+    with transaction() as tx:
+        tx.execute_query("SET SESSION max_execution_time = %s", (restante_ms,))
+        try:
+            datos = fn()
+        finally:
+            tx.execute_query("SET SESSION max_execution_time = 0")
+    return datos, round((time.perf_counter() - inicio) * 1000, 1)
+
+def _reservar_cupo(cantidad: int):
+    tomados = 0
+    while tomados < cantidad and _cupo.acquire(blocking=False):
+        tomados += 1
+    if tomados < cantidad:
+        for _ in range(tomados):
+            _cupo.release()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Hay demasiados reportes en curso, intente nuevamente en unos segundos",
+            headers={"Retry-After": "5"},
+        )
+
+def dashboard(limit: int = 5, timeout: float = TIMEOUT_REPORTE, filtros: FiltrosReporte = None, comparar: bool = False) -> dict:
+    """
+    Calcula todos los reportes en paralelo. Cada reporte devuelve
+    {"ok": True, "datos": ..., "ms": ...} o {"ok": False, "error": ...}.
+    """
+    inicio = time.perf_counter()
+    filtros = filtros or FiltrosReporte()
+    if comparar:
+        # se valida acá para responder 400 una vez y no en cada reporte
+        if filtros.desde is None or filtros.hasta is None:
+            raise HTTPException(status_code=400, detail="Para comparar períodos hay que indicar desde y hasta")
+    reportes_a_correr = _reportes(limit, filtros, comparar)
+    _reservar_cupo(len(reportes_a_correr))
+    limite = inicio + timeout
+    # cada hilo corre con una copia del contexto del request (userRol admin);
+    # el cupo de cada reporte se libera cuando termina, aunque ya nadie espere
+    futuros = {}
+    for nombre, fn in reportes_a_correr.items():
+        futuro = _executor.submit(copy_context().run, _medir, fn, limite)
+        futuro.add_done_callback(lambda _: _cupo.release())
+        futuros[nombre] = futuro
+
+    reportes = {}
+    for nombre, futuro in futuros.items():
+        try:
+            datos, ms = futuro.result(timeout=max(0.0, limite - time.perf_counter()))
+            reportes[nombre] = {"ok": True, "datos": datos, "ms": ms}
+        except FuturesTimeout:
+            # si todavía no arrancó, no se ejecuta; si ya está corriendo lo
+            # corta max_execution_time y su resultado se descarta
+            futuro.cancel()
+            reportes[nombre] = {"ok": False, "error": f"Tiempo agotado ({timeout}s)"}
+        except HTTPException as e:
+            reportes[nombre] = {"ok": False, "status": e.status_code, "error": e.detail}
+        except Exception as e:
+            if getattr(e, "errno", None) == ER_QUERY_TIMEOUT:
+                reportes[nombre] = {"ok": False, "error": f"Tiempo agotado ({timeout}s)"}
+            else:
+                reportes[nombre] = {"ok": False, "error": str(e)}
+
+    return {
+        "reportes": reportes,
+        "ms": round((time.perf_counter() - inicio) * 1000, 1),
+    }
@@ -0,0 +1,258 @@
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from db import fetch_all
+from context import userRol
+
+# Índice en memoria de disponibilidad: para cada (sala, fecha) se guarda una
+# máscara de 15 bits donde el bit i-1 indica que el turno i está ocupado.
+# Se carga por ventanas de fechas desde sala_turno_ocupado, se actualiza en
+# cada escritura (después del commit) y se recarga pasado DISPONIBILIDAD_TTL
+# segundos para tomar cambios hechos por otros procesos. La lectura de la
+# base se hace sin el lock: las escrituras que llegan mientras tanto se
+# anotan y se vuelven a aplicar sobre lo leído antes de publicarlo.
+
+TURNOS = 15
+TTL = float(os.getenv("DISPONIBILIDAD_TTL", 60))
+MAX_FECHAS = int(os.getenv("DISPONIBILIDAD_MAX_FECHAS", 366))
+
+def mascara_turnos(start_turn_id: int, end_turn_id: int) -> int:
+    return ((1 << (end_turn_id - start_turn_id + 1)) - 1) << (start_turn_id - 1)
+
+def turnos_de_mascara(mascara: int) -> list:
+    return [i + 1 for i in range(TURNOS) if mascara >> i & 1]
+
+def a_fecha(valor) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor))
+
+def _rango_fechas(desde: date, hasta: date):
+    dia = desde
+    while dia <= hasta:
+        yield dia
+        dia += timedelta(days=1)
+
+def _consultar_como_lector(query, params=None):
+    # el índice es compartido entre usuarios: siempre se carga con el rol
+    # 'user', que tiene SELECT sobre sala y sala_turno_ocupado
+    token = userRol.set("user")
+    try:
+        return fetch_all(query, params)
+    finally:
+        userRol.reset(token)
+
+
+def _aplicar(por_sala: dict, id_sala: int, mascara: int, ocupar: bool):
+    if ocupar:
+        por_sala[id_sala] = por_sala.get(id_sala, 0) | mascara
+    elif id_sala in por_sala:
+        restante = por_sala[id_sala] & ~mascara
+        if restante:
+            por_sala[id_sala] = restante
+        else:
+            del por_sala[id_sala]
+
+
+class IndiceDisponibilidad:
+    def __init__(self, ttl: float = TTL, max_fechas: int = MAX_FECHAS):
+        self.ttl = ttl
+        self.max_fechas = max_fechas
+        self._por_fecha = {}    # fecha -> {id_sala: mascara}
+        self._cargada_en = {}   # fecha -> time.monotonic() de la carga
+        self._salas = None      # {id_sala: fila de sala}
+        self._salas_en = 0.0
+        self._cargas = []       # cargas en curso: (desde, hasta, [(id_sala, fecha, mascara, ocupar)])
+        self._lock = threading.RLock()
+
+    # ---------- carga ----------
+
+    def _leer_mascaras(self, desde: date, hasta: date):
+        filas = _consultar_como_lector(
+            """
+            SELECT id_sala, fecha, id_turno
+            FROM sala_turno_ocupado
+            WHERE fecha BETWEEN %s AND %s
+            """,
+            (desde, hasta)
+        )
+        mascaras = {dia: {} for dia in _rango_fechas(desde, hasta)}
+        for f in filas:
+            por_sala = mascaras[a_fecha(f["fecha"])]
+            por_sala[f["id_sala"]] = por_sala.get(f["id_sala"], 0) | (1 << (f["id_turno"] - 1))
+        return mascaras
+
+    def _cargar(self, desde: date, hasta: date, publicar):
+        """
+        Lee las máscaras de [desde, hasta] y llama a `publicar(mascaras)` con
+        el lock tomado. Las marcas y liberaciones que llegan mientras se lee
+        (hooks al_confirmar de otros hilos) se anotan y se reaplican sobre lo
+        leído, en orden, antes de publicar: si la lectura ya las incluía,
+        volver a aplicarlas no cambia nada.
+        """
+        carga = (desde, hasta, [])
+        with self._lock:
+            self._cargas.append(carga)
+        try:
+            mascaras = self._leer_mascaras(desde, hasta)
+        except BaseException:
+            with self._lock:
+                self._cargas.remove(carga)
+            raise
+        with self._lock:
+            self._cargas.remove(carga)
+            for id_sala, dia, mascara, ocupar in carga[2]:
+                _aplicar(mascaras[dia], id_sala, mascara, ocupar)
+            return publicar(mascaras)
+
+    def _asegurar(self, desde: date, hasta: date):
+        ahora = time.monotonic()
+        with self._lock:
+            vencidas = [
+                dia for dia in _rango_fechas(desde, hasta)
+                if ahora - self._cargada_en.get(dia, float("-inf")) > self.ttl
+            ]
+        if not vencidas:
+            return
+
+        def publicar(mascaras):
+            for dia, por_sala in mascaras.items():
+                self._por_fecha[dia] = por_sala
+                self._cargada_en[dia] = ahora
+            self._descartar_viejas()
+
+        self._cargar(min(vencidas), max(vencidas), publicar)
+
+    def _descartar_viejas(self):
+        sobrantes = len(self._cargada_en) - self.max_fechas
+        if sobrantes <= 0:
+            return
+        for dia in sorted(self._cargada_en, key=self._cargada_en.get)[:sobrantes]:
+            self._cargada_en.pop(dia, None)
+            self._por_fecha.pop(dia, None)
+
+    def salas(self) -> dict:
+        with self._lock:
+            if self._salas is not None and time.monotonic() - self._salas_en <= self.ttl:
+                return self._salas
+        filas = _consultar_como_lector("SELECT * FROM sala ORDER BY id_sala")
+        with self._lock:
+            self._salas = {f["id_sala"]: f for f in filas}
+            self._salas_en = time.monotonic()
+            return self._salas
+
+    # ---------- escrituras ----------
+
+    def _escribir(self, id_sala: int, fecha, mascara: int, ocupar: bool):
+        dia = a_fecha(fecha)
+        with self._lock:
+            por_sala = self._por_fecha.get(dia)
+            if por_sala is not None:
+                _aplicar(por_sala, id_sala, mascara, ocupar)
+            for desde, hasta, anotadas in self._cargas:
+                if desde <= dia <= hasta:
+                    anotadas.append((id_sala, dia, mascara, ocupar))
+
+    def marcar(self, id_sala: int, fecha, mascara: int):
+        self._escribir(id_sala, fecha, mascara, True)
+
+    def liberar(self, id_sala: int, fecha, mascara: int):
+        self._escribir(id_sala, fecha, mascara, False)
+
+    def invalidar_salas(self):
+        with self._lock:
+            self._salas = None
+
+    def olvidar_sala(self, id_sala: int):
+        with self._lock:
+            self._salas = None
+            for por_sala in self._por_fecha.values():
+                por_sala.pop(id_sala, None)
+
+    def invalidar(self):
+        with self._lock:
+            self._por_fecha.clear()
+            self._cargada_en.clear()
+            self._salas = None
+
+    # ---------- consultas ----------
+
+    def mascara(self, id_sala: int, fecha) -> int:
+        dia = a_fecha(fecha)
+        self._asegurar(dia, dia)
+        with self._lock:
+            return self._por_fecha.get(dia, {}).get(id_sala, 0)
+
+    def ocupados(self, id_sala: int, fecha) -> list:
+        """Turnos ocupados de una sala en una fecha."""
+        return turnos_de_mascara(self.mascara(id_sala, fecha))
+
+    def salas_libres(self, fecha, start_turn_id: int, end_turn_id: int) -> list:
+        """Salas sin ningún turno ocupado entre start y end en la fecha."""
+        dia = a_fecha(fecha)
+        pedido = mascara_turnos(start_turn_id, end_turn_id)
+        salas = self.salas()
+        self._asegurar(dia, dia)
+        with self._lock:
+            por_sala = self._por_fecha.get(dia, {})
+            return [fila for id_sala, fila in salas.items() if not por_sala.get(id_sala, 0) & pedido]
+
+    def mascaras_rango(self, desde, hasta) -> dict:
+        """{fecha: {id_sala: mascara}} para un rango de fechas."""
+        desde, hasta = a_fecha(desde), a_fecha(hasta)
+        self._asegurar(desde, hasta)
+        with self._lock:
+            return {dia: dict(self._por_fecha.get(dia, {})) for dia in _rango_fechas(desde, hasta)}
+
+    # ---------- consistencia ----------
+
+    def verificar(self, desde, hasta, corregir: bool = True) -> dict:
+        """
+        Compara las fechas cargadas en memoria con la base. Devuelve las
+        diferencias encontradas y, si `corregir`, reemplaza lo cargado.
+        """
+        desde, hasta = a_fecha(desde), a_fecha(hasta)
+        diferencias = []
+        ahora = time.monotonic()
+
+        def comparar(en_base):
+            for dia, por_sala_db in en_base.items():
+                por_sala_mem = self._por_fecha.get(dia)
+                if por_sala_mem is None:
+                    continue
+                for id_sala in set(por_sala_db) | set(por_sala_mem):
+                    mem = por_sala_mem.get(id_sala, 0)
+                    db = por_sala_db.get(id_sala, 0)
+                    if mem != db:
+                        diferencias.append({
+                            "fecha": dia.isoformat(),
+                            "id_sala": id_sala,
+                            "memoria": turnos_de_mascara(mem),
+                            "base": turnos_de_mascara(db),
+                        })
+                if corregir:
+                    self._por_fecha[dia] = por_sala_db
+                    self._cargada_en[dia] = ahora
+
+        self._cargar(desde, hasta, comparar)
+        return {
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat(),
+            "consistente": not diferencias,
+            "diferencias": diferencias,
+        }
+
+    def estado(self) -> dict:
+        with self._lock:
+            return {
+                "fechas_cargadas": len(self._por_fecha),
+                "entradas": sum(len(v) for v in self._por_fecha.values()),
+                "salas_en_cache": 0 if self._salas is None else len(self._salas),
+                "ttl": self.ttl,
+            }
+
+
+indice = IndiceDisponibilidad()
@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import Optional
+from db import fetch_iter
+
+# Exportaciones completas (años de reservas): las filas se leen con
+# fetch_iter y se serializan de a bloques, así la memoria usada no depende
+# de cuántas filas se exporten.
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def _ndjson(bloques):
+    for filas in bloques:
+        yield "".join(json.dumps(f, default=str, ensure_ascii=False) + "\n" for f in filas)
+
+def _csv(bloques):
+    buffer = io.StringIO()
+    writer = None
+    for filas in bloques:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(filas[0].keys()))
+            writer.writeheader()
+        writer.writerows(filas)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+def _serializar(bloques, formato: str):
+    if formato == "csv":
+        return _csv(bloques)
+    return _ndjson(bloques)
+
+def _where(condiciones: list) -> str:
+    return (" WHERE " + " AND ".join(condiciones)) if condiciones else ""
+
+def exportar_reservas(formato: str = "ndjson", desde: Optional[date] = None, hasta: Optional[date] = None, estado: Optional[str] = None):
+    """
+    Todas las reservas (con sala y edificio), ordenadas por id.
+    """
+    condiciones = []
+    params = []
+    if desde is not None:
+        condiciones.append("r.fecha >= %s")
+        params.append(desde)
+    if hasta is not None:
+        condiciones.append("r.fecha <= %s")
+        params.append(hasta)
+    if estado is not None:
+        condiciones.append("r.estado = %s")
+        params.append(estado)
+
+    query = f"""
+        SELECT r.id_reserva, r.id_sala, s.nombre AS sala, s.id_edificio,
+               r.fecha, r.start_turn_id, r.end_turn_id, r.estado,
+               r.creado_por, r.created_at, r.updated_at
+        FROM reserva r
+        JOIN sala s ON s.id_sala = r.id_sala
+        {_where(condiciones)}
+        ORDER BY r.id_reserva
+    """
+    return _serializar(fetch_iter(query, tuple(params)), formato)
+
+def exportar_historial_participantes(formato: str = "ndjson", id_participante: Optional[int] = None, desde: Optional[date] = None, hasta: Optional[date] = None):
+    """
+    Historial de participación en reservas (una fila por participante y
+    reserva), de un participante o de todos.
+    """
+    condiciones = []
+    params = []
+    if id_participante is not None:
+        condiciones.append("rp.id_participante = %s")
+        params.append(id_participante)
+    if desde is not None:
+        condiciones.append("r.fecha >= %s")
+        params.append(desde)
+    if hasta is not None:
+        condiciones.append("r.fecha <= %s")
+        params.append(hasta)
+
+    query = f"""
+        SELECT rp.id_participante, p.ci, p.nombre, p.apellido, p.rol,
+               r.id_reserva, r.id_sala, r.fecha, r.start_turn_id, r.end_turn_id,
+               r.estado, rp.estado_participacion, rp.asistencia,
+               rp.fecha_solicitud_reserva, rp.marcado_en
+        FROM reserva_participante rp
+        JOIN reserva r ON r.id_reserva = rp.id_reserva
+        JOIN participante p ON p.id_participante = rp.id_participante
+        {_where(condiciones)}
+        ORDER BY rp.id
+    """
+    return _serializar(fetch_iter(query, tuple(params)), formato)
+
+def exportar_historial_sanciones(formato: str = "ndjson", id_participante: Optional[int] = None, desde: Optional[date] = None, hasta: Optional[date] = None):
+    """
+    Historial de sanciones, de un participante o de todos.
+    """
+    condiciones = []
+    params = []
+    if id_participante is not None:
+        condiciones.append("s.id_participante = %s")
+        params.append(id_participante)
+    if desde is not None:
+        condiciones.append("s.fecha_fin >= %s")
+        params.append(desde)
+    if hasta is not None:
+        condiciones.append("s.fecha_inicio <= %s")
+        params.append(hasta)
+
+    query = f"""
+        SELECT s.id_sancion, s.id_participante, p.ci, p.nombre, p.apellido, p.rol,
+               s.fecha_inicio, s.fecha_fin, s.motivo, s.created_at
+        FROM sancion_participante s
+        JOIN participante p ON p.id_participante = s.id_participante
+        {_where(condiciones)}
+        ORDER BY s.id_sancion
+    """
+    return _serializar(fetch_iter(query, tuple(params)), formato)
@@ -0,0 +1,99 @@
+import time
+from datetime import datetime
+from db import execute_query, fetch_all
+from context import con_rol
+from services.lease_service import nodo_actual
+
+# Cada ejecución de una tarea queda en job_run: se inserta al empezar (así se
+# ve si una corrida se superpone con la siguiente) y se completa al terminar.
+# Las tareas devuelven un dict con "success" y, opcionalmente, los contadores
+# filas_escaneadas / filas_actualizadas / sanciones.
+
+PERCENTILES = (50, 90, 95, 99)
+
+def ejecutar_registrando(job: str, fn, *args, **kwargs):
+    """Ejecuta `fn` y registra la corrida en job_run. Devuelve lo que devuelve `fn`."""
+    with con_rol("admin"):
+        id_run = execute_query(
+            "INSERT INTO job_run (job, nodo, inicio) VALUES (%s, %s, %s)",
+            (job, nodo_actual(), datetime.now())
+        )
+    comienzo = time.perf_counter()
+    resultado = None
+    error = None
+    try:
+        resultado = fn(*args, **kwargs)
+        if isinstance(resultado, dict) and not resultado.get("success", True):
+            error = resultado.get("error")
+        return resultado
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        duracion_ms = int((time.perf_counter() - comienzo) * 1000)
+        datos = resultado if isinstance(resultado, dict) else {}
+        with con_rol("admin"):
+            execute_query(
+                """
+                UPDATE job_run
+                SET fin = %s, duracion_ms = %s, filas_escaneadas = %s,
+                    filas_actualizadas = %s, sanciones_creadas = %s, error = %s
+                WHERE id_run = %s
+                """,
+                (
+                    datetime.now(), duracion_ms,
+                    datos.get("filas_escaneadas"), datos.get("filas_actualizadas"),
+                    datos.get("sanciones"), error, id_run
+                )
+            )
+
+def _percentil(valores_ordenados: list, p: int):
+    # nearest-rank
+    if not valores_ordenados:
+        return None
+    k = max(1, -(-p * len(valores_ordenados) // 100))
+    return valores_ordenados[k - 1]
+
+def estadisticas_ejecuciones(job: str = None, recientes: int = 20, muestra: int = 500) -> dict:
+    """
+    Percentiles de duración por tarea (sobre sus últimas `muestra` corridas
+    terminadas) y las últimas `recientes` corridas.
+    """
+    condicion = "WHERE job = %s" if job else ""
+    params = (job,) if job else ()
+
+    jobs = fetch_all(f"SELECT DISTINCT job FROM job_run {condicion}", params)
+    por_job = []
+    for fila in jobs:
+        corridas = fetch_all(
+            """
+            SELECT duracion_ms, error
+            FROM job_run
+            WHERE job = %s AND fin IS NOT NULL
+            ORDER BY inicio DESC
+            LIMIT %s
+            """,
+            (fila["job"], muestra)
+        )
+        duraciones = sorted(c["duracion_ms"] for c in corridas)
+        por_job.append({
+            "job": fila["job"],
+            "corridas": len(corridas),
+            "errores": sum(1 for c in corridas if c["error"]),
+            "promedio_ms": round(sum(duraciones) / len(duraciones), 1) if duraciones else None,
+            "max_ms": duraciones[-1] if duraciones else None,
+            **{f"p{p}_ms": _percentil(duraciones, p) for p in PERCENTILES},
+        })
+
+    ultimas = fetch_all(
+        f"""
+        SELECT id_run, job, nodo, inicio, fin, duracion_ms, filas_escaneadas,
+               filas_actualizadas, sanciones_creadas, error
+        FROM job_run
+        {condicion}
+        ORDER BY inicio DESC
+        LIMIT %s
+        """,
+        params + (recientes,)
+    )
+    return {"jobs": por_job, "recientes": ultimas}
@@ -0,0 +1,107 @@
+import json
+import os
+import socket
+import uuid
+from contextlib import contextmanager
+from db import execute_query, fetch_all, transaction
+from context import con_rol
+
+# Elección de líder por lease en la tabla job_lease: el nodo que lo tiene lo
+# renueva periódicamente; si deja de hacerlo (se cayó, se colgó) el lease
+# vence y lo toma otro nodo. Se usa una fila y no GET_LOCK porque el lock
+# vive en una sesión de MySQL y el pool recicla las conexiones.
+
+LEASE_SCHEDULER = 'scheduler'
+LEASE_TTL = int(os.getenv("SCHEDULER_LEASE_TTL", 60))
+LEASE_RENOVACION = int(os.getenv("SCHEDULER_LEASE_RENOVACION", 20))
+# vida del lease de una ejecución (ver ejecucion_exclusiva): tiene que
+# alcanzar para la corrida más larga; si el proceso muere, se libera solo
+LEASE_EJECUCION_TTL = int(os.getenv("SCHEDULER_EJECUCION_TTL", 900))
+
+def nodo_actual() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Lease:
+    def __init__(self, job: str = LEASE_SCHEDULER, nodo: str = None, ttl: int = LEASE_TTL):
+        self.job = job
+        self.nodo = nodo or nodo_actual()
+        self.ttl = ttl
+        self.es_lider = False
+
+    def adquirir(self) -> bool:
+        """
+        Toma el lease si está libre o vencido, o lo renueva si ya es nuestro.
+        Devuelve True si este nodo quedó como líder.
+        """
+        with con_rol("admin"), transaction():
+            # las asignaciones se evalúan en orden: expira_en y renovado_en
+            # ven el `nodo` ya actualizado
+            execute_query(
+                """
+                INSERT INTO job_lease (job, nodo, adquirido_en, renovado_en, expira_en)
+                VALUES (%s, %s, NOW(), NOW(), NOW() + INTERVAL %s SECOND)
+                ON DUPLICATE KEY UPDATE
+                    adquirido_en = IF(nodo <> VALUES(nodo) AND expira_en < NOW(), NOW(), adquirido_en),
+                    nodo = IF(nodo = VALUES(nodo) OR expira_en < NOW(), VALUES(nodo), nodo),
+                    renovado_en = IF(nodo = VALUES(nodo), NOW(), renovado_en),
+                    expira_en = IF(nodo = VALUES(nodo), VALUES(expira_en), expira_en)
+                """,
+                (self.job, self.nodo, self.ttl)
+            )
+            filas = fetch_all("SELECT nodo FROM job_lease WHERE job = %s", (self.job,))
+        self.es_lider = bool(filas) and filas[0]["nodo"] == self.nodo
+        return self.es_lider
+
+    def liberar(self):
+        """Deja el lease vencido para que otro nodo lo tome sin esperar el TTL."""
+        with con_rol("admin"):
+            execute_query(
+                "UPDATE job_lease SET expira_en = NOW() - INTERVAL 1 SECOND WHERE job = %s AND nodo = %s",
+                (self.job, self.nodo)
+            )
+        self.es_lider = False
+
+    def publicar_tareas(self, tareas: list):
+        """Guarda en el lease las tareas del líder (para estado-scheduler)."""
+        with con_rol("admin"):
+            execute_query(
+                "UPDATE job_lease SET tareas = %s WHERE job = %s AND nodo = %s",
+                (json.dumps(tareas, default=str), self.job, self.nodo)
+            )
+
+
+class LeaseOcupadoError(Exception):
+    pass
+
+@contextmanager
+def ejecucion_exclusiva(job: str):
+    """
+    Toma el lease `job` mientras dura una ejecución de esa tarea, así el
+    scheduler y las ejecuciones manuales desde la API nunca corren a la vez
+    (ni se pisan la marca de agua). Cada ejecución usa su propio nodo: dos
+    pedidos del mismo proceso también se excluyen. Lanza LeaseOcupadoError si
+    la tarea ya está corriendo en otro lado.
+    """
+    lease = Lease(job, nodo=f"{nodo_actual()}:{uuid.uuid4().hex[:8]}", ttl=LEASE_EJECUCION_TTL)
+    if not lease.adquirir():
+        raise LeaseOcupadoError(f"La tarea '{job}' ya se está ejecutando")
+    try:
+        yield lease
+    finally:
+        lease.liberar()
+
+
+def estado_leases() -> list:
+    filas = fetch_all(
+        """
+        SELECT job, nodo, adquirido_en, renovado_en, expira_en,
+               expira_en > NOW() AS vigente, tareas
+        FROM job_lease
+        ORDER BY job
+        """
+    )
+    for f in filas:
+        f["vigente"] = bool(f["vigente"])
+        f["tareas"] = json.loads(f["tareas"]) if f["tareas"] else []
+    return filas
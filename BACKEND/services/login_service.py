@@ -1,9 +1,10 @@
 from fastapi import HTTPException, status
 from services.auth_services import authenticate_user, create_access_token
+from services.versiones_token import claims_de_usuario
 
 
-def login_and_get_token(email: str, password: str) -> str:
-    user = authenticate_user(email, password)
+async def login_and_get_token(email: str, password: str) -> str:
+    user = await authenticate_user(email, password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -11,7 +12,8 @@ def login_and_get_token(email: str, password: str) -> str:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(data={"sub": user['email']})
+    # el token lleva id, rol y versión: los requests se validan sin ir a la base
+    access_token = create_access_token(data=claims_de_usuario(user))
     return access_token
 
 
@@ -0,0 +1,99 @@
+from fastapi import HTTPException
+from mysql.connector import IntegrityError
+from db import execute_query, fetch_all, transaction, al_confirmar
+from services.disponibilidad_service import indice, mascara_turnos
+
+# sala_turno_ocupado tiene una fila por (sala, fecha, turno) ocupado por una
+# reserva activa o confirmada. La UNIQUE KEY sobre esas tres columnas es la
+# que impide la doble reserva, sin escanear la tabla reserva.
+
+ESTADOS_OCUPAN = ('activa', 'confirmada')
+
+def ocupar_turnos(id_reserva: int, id_sala: int, fecha, start_turn_id: int, end_turn_id: int):
+    """
+    Marca como ocupados los turnos start..end de la sala para la reserva.
+    Si alguno ya estaba ocupado lanza 400 (y la transacción hace rollback).
+    """
+    try:
+        execute_query(
+            """
+            INSERT INTO sala_turno_ocupado (id_sala, fecha, id_turno, id_reserva)
+            SELECT %s, %s, t.id_turno, %s
+            FROM turno t
+            WHERE t.id_turno BETWEEN %s AND %s
+            """,
+            (id_sala, fecha, id_reserva, start_turn_id, end_turn_id)
+        )
+    except IntegrityError as e:
+        if e.errno == 1062:  # ER_DUP_ENTRY
+            raise HTTPException(status_code=400, detail="La sala ya está reservada en ese horario")
+        raise
+    mascara = mascara_turnos(start_turn_id, end_turn_id)
+    al_confirmar(lambda: indice.marcar(id_sala, fecha, mascara))
+
+def liberar_turnos(id_reserva: int):
+    """
+    Libera los turnos que ocupaba una reserva (cancelada, finalizada, etc.).
+    """
+    ocupados = fetch_all(
+        "SELECT id_sala, fecha, id_turno FROM sala_turno_ocupado WHERE id_reserva = %s",
+        (id_reserva,)
+    )
+    if not ocupados:
+        return
+    execute_query(
+        "DELETE FROM sala_turno_ocupado WHERE id_reserva = %s",
+        (id_reserva,)
+    )
+
+    def _actualizar_indice():
+        for o in ocupados:
+            indice.liberar(o["id_sala"], o["fecha"], 1 << (o["id_turno"] - 1))
+    al_confirmar(_actualizar_indice)
+
+def liberar_turnos_reservas(subconsulta: str, params=()):
+    """
+    Versión por conjuntos de liberar_turnos: libera los turnos de todas las
+    reservas cuyo id devuelve `subconsulta` (un SELECT de id_reserva).
+    Devuelve la cantidad de turnos liberados.
+    """
+    ocupados = fetch_all(
+        f"""
+        SELECT o.id_sala, o.fecha, o.id_turno
+        FROM sala_turno_ocupado o
+        JOIN ({subconsulta}) x ON x.id_reserva = o.id_reserva
+        """,
+        params
+    )
+    if not ocupados:
+        return 0
+    execute_query(
+        f"""
+        DELETE o FROM sala_turno_ocupado o
+        JOIN ({subconsulta}) x ON x.id_reserva = o.id_reserva
+        """,
+        params
+    )
+
+    def _actualizar_indice():
+        for o in ocupados:
+            indice.liberar(o["id_sala"], o["fecha"], 1 << (o["id_turno"] - 1))
+    al_confirmar(_actualizar_indice)
+    return len(ocupados)
+
+def sincronizar_turnos(id_reserva: int, id_sala: int, fecha, start_turn_id: int, end_turn_id: int, estado: str):
+    """
+    Deja sala_turno_ocupado consistente con el estado actual de una reserva
+    que se movió o cambió de estado.
+    """
+    with transaction():
+        liberar_turnos(id_reserva)
+        if estado in ESTADOS_OCUPAN:
+            ocupar_turnos(id_reserva, id_sala, fecha, start_turn_id, end_turn_id)
+
+def turnos_ocupados(id_sala: int, fecha):
+    """
+    Devuelve los id_turno ocupados de una sala en una fecha (desde el índice
+    en memoria).
+    """
+    return indice.ocupados(id_sala, fecha)
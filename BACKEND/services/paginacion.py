@@ -0,0 +1,40 @@
+from fastapi import HTTPException
+from db import fetch_all
+
+# Paginación por cursor (keyset) sobre la PK: en lugar de OFFSET se pide
+# "las filas con id mayor (o menor) al último que viste", que usa el índice
+# de la PK sin importar qué tan atrás esté la página.
+
+MAX_LIMIT = 500
+
+def paginar(query: str, condiciones: list, params: list, columna: str, clave: str, cursor: int = None, limit: int = 100, descendente: bool = False):
+    """
+    Ejecuta `query` (un SELECT sin WHERE/ORDER/LIMIT) agregando las
+    condiciones de filtro, el cursor y el orden por `columna`.
+    Devuelve {"items": [...], "next_cursor": id | None}; next_cursor es el
+    valor de `clave` de la última fila cuando quedan más páginas.
+    Siempre se devuelve una página acotada (a lo sumo MAX_LIMIT filas).
+    """
+    if limit < 1 or limit > MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit debe estar entre 1 y {MAX_LIMIT}")
+
+    condiciones = list(condiciones)
+    params = list(params)
+    if cursor is not None:
+        condiciones.append(f"{columna} {'<' if descendente else '>'} %s")
+        params.append(cursor)
+
+    if condiciones:
+        query += " WHERE " + " AND ".join(condiciones)
+    query += f" ORDER BY {columna} {'DESC' if descendente else 'ASC'}"
+    # se pide una fila de más para saber si hay otra página
+    query += " LIMIT %s"
+    params.append(limit + 1)
+
+    filas = fetch_all(query, tuple(params))
+
+    next_cursor = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        next_cursor = filas[-1][clave]
+    return {"items": filas, "next_cursor": next_cursor}
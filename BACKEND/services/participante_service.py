@@ -1,7 +1,13 @@
 from fastapi import HTTPException
 from services.auth_services import hash_password
-from db import execute_query, fetch_all
+from db import execute_query, fetch_all, al_confirmar, transaction
 from models.participante_model import ParticipanteCreate
+from services.paginacion import paginar
+from services.cache_reportes import invalidar_reportes
+from services.cache_usuarios import invalidar_usuario
+from services.versiones_token import tabla_versiones
+from services.rollup_service import encolar_fechas_de_participante
+from typing import Optional
 
 def validar_email_unico(email: str):
     result = fetch_all("SELECT email FROM participante WHERE email = %s", (email,))
@@ -27,6 +33,7 @@ def crear_participante(p: ParticipanteCreate):
             VALUES (%s, %s, %s, %s, %s)
         """
         execute_query(query, (p.ci, p.nombre, p.apellido, p.email, p.rol))
+        invalidar_reportes()
         
         return {"message": "Participante creado exitosamente"}
     
@@ -35,9 +42,23 @@ def crear_participante(p: ParticipanteCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
-def listar_participantes():
+def listar_participantes(cursor: Optional[int] = None, limit: int = 100, rol: Optional[str] = None, activo: Optional[bool] = None):
     try:
-        return fetch_all("SELECT * FROM participante")
+        condiciones = []
+        params = []
+        if rol is not None:
+            condiciones.append("rol = %s")
+            params.append(rol)
+        if activo is not None:
+            condiciones.append("activo = %s")
+            params.append(activo)
+        return paginar(
+            "SELECT * FROM participante", condiciones, params,
+            columna="id_participante", clave="id_participante",
+            cursor=cursor, limit=limit
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -56,15 +77,27 @@ def actualizar_participante(id: int, p: ParticipanteCreate):
         if not result:
             raise HTTPException(status_code=404, detail="Participante no encontrado")
         
+        # un cambio de rol o de email invalida los tokens emitidos (llevan
+        # ambos); token_version va primero porque MySQL asigna de izquierda a
+        # derecha y tiene que comparar contra los valores anteriores
         query = """
             UPDATE participante 
-            SET nombre = %s, apellido = %s, email = %s, rol = %s
+            SET token_version = token_version + (rol <> %s OR email <> %s),
+                nombre = %s, apellido = %s, email = %s, rol = %s
             WHERE id_participante = %s
         """
-        execute_query(query, (p.nombre, p.apellido, p.email, p.rol, id))
-        
-        participante_actualizado = fetch_all("SELECT * FROM participante WHERE id_participante = %s", (id,))
-        return participante_actualizado[0]
+        with transaction():
+            execute_query(query, (p.rol, p.email, p.nombre, p.apellido, p.email, p.rol, id))
+            if result[0]["rol"] != p.rol:
+                # los agregados de sus reservas tienen el rol anterior
+                encolar_fechas_de_participante(id)
+            invalidar_reportes()
+            invalidar_usuario(result[0]["email"], p.email)
+
+            participante_actualizado = fetch_all("SELECT * FROM participante WHERE id_participante = %s", (id,))
+            act = participante_actualizado[0]
+            al_confirmar(lambda: tabla_versiones.actualizar(id, act["token_version"], act["activo"]))
+        return act
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
     
@@ -74,8 +107,11 @@ def eliminar_participante(id: int):
         if not result:
             raise HTTPException(status_code=404, detail="Participante no encontrado")
         
-        query = "UPDATE participante SET activo = FALSE WHERE id_participante = %s"
+        query = "UPDATE participante SET activo = FALSE, token_version = token_version + 1 WHERE id_participante = %s"
         execute_query(query, (id,))
+        invalidar_reportes()
+        invalidar_usuario(result[0]["email"])
+        al_confirmar(lambda: tabla_versiones.actualizar(id, result[0]["token_version"] + 1, False))
         
         return {"message": "Participante desactivado exitosamente"}
     except Exception as e:
@@ -1,14 +1,19 @@
 from fastapi import HTTPException
-from db import execute_query, fetch_all
+from db import execute_query, fetch_all, transaction, al_confirmar
 from models.reserva_model import ReservaUpdate, ReservaResponse
+from services.paginacion import paginar
+from services.rollup_service import encolar_fechas
+from services.analitica_service import foto as foto_analitica
+from services.ocupacion_service import ocupar_turnos, liberar_turnos, sincronizar_turnos
 from services.validaciones import (
-    validar_participante_sin_sancion,
-    validar_limite_horas_diarias,
     validar_limite_reservas_semanales,
-    validar_unica_reserva_en_horario
+    validar_unica_reserva_en_horario,
+    validar_reserva,
+    validar_participantes_reserva,
+    validar_turno_no_terminado
 )
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import date
 
 class ReservaCreateConParticipantes(BaseModel):
@@ -20,78 +25,97 @@ class ReservaCreateConParticipantes(BaseModel):
 
 def crear_reserva(r: ReservaCreateConParticipantes, creado_por: int):
     try:
-        validar_participante_sin_sancion(creado_por)
-        
-        horas = r.end_turn_id - r.start_turn_id + 1
-        validar_limite_horas_diarias(creado_por, r.fecha, horas, r.id_sala)
-        validar_limite_reservas_semanales(creado_por, r.fecha, r.id_sala)
-        validar_unica_reserva_en_horario(creado_por, r.fecha, r.start_turn_id, r.end_turn_id)
-
-        sala = fetch_all("SELECT capacidad, tipo FROM sala WHERE id_sala = %s", (r.id_sala,))
-        if not sala:
-            raise HTTPException(status_code=404, detail="Sala no encontrada")
-        
-        sala_info = sala[0]
-        tipo_sala = sala_info["tipo"]
-        capacidad = sala_info["capacidad"]
-
-        if len(r.participantes) > capacidad:
-            raise HTTPException(status_code=400, detail="Excede capacidad de sala")
-
-        creador = fetch_all("SELECT rol FROM participante WHERE id_participante = %s", (creado_por,))
-        if not creador:
-            raise HTTPException(status_code=404, detail="Usuario creador no encontrado")
-
-        tipo_creador = creador[0]["rol"]
-        if tipo_creador == "admin":
-            pass  # los admins pueden reservar cualquier sala
-        else:
-            if tipo_sala == "posgrado" and tipo_creador != "alumno_posgrado" and tipo_creador != "docente":
-                raise HTTPException(status_code=403, detail="Solo docentes o estudiantes de posgrado pueden reservar esta sala")
-
-            if tipo_sala == "docente" and tipo_creador != "docente":
-                print("Tipo sala docente y creador no es docente")
-                raise HTTPException(status_code=403, detail="Solo docentes pueden reservar esta sala")
-
-            if tipo_sala == "libre" and tipo_creador not in ("alumno_grado", "alumno_posgrado", "docente"):
-                raise HTTPException(status_code=403, detail="Solo docentes o estudiantes pueden reservar esta sala")
+        # una sola consulta trae sala, rol, sanciones, horas, cupo semanal y
+        # superposiciones; las reglas se evalúan en Python
+        ctx = validar_reserva(
+            creado_por, r.id_sala, r.fecha, r.start_turn_id, r.end_turn_id,
+            len(r.participantes)
+        )
 
-        query = """
-            INSERT INTO reserva (id_sala, fecha, start_turn_id, end_turn_id, creado_por)
-            VALUES (%s, %s, %s, %s, %s)
-        """
-        execute_query(query, (r.id_sala, r.fecha, r.start_turn_id, r.end_turn_id, creado_por))
-        # obtener id de la reserva creada
-        row = fetch_all(
-            "SELECT id_reserva FROM reserva WHERE id_sala = %s AND fecha = %s AND start_turn_id = %s AND end_turn_id = %s AND creado_por = %s ORDER BY id_reserva DESC LIMIT 1",
-            (r.id_sala, r.fecha, r.start_turn_id, r.end_turn_id, creado_por)
+        # el resto del grupo se valida de una vez, no al confirmar uno por uno
+        invitados = [p for p in r.participantes if p != creado_por]
+        reporte = validar_participantes_reserva(
+            invitados, ctx["tipo_sala"], r.fecha, r.start_turn_id, r.end_turn_id
         )
-        if not row:
-            raise HTTPException(status_code=500, detail="No se pudo obtener el id de la reserva creada")
-        id_reserva = row[0]["id_reserva"]
-        for id_part in r.participantes:
-            estado = 'confirmada' if id_part == creado_por else 'pendiente'
+        if reporte:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "message": "Hay participantes que no pueden sumarse a la reserva",
+                    "participantes": reporte
+                }
+            )
+
+        # toda la creación es una sola transacción: si algo falla no quedan
+        # reservas sin participantes
+        with transaction() as tx:
             query = """
-                INSERT INTO reserva_participante (id_reserva, id_participante, estado_participacion)
-                VALUES (%s, %s, %s)
+                INSERT INTO reserva (id_sala, fecha, start_turn_id, end_turn_id, creado_por)
+                VALUES (%s, %s, %s, %s, %s)
             """
-            execute_query(query, (id_reserva, id_part, estado))
-        
-        # verificacion para reservas de un solo participante    
-        verificar_todos_confirmaron(id_reserva)
-        return {"message": "Reserva creada", "id_reserva": id_reserva}
+            id_reserva = tx.execute_query(query, (r.id_sala, r.fecha, r.start_turn_id, r.end_turn_id, creado_por))
+            if not id_reserva:
+                raise HTTPException(status_code=500, detail="No se pudo obtener el id de la reserva creada")
+            # la UNIQUE KEY de sala_turno_ocupado rechaza la doble reserva
+            ocupar_turnos(id_reserva, r.id_sala, r.fecha, r.start_turn_id, r.end_turn_id)
+            insertar_participantes(tx, id_reserva, [
+                (id_part, 'confirmada' if id_part == creado_por else 'pendiente')
+                for id_part in dict.fromkeys(r.participantes)
+            ])
+
+            # verificacion para reservas de un solo participante
+            verificar_todos_confirmaron(id_reserva)
+            encolar_fechas(r.fecha)
+
+            # fila creada (con estado y timestamps finales), leída por PK en
+            # la misma conexión
+            creada = tx.fetch_all(
+                "SELECT * FROM reserva WHERE id_reserva = %s",
+                (id_reserva,)
+            )[0]
+        return ReservaResponse(**creada)
     
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
-def listar_reservas():
+def _filtros_reserva(alias: str, id_sala=None, desde=None, hasta=None, estado=None, creado_por=None):
+    condiciones = []
+    params = []
+    if id_sala is not None:
+        condiciones.append(f"{alias}.id_sala = %s")
+        params.append(id_sala)
+    if desde is not None:
+        condiciones.append(f"{alias}.fecha >= %s")
+        params.append(desde)
+    if hasta is not None:
+        condiciones.append(f"{alias}.fecha <= %s")
+        params.append(hasta)
+    if estado is not None:
+        condiciones.append(f"{alias}.estado = %s")
+        params.append(estado)
+    if creado_por is not None:
+        condiciones.append(f"{alias}.creado_por = %s")
+        params.append(creado_por)
+    return condiciones, params
+
+def listar_reservas(cursor: Optional[int] = None, limit: int = 100, id_sala: Optional[int] = None, desde: Optional[date] = None, hasta: Optional[date] = None, estado: Optional[str] = None, creado_por: Optional[int] = None, rol: Optional[str] = None):
     """
-    Lista todas las reservas.
+    Lista las reservas de a páginas (más nuevas primero). `rol` filtra por
+    el rol de quien creó la reserva.
     """
-    reservasListadas = fetch_all("SELECT * FROM reserva")
-    return reservasListadas
+    condiciones, params = _filtros_reserva("r", id_sala, desde, hasta, estado, creado_por)
+    query = "SELECT r.* FROM reserva r"
+    if rol is not None:
+        query += " JOIN participante p ON p.id_participante = r.creado_por"
+        condiciones.append("p.rol = %s")
+        params.append(rol)
+    return paginar(
+        query, condiciones, params,
+        columna="r.id_reserva", clave="id_reserva",
+        cursor=cursor, limit=limit, descendente=True
+    )
 
 def obtener_reserva(id_reserva: int):
     """
@@ -124,17 +148,23 @@ def eliminar_reserva(id_reserva: int, id_participante: int, rol: str):
     if not reserva_db and rol != 'admin':
         raise HTTPException(status_code=403, detail="Solo el creador puede eliminar esta reserva")
     
-    # eliminar participantes relacionados primero
-    execute_query(
-        "DELETE FROM reserva_participante WHERE id_reserva = %s",
-        (id_reserva,)
-    )
+    with transaction() as tx:
+        liberar_turnos(id_reserva)
 
-    # luego eliminar la reserva
-    execute_query(
-        "DELETE FROM reserva WHERE id_reserva = %s",
-        (id_reserva,)
-    )
+        # eliminar participantes relacionados primero
+        tx.execute_query(
+            "DELETE FROM reserva_participante WHERE id_reserva = %s",
+            (id_reserva,)
+        )
+
+        # luego eliminar la reserva
+        tx.execute_query(
+            "DELETE FROM reserva WHERE id_reserva = %s",
+            (id_reserva,)
+        )
+        encolar_fechas(reserva[0]['fecha'])
+        # un borrado no deja updated_at: avisarle a la foto de analítica
+        al_confirmar(lambda: foto_analitica.marcar_reserva(id_reserva))
     return {"message": "Reserva eliminada"}
 
 def actualizar_reserva(id_reserva: int, r: ReservaUpdate, id_participante: int, is_admin: bool):
@@ -164,6 +194,9 @@ def actualizar_reserva(id_reserva: int, r: ReservaUpdate, id_participante: int,
     nuevo_start = r.start_turn_id if r.start_turn_id is not None else reserva_db["start_turn_id"]
     nuevo_end = r.end_turn_id if r.end_turn_id is not None else reserva_db["end_turn_id"]
 
+    if any(v is not None for v in (r.fecha, r.start_turn_id, r.end_turn_id)):
+        validar_turno_no_terminado(nueva_fecha, nuevo_end)
+
     validar_unica_reserva_en_horario(
         id_participante=id_participante,
         fecha=nueva_fecha,
@@ -201,35 +234,87 @@ def actualizar_reserva(id_reserva: int, r: ReservaUpdate, id_participante: int,
    
         
 
-    if not campos:
+    if not campos and r.participantes is None:
         raise HTTPException(status_code=400, detail="No se enviaron campos para actualizar")
 
-    query = f"UPDATE reserva SET {', '.join(campos)} WHERE id_reserva = %s"
-    valores.append(id_reserva)
-
-    execute_query(query, tuple(valores))
-    
-    if r.participantes is not None:
-        # eliminar participantes actuales
-        execute_query(
-            "DELETE FROM reserva_participante WHERE id_reserva = %s",
+    with transaction() as tx:
+        if campos:
+            query = f"UPDATE reserva SET {', '.join(campos)} WHERE id_reserva = %s"
+            valores.append(id_reserva)
+            tx.execute_query(query, tuple(valores))
+
+            if any(v is not None for v in (r.id_sala, r.fecha, r.start_turn_id, r.end_turn_id, r.estado)):
+                sincronizar_turnos(
+                    id_reserva,
+                    r.id_sala if r.id_sala is not None else reserva_db["id_sala"],
+                    nueva_fecha,
+                    nuevo_start,
+                    nuevo_end,
+                    r.estado if r.estado is not None else reserva_db["estado"]
+                )
+
+        if r.participantes is not None:
+            # solo se tocan los participantes que cambian; los que siguen
+            # conservan su estado_participacion y asistencia
+            actuales = {
+                row["id_participante"] for row in tx.fetch_all(
+                    "SELECT id_participante FROM reserva_participante WHERE id_reserva = %s",
+                    (id_reserva,)
+                )
+            }
+            nuevos = list(dict.fromkeys(r.participantes))
+            quitados = actuales - set(nuevos)
+            if quitados:
+                placeholders = ", ".join(["%s"] * len(quitados))
+                tx.execute_query(
+                    f"DELETE FROM reserva_participante WHERE id_reserva = %s AND id_participante IN ({placeholders})",
+                    (id_reserva, *quitados)
+                )
+                al_confirmar(lambda: foto_analitica.marcar_reserva(id_reserva))
+
+            # los que se suman pasan por las mismas reglas y con el mismo
+            # estado inicial que al crear la reserva (el creador confirmado,
+            # el resto pendiente), con el horario y la sala que quedan
+            creador = r.creado_por if r.creado_por is not None else reserva_db["creado_por"]
+            agregados = [id_part for id_part in nuevos if id_part not in actuales]
+            invitados = [id_part for id_part in agregados if id_part != creador]
+            if invitados:
+                tipo_sala = tx.fetch_all(
+                    "SELECT tipo FROM sala WHERE id_sala = %s",
+                    (r.id_sala if r.id_sala is not None else reserva_db["id_sala"],)
+                )
+                if not tipo_sala:
+                    raise HTTPException(status_code=404, detail="Sala no encontrada")
+                reporte = validar_participantes_reserva(
+                    invitados, tipo_sala[0]["tipo"], nueva_fecha, nuevo_start, nuevo_end,
+                    exclude_reserva_id=id_reserva
+                )
+                if reporte:
+                    raise HTTPException(
+                        status_code=400,
+                        detail={
+                            "message": "Hay participantes que no pueden sumarse a la reserva",
+                            "participantes": reporte
+                        }
+                    )
+            insertar_participantes(tx, id_reserva, [
+                (id_part, 'confirmada' if id_part == creador else 'pendiente')
+                for id_part in agregados
+            ])
+            if invitados and r.estado is None:
+                # como al crear: la reserva queda activa hasta que confirmen
+                # todos (verificar_todos_confirmaron la vuelve a confirmar)
+                tx.execute_query(
+                    "UPDATE reserva SET estado = 'activa' WHERE id_reserva = %s AND estado = 'confirmada'",
+                    (id_reserva,)
+                )
+
+            verificar_todos_confirmaron(id_reserva)
+        encolar_fechas(reserva_db["fecha"], nueva_fecha)
+        reservaAct = tx.fetch_all(
+            "SELECT * FROM reserva WHERE id_reserva = %s",
             (id_reserva,)
-        )
-        # agregar nuevos participantes
-        for id_part in r.participantes:
-            estado = 'confirmada' 
-            query = """
-                INSERT INTO reserva_participante (id_reserva, id_participante, estado_participacion)
-                VALUES (%s, %s, %s)
-            """
-            execute_query(query, (id_reserva, id_part, estado)) 
-            
-        verificar_todos_confirmaron(id_reserva)
-    reservaAct = fetch_all(
-        "SELECT * FROM reserva WHERE id_reserva = %s",
-        (id_reserva,)
-    )[0]
-    
+        )[0]
 
     return reservaAct
 
@@ -255,10 +340,12 @@ def rechazar_participacion(id_reserva: int, id_participante: int):
     )
     if not asignada:
         raise HTTPException(status_code=403, detail="El participante no está asignado a esta reserva")
-    execute_query(
-        "UPDATE reserva_participante SET estado_participacion = 'rechazada' WHERE id_reserva = %s AND id_participante = %s",
-        (id_reserva,id_participante)
-    )
+    with transaction():
+        execute_query(
+            "UPDATE reserva_participante SET estado_participacion = 'rechazada' WHERE id_reserva = %s AND id_participante = %s",
+            (id_reserva,id_participante)
+        )
+        encolar_fechas(reserva_db["fecha"])
     return {"message": "Reserva rechazada"}
 
 def confirmar_participacion(id_reserva: int, id_participante: int):
@@ -294,18 +381,18 @@ def confirmar_participacion(id_reserva: int, id_participante: int):
     
     validar_limite_reservas_semanales(id_participante, reserva[0]['fecha'], reserva[0]['id_sala'])
     
-    execute_query(
-        """
-        UPDATE reserva_participante
-        SET estado_participacion = 'confirmada'
-        WHERE id_participante = %s AND id_reserva = %s
-        """,
-        (id_participante, id_reserva)
-    )
-    
-    verificar_todos_confirmaron(id_reserva)
-    
-    
+    with transaction():
+        execute_query(
+            """
+            UPDATE reserva_participante
+            SET estado_participacion = 'confirmada'
+            WHERE id_participante = %s AND id_reserva = %s
+            """,
+            (id_participante, id_reserva)
+        )
+
+        verificar_todos_confirmaron(id_reserva)
+        encolar_fechas(reserva[0]['fecha'])
     
     return {"message": "Participación confirmada"}
     
@@ -318,8 +405,9 @@ def     registrar_asistencia(id_reserva: int, id_participante: int, estado:bool)
    
     existe = fetch_all(
         """
-        SELECT * FROM reserva_participante
-        WHERE id_participante = %s AND id_reserva = %s
+        SELECT rp.*, r.fecha FROM reserva_participante rp
+        JOIN reserva r ON r.id_reserva = rp.id_reserva
+        WHERE rp.id_participante = %s AND rp.id_reserva = %s
         """,
         (id_participante, id_reserva)
     )
@@ -328,33 +416,42 @@ def     registrar_asistencia(id_reserva: int, id_participante: int, estado:bool)
     no_resgistrado = existe[0]["asistencia"] == 'no_registrado'
     if not no_resgistrado:
         raise HTTPException(status_code=409, detail="La asistencia ya fue registrada")
-    if estado == True:
-        execute_query(
-            """
-            UPDATE reserva_participante
-            SET asistencia = 'presente'
-            WHERE id_participante = %s AND id_reserva = %s
-            """,
-            (id_participante, id_reserva)
-        )
-    else:
-        execute_query(
-            """
-            UPDATE reserva_participante
-            SET asistencia = 'ausente'
-            WHERE id_participante = %s AND id_reserva = %s
-            """,
-            (id_participante, id_reserva)
-        )
+    with transaction():
+        if estado == True:
+            execute_query(
+                """
+                UPDATE reserva_participante
+                SET asistencia = 'presente'
+                WHERE id_participante = %s AND id_reserva = %s
+                """,
+                (id_participante, id_reserva)
+            )
+        else:
+            execute_query(
+                """
+                UPDATE reserva_participante
+                SET asistencia = 'ausente'
+                WHERE id_participante = %s AND id_reserva = %s
+                """,
+                (id_participante, id_reserva)
+            )
+        encolar_fechas(existe[0]["fecha"])
     
     return {"message": "Asistencia registrada"}
 
-def listar_mis_reservas(id_participante: int):
+def listar_mis_reservas(id_participante: int, cursor: Optional[int] = None, limit: int = 100, id_sala: Optional[int] = None, desde: Optional[date] = None, hasta: Optional[date] = None, estado: Optional[str] = None):
     """
     Lista las reservas de un participante.
     """
-    reservas = fetch_all("SELECT * FROM reserva_participante JOIN reserva ON reserva_participante.id_reserva = reserva.id_reserva WHERE id_participante = %s", (id_participante,))
-    return reservas
+    condiciones, params = _filtros_reserva("reserva", id_sala, desde, hasta, estado)
+    condiciones.insert(0, "reserva_participante.id_participante = %s")
+    params.insert(0, id_participante)
+    return paginar(
+        "SELECT * FROM reserva_participante JOIN reserva ON reserva_participante.id_reserva = reserva.id_reserva",
+        condiciones, params,
+        columna="reserva.id_reserva", clave="id_reserva",
+        cursor=cursor, limit=limit, descendente=True
+    )
 
 def obtener_participantes_reserva(id_reserva: int):
     """
@@ -370,6 +467,22 @@ def obtener_participantes_reserva(id_reserva: int):
     )
     return participantes
 
+def insertar_participantes(tx, id_reserva: int, filas: list):
+    """
+    Inserta todos los participantes de una reserva con un único INSERT
+    multi-fila. `filas` es una lista de (id_participante, estado_participacion).
+    """
+    if not filas:
+        return
+    placeholders = ", ".join(["(%s, %s, %s)"] * len(filas))
+    params = []
+    for id_part, estado in filas:
+        params.extend((id_reserva, id_part, estado))
+    tx.execute_query(
+        f"INSERT INTO reserva_participante (id_reserva, id_participante, estado_participacion) VALUES {placeholders}",
+        tuple(params)
+    )
+
 def verificar_todos_confirmaron(id_reserva: int):
     """
     Verifica si todos los participantes han confirmado su participación en una reserva.
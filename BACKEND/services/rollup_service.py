@@ -0,0 +1,204 @@
+import logging
+import os
+from datetime import date, timedelta
+from db import execute_query, execute_many_queries, fetch_all, transaction, al_confirmar
+from context import con_rol
+from services.cache_reportes import cache, incrementar_generacion
+from services.utilizacion_service import dias as dias_utilizacion
+
+# Mantenimiento de las tablas rollup_* (ver migrations/006). La unidad es el
+# día: los agregados de una fecha se recalculan completos (unas pocas
+# reservas, por el índice de reserva.fecha), así no hay que llevar deltas por
+# cada tipo de cambio y un recálculo siempre deja el día consistente.
+#
+# Las escrituras sobre reservas no recalculan: encolan su fecha en
+# rollup_pendiente dentro de su propia transacción (un INSERT, sin commit
+# extra ni locks sobre las tablas rollup_*) y el scheduler recalcula las
+# fechas encoladas cada ROLLUP_INTERVALO segundos. Los reportes pueden ir
+# hasta ese tiempo atrás de las reservas.
+
+logger = logging.getLogger(__name__)
+
+INTERVALO = int(os.getenv("ROLLUP_INTERVALO", 30))
+# filas de rollup_pendiente que se toman por corrida
+LOTE_PENDIENTES = int(os.getenv("ROLLUP_LOTE_PENDIENTES", 5000))
+# días máximos de un recálculo manual (/admin/rollups/recalcular)
+MAX_DIAS_MANUAL = int(os.getenv("ROLLUP_MAX_DIAS_MANUAL", 366))
+
+def recalcular_rollups(desde: date, hasta: date = None):
+    """Recalcula los agregados de las fechas entre `desde` y `hasta` (inclusive)."""
+    hasta = hasta or desde
+    rango = (desde, hasta)
+    with transaction():
+        # los reportes leen estas tablas: invalidar su caché al confirmar, la
+        # de este proceso en el momento y la de los demás por la generación
+        al_confirmar(cache.invalidar)
+        incrementar_generacion()
+        al_confirmar(lambda: dias_utilizacion.olvidar(desde, hasta))
+        execute_query("DELETE FROM rollup_reserva_dia WHERE fecha BETWEEN %s AND %s", rango)
+        execute_query(
+            """
+            INSERT INTO rollup_reserva_dia
+                (fecha, id_sala, id_turno, estado, rol_creador, n_reservas, n_turnos,
+                 n_participantes, n_confirmados, n_presentes)
+            SELECT r.fecha, r.id_sala, r.start_turn_id, r.estado, p.rol,
+                   COUNT(*), SUM(r.end_turn_id - r.start_turn_id + 1),
+                   COALESCE(SUM(x.n), 0), COALESCE(SUM(x.confirmados), 0), COALESCE(SUM(x.presentes), 0)
+            FROM reserva r
+            LEFT JOIN participante p ON p.id_participante = r.creado_por
+            LEFT JOIN (
+                SELECT rp.id_reserva, COUNT(*) AS n,
+                       SUM(rp.estado_participacion = 'confirmada') AS confirmados,
+                       SUM(rp.asistencia = 'presente') AS presentes
+                FROM reserva_participante rp
+                JOIN reserva r2 ON r2.id_reserva = rp.id_reserva
+                WHERE r2.fecha BETWEEN %s AND %s
+                GROUP BY rp.id_reserva
+            ) x ON x.id_reserva = r.id_reserva
+            WHERE r.fecha BETWEEN %s AND %s
+            GROUP BY r.fecha, r.id_sala, r.start_turn_id, r.estado, p.rol
+            """,
+            rango + rango
+        )
+
+        execute_query("DELETE FROM rollup_creador_dia WHERE fecha BETWEEN %s AND %s", rango)
+        execute_query(
+            """
+            INSERT INTO rollup_creador_dia (fecha, fecha_creacion, id_sala, creado_por, n_reservas)
+            SELECT r.fecha, DATE(r.created_at), r.id_sala, r.creado_por, COUNT(*)
+            FROM reserva r
+            WHERE r.fecha BETWEEN %s AND %s
+            AND r.creado_por IS NOT NULL
+            GROUP BY r.fecha, DATE(r.created_at), r.id_sala, r.creado_por
+            """,
+            rango
+        )
+
+        execute_query("DELETE FROM rollup_participacion_dia WHERE fecha BETWEEN %s AND %s", rango)
+        execute_query(
+            """
+            INSERT INTO rollup_participacion_dia
+                (fecha, id_sala, rol, n_participaciones, n_confirmadas, n_presentes)
+            SELECT r.fecha, r.id_sala, p.rol, COUNT(*),
+                   SUM(rp.estado_participacion = 'confirmada'), SUM(rp.asistencia = 'presente')
+            FROM reserva_participante rp
+            JOIN reserva r ON r.id_reserva = rp.id_reserva
+            JOIN participante p ON p.id_participante = rp.id_participante
+            WHERE r.fecha BETWEEN %s AND %s
+            GROUP BY r.fecha, r.id_sala, p.rol
+            """,
+            rango
+        )
+
+def recalcular_rango(desde: date, hasta: date):
+    """
+    Recalcula [desde, hasta] de a un día, una transacción por día: un rango
+    largo no deja una transacción enorme abierta ni bloquea las tablas
+    rollup_* durante todo el recálculo.
+    """
+    dias = 0
+    dia = desde
+    while dia <= hasta:
+        recalcular_rollups(dia)
+        dias += 1
+        dia += timedelta(days=1)
+    return {"success": True, "fechas": dias, "filas_actualizadas": dias}
+
+def encolar_fechas(*fechas):
+    """
+    Encola `fechas` para que el scheduler recalcule sus agregados. Se
+    inserta en la transacción actual: si la escritura hace rollback, la
+    fecha no queda encolada.
+    """
+    pendientes = sorted({f for f in fechas if f is not None})
+    if pendientes:
+        execute_many_queries(
+            "INSERT INTO rollup_pendiente (fecha) VALUES (%s)",
+            [(fecha,) for fecha in pendientes]
+        )
+
+def encolar_fechas_de_participante(id_participante: int):
+    """
+    Encola todas las fechas con reservas creadas por el participante o en las
+    que participa: los rollups guardan su rol (rol_creador y rol) tal como
+    estaba al recalcular, así que un cambio de rol tiene que rehacerlas.
+    """
+    execute_query(
+        """
+        INSERT INTO rollup_pendiente (fecha)
+        SELECT r.fecha FROM reserva r WHERE r.creado_por = %s
+        UNION
+        SELECT r.fecha
+        FROM reserva_participante rp
+        JOIN reserva r ON r.id_reserva = rp.id_reserva
+        WHERE rp.id_participante = %s
+        """,
+        (id_participante, id_participante)
+    )
+
+def recalcular_pendientes(limite: int = LOTE_PENDIENTES):
+    """
+    Recalcula las fechas encoladas en rollup_pendiente, una transacción por
+    fecha que además borra sus filas (solo las leídas: lo que se encole
+    mientras tanto queda para la próxima corrida). Si una fecha falla, sus
+    filas quedan con el error y se reintenta la próxima vez; la corrida
+    termina con success=False para que quede en job_run.
+    """
+    with con_rol("admin"):
+        filas = fetch_all(
+            "SELECT id, fecha FROM rollup_pendiente ORDER BY id LIMIT %s",
+            (limite,)
+        )
+        por_fecha = {}
+        for f in filas:
+            por_fecha.setdefault(f["fecha"], []).append(f["id"])
+
+        errores = []
+        borradas = 0
+        for fecha, ids in sorted(por_fecha.items()):
+            placeholders = ", ".join(["%s"] * len(ids))
+            try:
+                with transaction():
+                    recalcular_rollups(fecha)
+                    execute_query(f"DELETE FROM rollup_pendiente WHERE id IN ({placeholders})", tuple(ids))
+                borradas += len(ids)
+            except Exception as e:
+                logger.error(f"No se pudieron recalcular los rollups del {fecha}: {e}")
+                errores.append(f"{fecha}: {e}")
+                execute_query(
+                    f"""
+                    UPDATE rollup_pendiente
+                    SET intentos = intentos + 1, ultimo_error = %s
+                    WHERE id IN ({placeholders})
+                    """,
+                    (str(e), *ids)
+                )
+
+    return {
+        "success": not errores,
+        "error": "; ".join(errores) or None,
+        "fechas": len(por_fecha) - len(errores),
+        "filas_escaneadas": len(filas),
+        "filas_actualizadas": borradas,
+    }
+
+def estado_pendientes() -> dict:
+    """Fechas encoladas sin recalcular, con la más vieja y las que vienen fallando."""
+    resumen = fetch_all(
+        """
+        SELECT COUNT(*) AS filas, COUNT(DISTINCT fecha) AS fechas,
+               MIN(marcada_en) AS mas_vieja, COALESCE(MAX(intentos), 0) AS max_intentos
+        FROM rollup_pendiente
+        """
+    )[0]
+    fallando = fetch_all(
+        """
+        SELECT fecha, COUNT(*) AS filas, MAX(intentos) AS intentos,
+               MIN(marcada_en) AS marcada_en, MAX(ultimo_error) AS ultimo_error
+        FROM rollup_pendiente
+        WHERE intentos > 0
+        GROUP BY fecha
+        ORDER BY fecha
+        """
+    )
+    return {**resumen, "intervalo": INTERVALO, "fallando": fallando}
@@ -1,7 +1,10 @@
-from http.client import HTTPException
-from db import execute_query, fetch_all
+from fastapi import HTTPException
+from db import execute_query, fetch_all, transaction, al_confirmar
+from services.disponibilidad_service import indice, TURNOS
+from services.paginacion import paginar
 from models.sala_model import SalaCreate, SalaResponse, SalaUpdate
 from datetime import date
+from typing import Optional
 
 def crear_sala(s: SalaCreate):
     """
@@ -25,14 +28,27 @@ def crear_sala(s: SalaCreate):
         (s.id_edificio, s.nombre, s.tipo, s.capacidad)
     )
 
+    indice.invalidar_salas()
+
     return {"message": "Sala creada correctamente"}
 
-def listar_salas():
+def listar_salas(cursor: Optional[int] = None, limit: int = 100, id_edificio: Optional[int] = None, tipo: Optional[str] = None):
     """
-    Lista todas las salas.
+    Lista las salas (filtrable por edificio y tipo).
     """
-    salasListadas = fetch_all(" SELECT * FROM sala")
-    return salasListadas
+    condiciones = []
+    params = []
+    if id_edificio is not None:
+        condiciones.append("id_edificio = %s")
+        params.append(id_edificio)
+    if tipo is not None:
+        condiciones.append("tipo = %s")
+        params.append(tipo)
+    return paginar(
+        "SELECT * FROM sala", condiciones, params,
+        columna="id_sala", clave="id_sala",
+        cursor=cursor, limit=limit
+    )
 
 def obtener_sala(id_sala: int):
     """
@@ -88,6 +104,7 @@ def actualizar_sala(id_sala: int, s: SalaUpdate):
     valores.append(id_sala)
 
     execute_query(query, tuple(valores))
+    indice.invalidar_salas()
 
     sala_actualizada = fetch_all(
         "SELECT * FROM sala WHERE id_sala = %s",
@@ -106,16 +123,19 @@ def eliminar_sala(id_sala: int):
     )
     if not sala:
         raise HTTPException(404, detail="Sala no encontrada")
-    # Elimino las reservas asociadas primero
-    execute_query(
-        "DELETE FROM reserva WHERE id_sala = %s",
-        (id_sala,)
-    )
-    
-    execute_query(
-        "DELETE FROM sala WHERE id_sala = %s",
-        (id_sala,)
-    )
+    with transaction() as tx:
+        # Elimino las reservas asociadas primero
+        tx.execute_query(
+            "DELETE FROM reserva WHERE id_sala = %s",
+            (id_sala,)
+        )
+
+        tx.execute_query(
+            "DELETE FROM sala WHERE id_sala = %s",
+            (id_sala,)
+        )
+        # sala_turno_ocupado se borra en cascada con la sala
+        al_confirmar(lambda: indice.olvidar_sala(id_sala))
 
     return {"message": "Sala borrada correctamente"}
 
@@ -123,37 +143,59 @@ def listar_salas_disponibles(fecha: date, start_turn_id: int, end_turn_id: int):
     """
     Lista las salas disponibles para una fecha y horario específico.
     """
-    query = """
-        SELECT *
-        FROM sala s
-        WHERE s.id_sala NOT IN (
-            SELECT r.id_sala
-            FROM reserva r
-            WHERE r.fecha = %s
-              AND r.start_turn_id <= %s
-              AND r.end_turn_id >= %s
-        )
-    """
-    params = (fecha, end_turn_id, start_turn_id)
-    print(params)
-    salas_libres = fetch_all(query, params)
-
-    return salas_libres
+    return indice.salas_libres(fecha, start_turn_id, end_turn_id)
 
 def sala_ocupada( id_sala: int,fecha: date):
     """
     Verificar si una sala esta ocupada o va a estarlo en el correr de la fecha seleccionada
     """
-    
-    cons = """
-   SELECT *
-    FROM sala s
-    JOIN reserva r on r.id_sala = s.id_sala
-    WHERE s.id_sala = %s AND r.fecha = %s  AND r.estado IN ('activa','confirmada')
-
-   """
-    params = (id_sala, fecha)
-    
-    resultado = fetch_all(cons, params)
+    return indice.mascara(id_sala, fecha) != 0
 
-    return resultado != []
\ No newline at end of file
+def turnos_ocupados_sala(id_sala: int, fecha: date):
+    """
+    Turnos ocupados de una sala en una fecha.
+    """
+    return indice.ocupados(id_sala, fecha)
+
+MAX_DIAS_DISPONIBILIDAD = 31
+
+def disponibilidad_salas(desde: date, hasta: date, id_edificio: Optional[int] = None, tipo: Optional[str] = None, capacidad_min: Optional[int] = None):
+    """
+    Matriz salas x turnos para un rango de fechas. Para cada sala y fecha se
+    devuelve un string de 15 caracteres donde la posición i es el turno i+1:
+    '1' ocupado, '0' libre.
+    """
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="La fecha hasta debe ser posterior a desde")
+    if (hasta - desde).days + 1 > MAX_DIAS_DISPONIBILIDAD:
+        raise HTTPException(status_code=400, detail=f"El rango no puede superar {MAX_DIAS_DISPONIBILIDAD} días")
+
+    salas = [
+        sala for sala in indice.salas().values()
+        if (id_edificio is None or sala["id_edificio"] == id_edificio)
+        and (tipo is None or sala["tipo"] == tipo)
+        and (capacidad_min is None or sala["capacidad"] >= capacidad_min)
+    ]
+    mascaras = indice.mascaras_rango(desde, hasta)
+    fechas = sorted(mascaras)
+
+    def _fila(mascara):
+        return "".join("1" if mascara >> i & 1 else "0" for i in range(TURNOS))
+
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "fechas": fechas,
+        "turnos": list(range(1, TURNOS + 1)),
+        "salas": [
+            {
+                "id_sala": sala["id_sala"],
+                "nombre": sala["nombre"],
+                "id_edificio": sala["id_edificio"],
+                "tipo": sala["tipo"],
+                "capacidad": sala["capacidad"],
+                "ocupacion": [_fila(mascaras[dia].get(sala["id_sala"], 0)) for dia in fechas],
+            }
+            for sala in salas
+        ],
+    }
@@ -3,6 +3,9 @@ from api.auth import get_current_user
 from db import execute_query, fetch_all
 from models.sancion_model import SancionCreate, SancionUpdate
 from datetime import date
+from typing import Optional
+from services.paginacion import paginar
+from services.cache_reportes import invalidar_reportes
 
 from services.validaciones import (
     validar_participante_existe,
@@ -28,6 +31,7 @@ def crear_sancion(s: SancionCreate):
             query, 
             (s.id_participante, s.fecha_inicio, s.fecha_fin, s.motivo)
         )
+        invalidar_reportes()
         
         return {
             "message": "Sanción creada exitosamente",
@@ -39,22 +43,41 @@ def crear_sancion(s: SancionCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al crear sanción: {str(e)}")
     
-def listar_sanciones(id_participante: int = None, vigentes_solo: bool = False):
+def listar_sanciones(id_participante: int = None, vigentes_solo: bool = False, cursor: Optional[int] = None, limit: int = 100, desde: Optional[date] = None, hasta: Optional[date] = None, rol: Optional[str] = None):
     try:
-        query = "SELECT * FROM sancion_participante WHERE 1=1"
+        condiciones = []
         params = []
         
         if id_participante:
-            query += " AND id_participante = %s"
+            condiciones.append("s.id_participante = %s")
             params.append(id_participante)
         
         if vigentes_solo:
-            query += " AND CURDATE() BETWEEN fecha_inicio AND fecha_fin"
-        
-        query += " ORDER BY fecha_inicio DESC"
-        
-        return fetch_all(query, tuple(params) if params else None)
+            condiciones.append("CURDATE() BETWEEN s.fecha_inicio AND s.fecha_fin")
+
+        if desde is not None:
+            condiciones.append("s.fecha_fin >= %s")
+            params.append(desde)
+
+        if hasta is not None:
+            condiciones.append("s.fecha_inicio <= %s")
+            params.append(hasta)
+
+        query = "SELECT s.* FROM sancion_participante s"
+        if rol is not None:
+            query += " JOIN participante p ON p.id_participante = s.id_participante"
+            condiciones.append("p.rol = %s")
+            params.append(rol)
+        
+        # más recientes primero
+        return paginar(
+            query, condiciones, params,
+            columna="s.id_sancion", clave="id_sancion",
+            cursor=cursor, limit=limit, descendente=True
+        )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al listar sanciones: {str(e)}")
 
@@ -112,8 +135,9 @@ def actualizar_sancion(id_sancion: int, s: SancionUpdate):
         
         # ejecutar actualización
         valores.append(id_sancion)
-        query = f"UPDATE sancion SET {', '.join(campos)} WHERE id_sancion = %s"
+        query = f"UPDATE sancion_participante SET {', '.join(campos)} WHERE id_sancion = %s"
         execute_query(query, tuple(valores))
+        invalidar_reportes()
         
         return {"message": "Sanción actualizada exitosamente"}
     
@@ -129,6 +153,7 @@ def eliminar_sancion(id_sancion: int):
         
         query = "DELETE FROM sancion_participante WHERE id_sancion = %s"
         execute_query(query, (id_sancion,))
+        invalidar_reportes()
         
         return {"message": "Sanción eliminada exitosamente"}
     
@@ -1,7 +1,12 @@
-from datetime import datetime, date, timedelta;
-from db import execute_query, fetch_all;
+import os
+from datetime import datetime, date, time, timedelta;
+from db import execute_query, execute_rowcount, fetch_all, transaction;
 import logging;
-from context import userRol
+from apscheduler.triggers.combining import OrTrigger
+from apscheduler.triggers.cron import CronTrigger
+from context import con_rol
+from services.ocupacion_service import liberar_turnos_reservas
+from services.rollup_service import recalcular_rollups
 
 # Configurar logging
 logging.basicConfig(
@@ -10,154 +15,305 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DIAS_SANCION = 60  # 2 meses
+JOB_PROCESAR_RESERVAS = 'procesar_reservas'
+# días que se cierran por transacción al ponerse al día o en un backfill
+DIAS_POR_LOTE = int(os.getenv("SCHEDULER_DIAS_POR_LOTE", 1))
+
+# Las marcas son tuplas (fecha, id_turno) y se comparan como tales: una
+# reserva "termina" en (fecha, end_turn_id). Se procesan las reservas activas
+# o confirmadas que terminan en el rango (desde, hasta]. Recibe los
+# parámetros que arma _params_rango.
+CONDICION_TERMINADA = """
+    r.estado IN ('activa', 'confirmada')
+    AND r.fecha BETWEEN %s AND %s
+    AND (r.fecha > %s OR r.end_turn_id > %s)
+    AND (r.fecha < %s OR r.end_turn_id <= %s)
+"""
+
+# Solo se procesan reservas con al menos un participante. No se puede usar
+# en un UPDATE de reserva_participante (MySQL no permite leer la tabla que
+# se actualiza en una subconsulta); ahí alcanza con el JOIN.
+CON_PARTICIPANTES = """
+    EXISTS (
+        SELECT 1 FROM reserva_participante rp_any
+        WHERE rp_any.id_reserva = r.id_reserva
+    )
+"""
+
+RESERVAS_TERMINADAS = f"""
+    SELECT r.id_reserva
+    FROM reserva r
+    WHERE {CONDICION_TERMINADA}
+    AND {CON_PARTICIPANTES}
+"""
+
+SIN_PRESENTES = """
+    NOT EXISTS (
+        SELECT 1 FROM reserva_participante rp_p
+        WHERE rp_p.id_reserva = r.id_reserva AND rp_p.asistencia = 'presente'
+    )
+"""
+
+def _params_rango(desde: tuple, hasta: tuple) -> tuple:
+    return (desde[0], hasta[0], desde[0], desde[1], hasta[0], hasta[1])
+
+
+# ==================== TURNOS Y MARCA DE AGUA ====================
+
+def _a_hora(valor) -> time:
+    # mysql-connector devuelve las columnas TIME como timedelta
+    if isinstance(valor, timedelta):
+        return (datetime.min + valor).time()
+    if isinstance(valor, time):
+        return valor
+    return time.fromisoformat(str(valor))
+
+def obtener_turnos() -> list:
+    return [
+        {"id_turno": t["id_turno"], "hora_fin": _a_hora(t["hora_fin"])}
+        for t in fetch_all("SELECT id_turno, hora_fin FROM turno ORDER BY id_turno")
+    ]
+
+def ultimo_turno_terminado(ahora: datetime, turnos: list) -> tuple:
+    """Marca (fecha, id_turno) del último turno que ya terminó a esta hora."""
+    terminados = [t["id_turno"] for t in turnos if t["hora_fin"] <= ahora.time()]
+    if terminados:
+        return (ahora.date(), max(terminados))
+    ultimo = max((t["id_turno"] for t in turnos), default=0)
+    return (ahora.date() - timedelta(days=1), ultimo)
+
+def leer_marca(job: str = JOB_PROCESAR_RESERVAS):
+    filas = fetch_all(
+        "SELECT marca_fecha, marca_turno FROM job_estado WHERE job = %s",
+        (job,)
+    )
+    if not filas or filas[0]["marca_fecha"] is None:
+        return None
+    return (filas[0]["marca_fecha"], filas[0]["marca_turno"])
+
+def guardar_marca(marca: tuple, job: str = JOB_PROCESAR_RESERVAS):
+    execute_query(
+        """
+        INSERT INTO job_estado (job, marca_fecha, marca_turno)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE marca_fecha = VALUES(marca_fecha), marca_turno = VALUES(marca_turno)
+        """,
+        (job, marca[0], marca[1])
+    )
+
+def _marca_inicial(hasta: tuple, ultimo_turno: int) -> tuple:
+    # primera ejecución: arrancar justo antes de la reserva pendiente más vieja
+    filas = fetch_all(
+        "SELECT MIN(fecha) AS desde FROM reserva WHERE estado IN ('activa', 'confirmada')"
+    )
+    desde = filas[0]["desde"] if filas else None
+    if desde is None:
+        return hasta
+    return min((desde - timedelta(days=1), ultimo_turno), hasta)
+
+def _lotes(desde: tuple, hasta: tuple, dias: int, ultimo_turno: int):
+    """Parte (desde, hasta] en rangos de a lo sumo `dias` días."""
+    actual = desde
+    while actual < hasta:
+        fin = min((actual[0] + timedelta(days=max(dias, 1)), ultimo_turno), hasta)
+        yield actual, fin
+        actual = fin
+
+def trigger_fin_de_turnos():
+    """
+    Trigger que dispara el job al terminar cada turno (según hora_fin de la
+    tabla turno). Si no se pueden leer los turnos, cada hora en punto.
+    """
+    try:
+        with con_rol("admin"):
+            horas = sorted({t["hora_fin"] for t in obtener_turnos()})
+    except Exception as e:
+        logger.error(f"No se pudieron leer los turnos, se usa cada hora en punto: {e}")
+        horas = []
+    if not horas:
+        return CronTrigger(minute=0)
+    return OrTrigger([
+        CronTrigger(hour=h.hour, minute=h.minute, second=h.second)
+        for h in horas
+    ])
+
+
+# ==================== PROCESAMIENTO ====================
+
+def _procesar_rango(desde: tuple, hasta: tuple, fecha_actual: date) -> dict:
+    """
+    Cierra las reservas que terminaron en (desde, hasta]. Se ejecuta dentro
+    de la transacción de quien llama.
+    """
+    rango = _params_rango(desde, hasta)
+    fecha_fin_sancion = fecha_actual + timedelta(days=DIAS_SANCION)
+
+    escaneadas = fetch_all(
+        f"SELECT COUNT(*) AS n FROM reserva r WHERE {CONDICION_TERMINADA}",
+        rango
+    )[0]["n"]
+
+    # El orden importa: cada paso identifica las reservas por su estado, así
+    # que las reservas se cierran al final.
+
+    # 1. Sanción de 2 meses a los participantes de reservas sin ningún
+    #    presente, salvo que ya tengan una sanción vigente (una sola por
+    #    participante aunque falte a varias reservas del lote)
+    sanciones_aplicadas = execute_rowcount(
+        f"""
+        INSERT INTO sancion_participante
+            (id_participante, fecha_inicio, fecha_fin, motivo)
+        SELECT rp.id_participante, %s, %s,
+               CONCAT('No asistencia a reserva #', MIN(r.id_reserva))
+        FROM reserva r
+        JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+        WHERE {CONDICION_TERMINADA}
+        AND {SIN_PRESENTES}
+        AND NOT EXISTS (
+            SELECT 1 FROM sancion_participante s
+            WHERE s.id_participante = rp.id_participante
+            AND %s BETWEEN s.fecha_inicio AND s.fecha_fin
+        )
+        GROUP BY rp.id_participante
+        """,
+        (fecha_actual, fecha_fin_sancion, *rango, fecha_actual)
+    )
+
+    # 2. Las reservas dejan de ocupar la sala
+    liberar_turnos_reservas(RESERVAS_TERMINADAS, rango)
+
+    # 3. Asistencia: quien no se registró queda ausente (en las reservas sin
+    #    presentes eso son todos los participantes)
+    asistencias = execute_rowcount(
+        f"""
+        UPDATE reserva_participante rp
+        JOIN reserva r ON r.id_reserva = rp.id_reserva
+        SET rp.asistencia = 'ausente'
+        WHERE {CONDICION_TERMINADA}
+        AND rp.asistencia = 'no_registrado'
+        """,
+        rango
+    )
+
+    # 4. Al menos 1 persona asistió → FINALIZADA
+    finalizadas = execute_rowcount(
+        f"""
+        UPDATE reserva r
+        SET r.estado = 'finalizada'
+        WHERE {CONDICION_TERMINADA}
+        AND NOT {SIN_PRESENTES}
+        """,
+        rango
+    )
+
+    # 5. Las que quedan no tuvieron ningún presente → NO_ASISTENCIA
+    no_asistencias = execute_rowcount(
+        f"""
+        UPDATE reserva r
+        SET r.estado = 'no_asistencia'
+        WHERE {CONDICION_TERMINADA}
+        AND {CON_PARTICIPANTES}
+        """,
+        rango
+    )
+
+    # 6. Agregados de los días tocados, en la misma transacción
+    recalcular_rollups(desde[0], hasta[0])
+
+    return {
+        "finalizadas": finalizadas,
+        "no_asistencias": no_asistencias,
+        "sanciones": sanciones_aplicadas,
+        "filas_escaneadas": escaneadas,
+        "filas_actualizadas": finalizadas + no_asistencias + asistencias,
+    }
+
+def _marca_iso(marca: tuple) -> dict:
+    return {"fecha": marca[0].isoformat(), "id_turno": marca[1]}
+
+def _procesar_lotes(desde: tuple, hasta: tuple, dias_por_lote: int, ultimo_turno: int, fecha_actual: date, mover_marca: bool) -> dict:
+    totales = {"finalizadas": 0, "no_asistencias": 0, "sanciones": 0, "filas_escaneadas": 0, "filas_actualizadas": 0}
+    lotes = 0
+    for inicio, fin in _lotes(desde, hasta, dias_por_lote, ultimo_turno):
+        # cada lote es una transacción; la marca avanza en la misma, así un
+        # corte a mitad de camino retoma desde el último lote confirmado
+        with transaction():
+            parcial = _procesar_rango(inicio, fin, fecha_actual)
+            if mover_marca:
+                guardar_marca(fin)
+        for clave, valor in parcial.items():
+            totales[clave] += valor
+        lotes += 1
+        logger.info(
+            f"Lote {inicio[0]} t{inicio[1]} → {fin[0]} t{fin[1]}: "
+            f"{parcial['finalizadas']} finalizadas, {parcial['no_asistencias']} no asistencias, "
+            f"{parcial['sanciones']} sanciones"
+        )
+    totales["lotes"] = lotes
+    return totales
 
 def procesar_reservas_finalizadas():
+    """
+    Cierra las reservas que terminaron desde la última ejecución (marca de
+    agua en job_estado) hasta el último turno terminado. En régimen normal
+    corre al final de cada turno y toca solo las reservas de ese turno.
+    """
     logger.info("=== Iniciando procesamiento de reservas finalizadas ===")
-    prev_rol = None
     try:
-        # --- FORZAR rol admin para todas las operaciones DB del job ---
-        try:
-            prev_rol = userRol.get()
-        except Exception:
-            prev_rol = None
-        userRol.set("admin")
-
-        ahora = datetime.now()
-        fecha_actual = ahora.date()
-        hora_actual = ahora.hour
-        logger.info(f"Fecha: {fecha_actual}, Hora: {hora_actual}:00")
-        
-        # 1. Buscar reservas activas o confirmadas que ya finalizaron
-        query = """
-            SELECT 
-                r.id_reserva,
-                r.id_sala,
-                r.fecha,
-                r.start_turn_id,
-                r.end_turn_id,
-                t_end.hora_fin,
-                COUNT(rp.id_participante) as total_participantes,
-                SUM(CASE WHEN rp.asistencia = 'presente' THEN 1 ELSE 0 END) as asistieron
-            FROM reserva r
-            JOIN turno t_end ON r.end_turn_id = t_end.id_turno
-            JOIN reserva_participante rp ON r.id_reserva = rp.id_reserva
-            WHERE r.estado IN ('activa', 'confirmada')
-            AND (
-                (r.fecha < %s) OR 
-                (r.fecha = %s AND TIME(t_end.hora_fin) <= TIME(%s))
-            )
-            GROUP BY r.id_reserva, r.fecha, t_end.hora_fin
-        """
-        
-        hora_actual_str = f"{hora_actual:02d}:00:00"
-        reservas = fetch_all(query, (fecha_actual, fecha_actual, hora_actual_str))
-        
-        logger.info(f"Encontradas {len(reservas)} reservas para procesar")
-        
-        finalizadas = 0
-        no_asistencias = 0
-        sanciones_aplicadas = 0
-        
-        for reserva in reservas:
-            id_reserva = reserva['id_reserva']
-            total_participantes = reserva['total_participantes']
-            asistieron = reserva['asistieron'] or 0
-            
-            if asistieron > 0:
-                # Al menos 1 persona asistió → FINALIZADA
-                execute_query(
-                    "UPDATE reserva SET estado = 'finalizada' WHERE id_reserva = %s",
-                    (id_reserva,)
-                )
-                finalizadas += 1
-                logger.info(f"Reserva {id_reserva}: FINALIZADA ({asistieron}/{total_participantes} asistieron)")
-                
-                # Marcar ausentes a quienes no asistieron
-                execute_query(
-                    """UPDATE reserva_participante 
-                       SET asistencia = 'ausente' 
-                       WHERE id_reserva = %s 
-                       AND asistencia = 'no_registrado'""",
-                    (id_reserva,)
-                )
-            
-            else:
-                # NADIE asistió → NO_ASISTENCIA + SANCIÓN
-                execute_query(
-                    "UPDATE reserva SET estado = 'no_asistencia' WHERE id_reserva = %s",
-                    (id_reserva,)
-                )
-                no_asistencias += 1
-                logger.warning(f"Reserva {id_reserva}: NO_ASISTENCIA (0/{total_participantes} asistieron)")
-                
-                # Marcar todos como ausentes
-                execute_query(
-                    """UPDATE reserva_participante 
-                       SET asistencia = 'ausente' 
-                       WHERE id_reserva = %s""",
-                    (id_reserva,)
-                )
-                
-                # Aplicar sanción de 2 meses a TODOS los participantes
-                participantes = fetch_all(
-                    """SELECT DISTINCT id_participante 
-                       FROM reserva_participante 
-                       WHERE id_reserva = %s""",
-                    (id_reserva,)
-                )
-                
-                fecha_inicio_sancion = fecha_actual
-                fecha_fin_sancion = fecha_actual + timedelta(days=60)  # 2 meses
-                
-                for participante in participantes:
-                    id_participante = participante['id_participante']
-                    
-                    # Verificar si ya tiene sanción vigente para no duplicar
-                    sancion_existente = fetch_all(
-                        """SELECT id_sancion FROM sancion_participante
-                           WHERE id_participante = %s
-                           AND %s BETWEEN fecha_inicio AND fecha_fin""",
-                        (id_participante, fecha_actual)
-                    )
-                    
-                    if not sancion_existente:
-                        execute_query(
-                            """INSERT INTO sancion_participante 
-                               (id_participante, fecha_inicio, fecha_fin, motivo)
-                               VALUES (%s, %s, %s, %s)""",
-                            (
-                                id_participante,
-                                fecha_inicio_sancion,
-                                fecha_fin_sancion,
-                                f"No asistencia a reserva #{id_reserva}"
-                            )
-                        )
-                        sanciones_aplicadas += 1
-                        logger.info(f"  → Sanción aplicada al participante {id_participante}")
-        
+        with con_rol("admin"):
+            ahora = datetime.now()
+            fecha_actual = ahora.date()
+            turnos = obtener_turnos()
+            ultimo_turno = max((t["id_turno"] for t in turnos), default=0)
+            hasta = ultimo_turno_terminado(ahora, turnos)
+            desde = leer_marca() or _marca_inicial(hasta, ultimo_turno)
+            logger.info(f"Procesando desde {desde[0]} t{desde[1]} hasta {hasta[0]} t{hasta[1]}")
+
+            totales = _procesar_lotes(desde, hasta, DIAS_POR_LOTE, ultimo_turno, fecha_actual, mover_marca=True)
+            if totales["lotes"] == 0 and leer_marca() is None:
+                guardar_marca(hasta)
+
         # Resumen
         logger.info("=== RESUMEN ===")
-        logger.info(f"Reservas finalizadas: {finalizadas}")
-        logger.info(f"Reservas con no asistencia: {no_asistencias}")
-        logger.info(f"Sanciones aplicadas: {sanciones_aplicadas}")
+        logger.info(f"Reservas finalizadas: {totales['finalizadas']}")
+        logger.info(f"Reservas con no asistencia: {totales['no_asistencias']}")
+        logger.info(f"Sanciones aplicadas: {totales['sanciones']}")
         logger.info("=== Procesamiento completado ===\n")
         
         return {
             "success": True,
-            "finalizadas": finalizadas,
-            "no_asistencias": no_asistencias,
-            "sanciones": sanciones_aplicadas
+            "finalizadas": totales["finalizadas"],
+            "no_asistencias": totales["no_asistencias"],
+            "sanciones": totales["sanciones"],
+            "filas_escaneadas": totales["filas_escaneadas"],
+            "filas_actualizadas": totales["filas_actualizadas"],
+            "marca": _marca_iso(max(desde, hasta))
         }
     
     except Exception as e:
         logger.error(f"Error en procesamiento de reservas: {e}")
         return {"success": False, "error": str(e)}
-    finally:
-        # Restaurar rol anterior para no afectar otros procesos
-        if prev_rol is None:
-            try:
-                userRol.set(None)
-            except Exception:
-                pass
-        else:
-            userRol.set(prev_rol)
+
+def reprocesar_rango(desde: date, hasta: date, dias_por_lote: int = 7):
+    """
+    Backfill: vuelve a pasar por las reservas que terminaron entre `desde` y
+    `hasta` (inclusive) en lotes de `dias_por_lote` días, una transacción por
+    lote. No mueve la marca de agua; nunca procesa turnos que no terminaron.
+    """
+    logger.info(f"=== Backfill de reservas finalizadas {desde} → {hasta} ===")
+    try:
+        with con_rol("admin"):
+            ahora = datetime.now()
+            turnos = obtener_turnos()
+            ultimo_turno = max((t["id_turno"] for t in turnos), default=0)
+            inicio = (desde - timedelta(days=1), ultimo_turno)
+            fin = min((hasta, ultimo_turno), ultimo_turno_terminado(ahora, turnos))
+            totales = _procesar_lotes(inicio, fin, dias_por_lote, ultimo_turno, ahora.date(), mover_marca=False)
+
+        logger.info(f"=== Backfill completado: {totales} ===\n")
+        return {"success": True, **totales}
+
+    except Exception as e:
+        logger.error(f"Error en backfill de reservas: {e}")
+        return {"success": False, "error": str(e)}
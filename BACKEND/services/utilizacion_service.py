@@ -0,0 +1,326 @@
+import os
+import threading
+import time
+from datetime import date, timedelta
+from fastapi import HTTPException
+from db import fetch_all
+from models.reporte_model import FiltrosReporte
+from services.disponibilidad_service import TURNOS, a_fecha
+
+# Utilización de salas: turnos reservados sobre turnos disponibles (salas ×
+# TURNOS × días del período) y asientos ocupados sobre asientos ofrecidos
+# (participantes sobre capacidad de la sala en cada reserva), por sala,
+# edificio y período (día/semana/mes).
+#
+# Los datos por (fecha, sala) salen de rollup_reserva_dia y se guardan en
+# memoria por fecha, como el índice de disponibilidad: un reporte lee de la
+# base solo las fechas que no tiene o que vencieron, y después recorre el
+# rango una sola vez acumulando todos los niveles a la vez. Las fechas
+# pasadas casi no cambian y duran UTILIZACION_TTL segundos; desde hoy en
+# adelante (donde están las reservas nuevas) duran UTILIZACION_TTL_HOY. Los
+# recálculos de rollups de este proceso descartan sus fechas en el momento.
+
+TTL = float(os.getenv("UTILIZACION_TTL", 600))
+TTL_HOY = float(os.getenv("UTILIZACION_TTL_HOY", 10))
+MAX_DIAS = int(os.getenv("UTILIZACION_MAX_DIAS", 731))
+DIAS_POR_DEFECTO = 30
+
+SIN_FILTROS = FiltrosReporte()
+
+BUCKETS = {
+    "dia": lambda d: d,
+    "semana": lambda d: d - timedelta(days=d.weekday()),
+    "mes": lambda d: d.replace(day=1),
+}
+
+def _rango_fechas(desde: date, hasta: date):
+    dia = desde
+    while dia <= hasta:
+        yield dia
+        dia += timedelta(days=1)
+
+
+class DiasUtilizacion:
+    def __init__(self, ttl: float = TTL, ttl_hoy: float = TTL_HOY, max_fechas: int = MAX_DIAS):
+        self.ttl = ttl
+        self.ttl_hoy = ttl_hoy
+        self.max_fechas = max_fechas
+        self._por_fecha = {}   # fecha -> {(id_sala, rol_creador): (reservas, turnos, turnos_usados, participantes)}
+        self._cargada_en = {}  # fecha -> time.monotonic() de la carga
+        self._lock = threading.Lock()
+
+    def _leer(self, desde: date, hasta: date) -> dict:
+        filas = fetch_all(
+            """
+            SELECT fecha, id_sala, rol_creador,
+                   CAST(SUM(n_reservas) AS SIGNED) AS reservas,
+                   CAST(SUM(n_turnos) AS SIGNED) AS turnos,
+                   CAST(SUM(CASE WHEN estado <> 'no_asistencia' THEN n_turnos ELSE 0 END) AS SIGNED) AS turnos_usados,
+                   CAST(SUM(n_participantes) AS SIGNED) AS participantes
+            FROM rollup_reserva_dia
+            WHERE fecha BETWEEN %s AND %s
+            AND estado <> 'cancelada'
+            GROUP BY fecha, id_sala, rol_creador
+            """,
+            (desde, hasta)
+        )
+        por_fecha = {dia: {} for dia in _rango_fechas(desde, hasta)}
+        for f in filas:
+            por_fecha[a_fecha(f["fecha"])][(f["id_sala"], f["rol_creador"])] = (
+                f["reservas"], f["turnos"], f["turnos_usados"], f["participantes"]
+            )
+        return por_fecha
+
+    def _vencida(self, dia: date, ahora: float, hoy: date) -> bool:
+        ttl = self.ttl_hoy if dia >= hoy else self.ttl
+        return ahora - self._cargada_en.get(dia, float("-inf")) > ttl
+
+    def rango(self, desde: date, hasta: date) -> dict:
+        """{fecha: {(id_sala, rol_creador): agregados}} para el rango, leyendo solo lo vencido."""
+        ahora, hoy = time.monotonic(), date.today()
+        with self._lock:
+            vencidas = [dia for dia in _rango_fechas(desde, hasta) if self._vencida(dia, ahora, hoy)]
+        if vencidas:
+            leidas = self._leer(min(vencidas), max(vencidas))
+            with self._lock:
+                for dia, datos in leidas.items():
+                    self._por_fecha[dia] = datos
+                    self._cargada_en[dia] = ahora
+                self._descartar_viejas()
+        with self._lock:
+            return {dia: self._por_fecha.get(dia, {}) for dia in _rango_fechas(desde, hasta)}
+
+    def _descartar_viejas(self):
+        sobrantes = len(self._cargada_en) - self.max_fechas
+        if sobrantes <= 0:
+            return
+        for dia in sorted(self._cargada_en, key=self._cargada_en.get)[:sobrantes]:
+            self._cargada_en.pop(dia, None)
+            self._por_fecha.pop(dia, None)
+
+    def olvidar(self, desde, hasta=None):
+        """Descarta las fechas (recalculadas en los rollups) para que se relean."""
+        desde = a_fecha(desde)
+        hasta = a_fecha(hasta) if hasta is not None else desde
+        with self._lock:
+            for dia in _rango_fechas(desde, hasta):
+                self._cargada_en.pop(dia, None)
+                self._por_fecha.pop(dia, None)
+
+    def invalidar(self):
+        with self._lock:
+            self._por_fecha.clear()
+            self._cargada_en.clear()
+
+    def estado(self) -> dict:
+        with self._lock:
+            return {
+                "fechas_cargadas": len(self._por_fecha),
+                "ttl": self.ttl,
+                "ttl_hoy": self.ttl_hoy,
+                "max_fechas": self.max_fechas,
+            }
+
+
+dias = DiasUtilizacion()
+
+
+class _Acumulado:
+    __slots__ = ("reservas", "turnos", "turnos_usados", "participantes", "asientos")
+
+    def __init__(self):
+        self.reservas = self.turnos = self.turnos_usados = self.participantes = self.asientos = 0
+
+    def sumar(self, reservas, turnos, turnos_usados, participantes, capacidad):
+        self.reservas += reservas
+        self.turnos += turnos
+        self.turnos_usados += turnos_usados
+        self.participantes += participantes
+        self.asientos += reservas * capacidad
+
+    def resultado(self, turnos_disponibles: int) -> dict:
+        return {
+            "reservas": self.reservas,
+            "turnos_reservados": self.turnos,
+            "turnos_usados": self.turnos_usados,
+            "turnos_disponibles": turnos_disponibles,
+            "utilizacion": _tasa(self.turnos, turnos_disponibles),
+            "utilizacion_efectiva": _tasa(self.turnos_usados, turnos_disponibles),
+            "utilizacion_asientos": _tasa(self.participantes, self.asientos),
+        }
+
+def _tasa(numerador, denominador):
+    return round(numerador / denominador, 4) if denominador else None
+
+def _periodo(filtros: FiltrosReporte):
+    hasta = filtros.hasta or date.today()
+    desde = filtros.desde or hasta - timedelta(days=DIAS_POR_DEFECTO - 1)
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="desde debe ser anterior o igual a hasta")
+    if (hasta - desde).days + 1 > MAX_DIAS:
+        raise HTTPException(status_code=400, detail=f"El período no puede superar {MAX_DIAS} días")
+    return desde, hasta
+
+def _salas(filtros: FiltrosReporte) -> dict:
+    condiciones, params = [], []
+    if filtros.id_edificio is not None:
+        condiciones.append("s.id_edificio = %s")
+        params.append(filtros.id_edificio)
+    if filtros.tipo is not None:
+        condiciones.append("s.tipo = %s")
+        params.append(filtros.tipo)
+    where = ("WHERE " + " AND ".join(condiciones)) if condiciones else ""
+    filas = fetch_all(
+        f"""
+        SELECT s.id_sala, s.nombre, s.capacidad, s.id_edificio, e.nombre AS edificio
+        FROM sala s
+        JOIN edificio e ON e.id_edificio = s.id_edificio
+        {where}
+        ORDER BY s.id_sala
+        """,
+        params
+    )
+    return {f["id_sala"]: f for f in filas}
+
+def utilizacion_edificios(filtros: FiltrosReporte = SIN_FILTROS) -> list:
+    """
+    Solo el nivel edificio de `utilizacion`, con un único GROUP BY sobre
+    rollup_reserva_dia: no carga ni guarda fechas en memoria, así un reporte
+    que solo quiere los totales por edificio no llena la caché por fecha.
+    """
+    desde, hasta = _periodo(filtros)
+    n_dias = (hasta - desde).days + 1
+    salas = _salas(filtros)
+
+    condiciones = ["x.fecha BETWEEN %s AND %s", "x.estado <> 'cancelada'"]
+    params = [desde, hasta]
+    if filtros.rol is not None:
+        condiciones.append("x.rol_creador = %s")
+        params.append(filtros.rol)
+    if filtros.id_edificio is not None:
+        condiciones.append("s.id_edificio = %s")
+        params.append(filtros.id_edificio)
+    if filtros.tipo is not None:
+        condiciones.append("s.tipo = %s")
+        params.append(filtros.tipo)
+    filas = fetch_all(
+        f"""
+        SELECT s.id_edificio,
+               CAST(SUM(x.n_reservas) AS SIGNED) AS reservas,
+               CAST(SUM(x.n_turnos) AS SIGNED) AS turnos,
+               CAST(SUM(CASE WHEN x.estado <> 'no_asistencia' THEN x.n_turnos ELSE 0 END) AS SIGNED) AS turnos_usados,
+               CAST(SUM(x.n_participantes) AS SIGNED) AS participantes,
+               CAST(SUM(x.n_reservas * s.capacidad) AS SIGNED) AS asientos
+        FROM rollup_reserva_dia x
+        JOIN sala s ON s.id_sala = x.id_sala
+        WHERE {" AND ".join(condiciones)}
+        GROUP BY s.id_edificio
+        """,
+        params
+    )
+
+    por_edificio = {}
+    for sala in salas.values():
+        edificio = por_edificio.setdefault(
+            sala["id_edificio"], {"nombre": sala["edificio"], "salas": 0, "acumulado": _Acumulado()}
+        )
+        edificio["salas"] += 1
+    for f in filas:
+        edificio = por_edificio.get(f["id_edificio"])
+        if edificio is None:
+            continue
+        acumulado = edificio["acumulado"]
+        acumulado.reservas = f["reservas"]
+        acumulado.turnos = f["turnos"]
+        acumulado.turnos_usados = f["turnos_usados"]
+        acumulado.participantes = f["participantes"]
+        acumulado.asientos = f["asientos"]
+
+    return [
+        {
+            "id_edificio": id_edificio,
+            "nombre": e["nombre"],
+            "salas": e["salas"],
+            **e["acumulado"].resultado(e["salas"] * TURNOS * n_dias),
+        }
+        for id_edificio, e in por_edificio.items()
+    ]
+
+def utilizacion(agrupar: str = "semana", filtros: FiltrosReporte = SIN_FILTROS):
+    """
+    Utilización por sala, por edificio, por período (`agrupar`: dia, semana
+    o mes) y total. Sin desde/hasta se usan los últimos 30 días. El rol
+    filtra las reservas por quien las creó; los turnos disponibles no
+    dependen del rol.
+    """
+    if agrupar not in BUCKETS:
+        raise HTTPException(status_code=400, detail=f"agrupar debe ser uno de: {', '.join(BUCKETS)}")
+    desde, hasta = _periodo(filtros)
+    bucket_de = BUCKETS[agrupar]
+    salas = _salas(filtros)
+    datos = dias.rango(desde, hasta)
+
+    por_sala = {id_sala: _Acumulado() for id_sala in salas}
+    por_edificio = {s["id_edificio"]: _Acumulado() for s in salas.values()}
+    por_bucket = {}
+    dias_bucket = {}
+    total = _Acumulado()
+
+    # una sola pasada por el rango acumulando todos los niveles
+    for dia, filas in datos.items():
+        bucket = bucket_de(dia)
+        acumulado_bucket = por_bucket.get(bucket)
+        if acumulado_bucket is None:
+            acumulado_bucket = por_bucket[bucket] = _Acumulado()
+        dias_bucket[bucket] = dias_bucket.get(bucket, 0) + 1
+        for (id_sala, rol), valores in filas.items():
+            sala = salas.get(id_sala)
+            if sala is None or (filtros.rol is not None and rol != filtros.rol):
+                continue
+            capacidad = sala["capacidad"]
+            por_sala[id_sala].sumar(*valores, capacidad)
+            por_edificio[sala["id_edificio"]].sumar(*valores, capacidad)
+            acumulado_bucket.sumar(*valores, capacidad)
+            total.sumar(*valores, capacidad)
+
+    n_dias = len(datos)
+    salas_por_edificio = {}
+    for s in salas.values():
+        salas_por_edificio[s["id_edificio"]] = salas_por_edificio.get(s["id_edificio"], 0) + 1
+    nombres_edificio = {s["id_edificio"]: s["edificio"] for s in salas.values()}
+
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "agrupar": agrupar,
+        "dias": n_dias,
+        "turnos_por_dia": TURNOS,
+        "total": {"salas": len(salas), **total.resultado(len(salas) * TURNOS * n_dias)},
+        "edificios": [
+            {
+                "id_edificio": id_edificio,
+                "nombre": nombres_edificio[id_edificio],
+                "salas": salas_por_edificio[id_edificio],
+                **acumulado.resultado(salas_por_edificio[id_edificio] * TURNOS * n_dias),
+            }
+            for id_edificio, acumulado in por_edificio.items()
+        ],
+        "salas": [
+            {
+                "id_sala": id_sala,
+                "nombre": salas[id_sala]["nombre"],
+                "id_edificio": salas[id_sala]["id_edificio"],
+                "capacidad": salas[id_sala]["capacidad"],
+                **acumulado.resultado(TURNOS * n_dias),
+            }
+            for id_sala, acumulado in por_sala.items()
+        ],
+        "periodos": [
+            {
+                "desde": bucket,
+                "dias": dias_bucket[bucket],
+                **acumulado.resultado(len(salas) * TURNOS * dias_bucket[bucket]),
+            }
+            for bucket, acumulado in por_bucket.items()
+        ],
+    }
@@ -152,11 +152,10 @@ def validar_limite_reservas_semanales(ci_participante: int, fecha_reserva: date,
 def validar_disponibilidad_sala(id_sala: int, fecha: date, start_turn_id: int, end_turn_id: int):
     query = """
         SELECT COUNT(*) AS total
-        FROM reserva
+        FROM sala_turno_ocupado
         WHERE id_sala = %s
           AND fecha = %s
-          AND NOT (end_turn_id < %s OR start_turn_id > %s)
-          AND estado IN ('activa', 'confirmada')
+          AND id_turno BETWEEN %s AND %s
     """
     resultado = fetch_all(query, (id_sala, fecha, start_turn_id, end_turn_id))
     if resultado[0]["total"] > 0:
@@ -247,3 +246,229 @@ def validar_unica_reserva_en_horario(id_participante: int, fecha: date, start_tu
             status_code=400,
             detail="El participante ya tiene una reserva que se superpone en turno y fecha."
         )
+
+
+# ==================== VALIDACIÓN CONSOLIDADA DE RESERVAS ====================
+
+def _limites_semana(fecha: date):
+    inicio_semana = fecha - timedelta(days=fecha.weekday())  # lunes=0
+    return inicio_semana, inicio_semana + timedelta(days=6)
+
+def _exento_de_limites(tipo_sala: str, rol: str) -> bool:
+    """
+    Los límites diario y semanal no aplican cuando la sala es exclusiva y el
+    participante tiene el rol correspondiente (docente en sala docente,
+    posgrado en sala de posgrado).
+    """
+    if tipo_sala == 'docente' and rol == 'docente':
+        return True
+    if tipo_sala == 'posgrado' and rol == 'alumno_posgrado':
+        return True
+    return False
+
+def obtener_contexto_reserva(id_participante: int, id_sala: int, fecha: date, start_turn_id: int, end_turn_id: int, exclude_reserva_id: int = None):
+    """
+    Trae en una sola consulta todo lo que hace falta para validar una reserva:
+    datos de la sala, rol del creador, fin del último turno, sanciones
+    vigentes, horas ya reservadas en el día, participaciones confirmadas en la
+    semana y reservas superpuestas.
+    """
+    inicio_semana, fin_semana = _limites_semana(fecha)
+    exclude = exclude_reserva_id or 0
+
+    query = """
+        SELECT
+            s.id_sala,
+            s.tipo AS tipo_sala,
+            s.capacidad,
+            p.id_participante,
+            p.rol,
+            (SELECT TIMESTAMP(%s, t.hora_fin)
+               FROM turno t
+              WHERE t.id_turno = %s) AS fin_reserva,
+            (SELECT COUNT(*)
+               FROM sancion_participante sp
+              WHERE sp.id_participante = p.id_participante
+                AND CURDATE() BETWEEN sp.fecha_inicio AND sp.fecha_fin) AS sanciones_vigentes,
+            (SELECT COALESCE(SUM(r.end_turn_id - r.start_turn_id + 1), 0)
+               FROM reserva r
+               JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+              WHERE rp.id_participante = p.id_participante
+                AND r.fecha = %s
+                AND r.estado IN ('activa', 'confirmada')
+                AND r.id_reserva != %s) AS horas_reservadas,
+            (SELECT COUNT(*)
+               FROM reserva r
+               JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+              WHERE rp.id_participante = p.id_participante
+                AND r.fecha BETWEEN %s AND %s
+                AND rp.estado_participacion = 'confirmada'
+                AND r.estado IN ('activa', 'confirmada')
+                AND r.id_reserva != %s) AS confirmadas_semana,
+            (SELECT COUNT(*)
+               FROM reserva r
+               JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+              WHERE rp.id_participante = p.id_participante
+                AND r.fecha = %s
+                AND r.estado IN ('activa', 'confirmada')
+                AND NOT (r.end_turn_id < %s OR r.start_turn_id > %s)
+                AND r.id_reserva != %s) AS superpuestas
+        FROM (SELECT 1) AS base
+        LEFT JOIN sala s ON s.id_sala = %s
+        LEFT JOIN participante p ON p.id_participante = %s
+    """
+    params = (
+        fecha, end_turn_id,
+        fecha, exclude,
+        inicio_semana, fin_semana, exclude,
+        fecha, start_turn_id, end_turn_id, exclude,
+        id_sala, id_participante,
+    )
+    return fetch_all(query, params)[0]
+
+def validar_reserva(id_participante: int, id_sala: int, fecha: date, start_turn_id: int, end_turn_id: int, cantidad_participantes: int, exclude_reserva_id: int = None):
+    """
+    Aplica todas las reglas de creación de reserva a partir de
+    obtener_contexto_reserva. Lanza los mismos HTTPException (y en el mismo
+    orden) que las validaciones individuales. Devuelve el contexto.
+    """
+    ctx = obtener_contexto_reserva(id_participante, id_sala, fecha, start_turn_id, end_turn_id, exclude_reserva_id)
+    tipo_sala = ctx["tipo_sala"]
+    rol = ctx["rol"]
+    exento = _exento_de_limites(tipo_sala, rol)
+
+    _validar_fin_futuro(ctx["fin_reserva"])
+
+    if ctx["sanciones_vigentes"] > 0:
+        raise HTTPException(status_code=400, detail="El participante tiene una sanción vigente")
+
+    horas = end_turn_id - start_turn_id + 1
+    if not exento and ctx["horas_reservadas"] + horas > 2:
+        raise HTTPException(status_code=400, detail="Excede el límite diario de 2 horas en salas libres")
+
+    if not exento and ctx["confirmadas_semana"] >= 3:
+        raise HTTPException(status_code=400, detail="Ya tiene 3 participaciones confirmadas en esta semana")
+
+    if ctx["superpuestas"] > 0:
+        raise HTTPException(
+            status_code=400,
+            detail="El participante ya tiene una reserva que se superpone en turno y fecha."
+        )
+
+    if ctx["id_sala"] is None:
+        raise HTTPException(status_code=404, detail="Sala no encontrada")
+
+    if cantidad_participantes > ctx["capacidad"]:
+        raise HTTPException(status_code=400, detail="Excede capacidad de sala")
+
+    if ctx["id_participante"] is None:
+        raise HTTPException(status_code=404, detail="Usuario creador no encontrado")
+
+    validar_rol_para_sala(tipo_sala, rol)
+    return ctx
+
+def _validar_fin_futuro(fin_reserva: datetime):
+    # el cierre de reservas (scheduler_service) avanza una marca de agua hasta
+    # el último turno terminado: una reserva que ya terminó quedaría detrás de
+    # la marca y no se cerraría nunca
+    if fin_reserva is not None and fin_reserva <= datetime.now():
+        raise HTTPException(status_code=400, detail="El turno ya terminó: no se puede reservar en el pasado")
+
+def validar_turno_no_terminado(fecha: date, end_turn_id: int):
+    """Rechaza una reserva (o un cambio de horario) cuyo último turno ya terminó."""
+    filas = fetch_all(
+        "SELECT TIMESTAMP(%s, hora_fin) AS fin_reserva FROM turno WHERE id_turno = %s",
+        (fecha, end_turn_id)
+    )
+    _validar_fin_futuro(filas[0]["fin_reserva"] if filas else None)
+
+def validar_rol_para_sala(tipo_sala: str, rol: str):
+    if rol == "admin":
+        return  # los admins pueden reservar cualquier sala
+
+    if tipo_sala == "posgrado" and rol != "alumno_posgrado" and rol != "docente":
+        raise HTTPException(status_code=403, detail="Solo docentes o estudiantes de posgrado pueden reservar esta sala")
+
+    if tipo_sala == "docente" and rol != "docente":
+        raise HTTPException(status_code=403, detail="Solo docentes pueden reservar esta sala")
+
+    if tipo_sala == "libre" and rol not in ("alumno_grado", "alumno_posgrado", "docente"):
+        raise HTTPException(status_code=403, detail="Solo docentes o estudiantes pueden reservar esta sala")
+
+
+def obtener_cupos_participantes(ids_participantes: list, fecha: date, start_turn_id: int, end_turn_id: int, exclude_reserva_id: int = None):
+    """
+    Trae en una sola consulta, agrupada por id_participante, el estado de cada
+    participante invitado: rol, si está activo, sanciones vigentes, horas ya
+    reservadas en el día, participaciones confirmadas en la semana y reservas
+    superpuestas con el horario pedido.
+    """
+    if not ids_participantes:
+        return []
+
+    inicio_semana, fin_semana = _limites_semana(fecha)
+    placeholders = ", ".join(["%s"] * len(ids_participantes))
+    query = f"""
+        SELECT
+            p.id_participante,
+            p.rol,
+            p.activo,
+            (SELECT COUNT(*)
+               FROM sancion_participante sp
+              WHERE sp.id_participante = p.id_participante
+                AND CURDATE() BETWEEN sp.fecha_inicio AND sp.fecha_fin) AS sanciones_vigentes,
+            COALESCE(SUM(CASE WHEN r.fecha = %s
+                              THEN r.end_turn_id - r.start_turn_id + 1 END), 0) AS horas_reservadas,
+            COALESCE(SUM(CASE WHEN r.id_reserva IS NOT NULL
+                               AND rp.estado_participacion = 'confirmada'
+                              THEN 1 END), 0) AS confirmadas_semana,
+            COALESCE(SUM(CASE WHEN r.fecha = %s
+                               AND NOT (r.end_turn_id < %s OR r.start_turn_id > %s)
+                              THEN 1 END), 0) AS superpuestas
+        FROM participante p
+        LEFT JOIN reserva_participante rp ON rp.id_participante = p.id_participante
+        LEFT JOIN reserva r ON r.id_reserva = rp.id_reserva
+                           AND r.estado IN ('activa', 'confirmada')
+                           AND r.fecha BETWEEN %s AND %s
+                           AND r.id_reserva != %s
+        WHERE p.id_participante IN ({placeholders})
+        GROUP BY p.id_participante, p.rol, p.activo
+    """
+    params = (
+        fecha,
+        fecha, start_turn_id, end_turn_id,
+        inicio_semana, fin_semana, exclude_reserva_id or 0,
+        *ids_participantes,
+    )
+    return fetch_all(query, params)
+
+def validar_participantes_reserva(ids_participantes: list, tipo_sala: str, fecha: date, start_turn_id: int, end_turn_id: int, exclude_reserva_id: int = None):
+    """
+    Aplica a todos los invitados las mismas reglas que al creador (sanción,
+    límite diario, límite semanal y superposición) con una única consulta.
+    Devuelve un reporte con las violaciones de cada participante; lista vacía
+    si todos pueden sumarse.
+    """
+    ids = list(dict.fromkeys(ids_participantes))
+    cupos = {c["id_participante"]: c for c in obtener_cupos_participantes(ids, fecha, start_turn_id, end_turn_id, exclude_reserva_id)}
+    horas = end_turn_id - start_turn_id + 1
+
+    reporte = []
+    for id_participante in ids:
+        c = cupos.get(id_participante)
+        violaciones = []
+        if c is None or not c["activo"]:
+            violaciones.append("Participante no encontrado o inactivo")
+        else:
+            exento = _exento_de_limites(tipo_sala, c["rol"])
+            if c["sanciones_vigentes"] > 0:
+                violaciones.append("El participante tiene una sanción vigente")
+            if not exento and c["horas_reservadas"] + horas > 2:
+                violaciones.append("Excede el límite diario de 2 horas en salas libres")
+            if not exento and c["confirmadas_semana"] >= 3:
+                violaciones.append("Ya tiene 3 participaciones confirmadas en esta semana")
+            if c["superpuestas"] > 0:
+                violaciones.append("El participante ya tiene una reserva que se superpone en turno y fecha.")
+        if violaciones:
+            reporte.append({"id_participante": id_participante, "violaciones": violaciones})
+    return reporte
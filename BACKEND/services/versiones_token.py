@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from db import fetch_all
+from context import con_rol
+from services.cache_usuarios import resolver_usuario
+
+# Validación de tokens sin ir a la base: el JWT trae id_participante, rol y la
+# versión de token con la que se emitió, y se compara contra una tabla en
+# memoria id_participante -> (token_version, activo). La tabla se carga
+# completa una vez y después se refresca cada TOKEN_VERSIONES_REFRESCO
+# segundos leyendo solo los participantes con updated_at posterior a la
+# última lectura, así una desactivación o un cambio de rol hecho en otro
+# proceso invalida los tokens en pocos segundos. Los cambios de este proceso
+# se aplican en el momento (después del commit).
+#
+# Los tokens emitidos antes de este esquema (solo `sub`) y los participantes
+# que la tabla todavía no conoce se resuelven por email con la caché de
+# usuarios.
+
+REFRESCO = float(os.getenv("TOKEN_VERSIONES_REFRESCO", 5))
+
+
+class TablaVersiones:
+    def __init__(self, refresco: float = REFRESCO):
+        self.refresco = refresco
+        self._versiones = {}       # id_participante -> (token_version, activo)
+        self._marca = None         # NOW() de la base al empezar la última lectura
+        self._refrescada_en = 0.0
+        self._lock = threading.Lock()
+        self.refrescos = 0
+
+    def vencida(self) -> bool:
+        return self._marca is None or time.monotonic() - self._refrescada_en > self.refresco
+
+    def refrescar(self):
+        """Relee los participantes cambiados. Si otro hilo ya está refrescando, no espera."""
+        if not self._lock.acquire(blocking=self._marca is None):
+            return
+        try:
+            if not self.vencida():
+                return
+            with con_rol("login"):
+                marca = fetch_all("SELECT NOW() AS ahora")[0]["ahora"]
+                if self._marca is None:
+                    filas = fetch_all("SELECT id_participante, token_version, activo FROM participante")
+                else:
+                    filas = fetch_all(
+                        """
+                        SELECT id_participante, token_version, activo
+                        FROM participante
+                        WHERE updated_at >= %s
+                        """,
+                        (self._marca,)
+                    )
+            for f in filas:
+                self._versiones[f["id_participante"]] = (f["token_version"], bool(f["activo"]))
+            self._marca = marca
+            self._refrescada_en = time.monotonic()
+            self.refrescos += 1
+        finally:
+            self._lock.release()
+
+    def consultar(self, id_participante: int):
+        """(token_version, activo) o None si el participante no está en la tabla."""
+        return self._versiones.get(id_participante)
+
+    def actualizar(self, id_participante: int, token_version: int, activo: bool):
+        self._versiones[id_participante] = (token_version, bool(activo))
+
+    def estado(self) -> dict:
+        return {
+            "participantes": len(self._versiones),
+            "marca": self._marca,
+            "refrescos": self.refrescos,
+            "refresco": self.refresco,
+        }
+
+
+tabla_versiones = TablaVersiones()
+
+def claims_de_usuario(usuario: dict) -> dict:
+    """Claims del JWT para un participante (fila con email, id, rol y token_version)."""
+    return {
+        "sub": usuario["email"],
+        "id_participante": usuario["id_participante"],
+        "rol": usuario["rol"],
+        "ver": usuario["token_version"],
+    }
+
+def usuario_de_claims(payload: dict):
+    """
+    Resuelve el token solo con sus claims y la tabla en memoria, sin I/O.
+    Devuelve (usuario o None, resuelto); resuelto=False indica que hace falta
+    usuario_de_token (token viejo o participante desconocido).
+    """
+    id_participante = payload.get("id_participante")
+    version = payload.get("ver")
+    if id_participante is None or version is None or payload.get("rol") is None:
+        return None, False
+    estado = tabla_versiones.consultar(id_participante)
+    if estado is None:
+        return None, False
+    token_version, activo = estado
+    if not activo or token_version != version:
+        return None, True
+    return {
+        "id_participante": id_participante,
+        "email": payload.get("sub"),
+        "rol": payload["rol"],
+    }, True
+
+def usuario_de_token(payload: dict):
+    """
+    Como usuario_de_claims, pero refresca la tabla si venció y, si aun así no
+    alcanza, resuelve el email contra la base (con la caché de usuarios).
+    """
+    if tabla_versiones.vencida():
+        tabla_versiones.refrescar()
+    usuario, resuelto = usuario_de_claims(payload)
+    if resuelto:
+        return usuario
+
+    email = payload.get("sub")
+    fila = resolver_usuario(email) if email else None
+    if not fila or not fila["activo"]:
+        return None
+    version = payload.get("ver")
+    if version is not None and version != fila["token_version"]:
+        return None
+    return {
+        "id_participante": fila["id_participante"],
+        "email": fila["email"],
+        "rol": fila["rol"],
+    }
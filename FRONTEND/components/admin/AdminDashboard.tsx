@@ -2,7 +2,7 @@ import React, { useContext, useEffect, useState } from 'react';
 import { BarChart, Bar, XAxis, YAxis, Tooltip, Legend, ResponsiveContainer, PieChart, Pie, Cell } from 'recharts';
 import { Reservation, ReservationStatus } from '../../types';
 import { AppContext } from '../../App';
-import { getAllReservations, getSalasMasReservadas, getTurnosMasDemandados, getPorcentajeReservasUtilizadas, getSalasMenosUtilizadas, getParticipantesMasActivos, getReservasPorDiaSemana, getReservasPorCarreraFacultad, getReservasAsistenciasPorRol, getSancionesPorRol, getPromedioParticipantesPorSala, getDiaMasCreacionReservas, getOcupacionSalasPorEdificio } from '@/services/api';
+import { getReportesDashboard } from '@/services/api';
 
 interface AdminDashboardProps {
     reservations: Reservation[];
@@ -17,7 +17,7 @@ const StatCard: React.FC<{ title: string; value: string | number; description: s
 )
 
 export const AdminDashboard: React.FC<AdminDashboardProps> = () => {
-    const [reservations, setReservations] = useState<Reservation[]>([]);
+    const [reservasPorEstado, setReservasPorEstado] = useState<any[]>([]);
     const [porcentajeUtilizadas, setPorcentajeUtilizadas] = useState<number | null>(null);
     const [salasMas, setSalasMas] = useState<any[]>([]);
     const [salasMenos, setSalasMenos] = useState<any[]>([]);
@@ -59,55 +59,31 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = () => {
         return map[d] ?? (day.charAt(0).toUpperCase() + day.slice(1));
     };
     useEffect(() => {
-        const fetchReservations = async () => {
-            try {
-                const data = await getAllReservations();
-                setReservations(data);
-            } catch (error) {
-                console.error("Error fetching reservations:", error);
-            }
-        };
-        fetchReservations();
-
         const fetchReports = async () => {
             try {
-                const promises = [
-                    getSalasMasReservadas(5),
-                    getSalasMenosUtilizadas(5),
-                    getParticipantesMasActivos(5),
-                    getTurnosMasDemandados(),
-                    getPorcentajeReservasUtilizadas(),
-                    getReservasPorDiaSemana(),
-                    getReservasPorCarreraFacultad(),
-                    getReservasAsistenciasPorRol(),
-                    getSancionesPorRol(),
-                    getPromedioParticipantesPorSala(),
-                    getDiaMasCreacionReservas(),
-                    getOcupacionSalasPorEdificio(),
-                ];
-
-                const settled = await Promise.allSettled(promises);
-
+                const dashboard = await getReportesDashboard(5);
+                const reportes = dashboard?.reportes || {};
 
-                const val = (i: number) => {
-                    const r = settled[i];
-                    if (r.status === 'fulfilled') return r.value;
-                    console.error(`[reportes] request ${i} failed:`, r);
+                const val = (nombre: string) => {
+                    const r = reportes[nombre];
+                    if (r && r.ok) return r.datos;
+                    console.error(`[reportes] ${nombre} failed:`, r);
                     return null;
                 };
 
-                const salas = val(0);
-                const menos = val(1);
-                const participantes = val(2);
-                const turnos = val(3);
-                const porcentaje = val(4);
-                const dias = val(5);
-                const porCarrera = val(6);
-                const asistencias = val(7);
-                const sanciones = val(8);
-                const promedios = val(9);
-                let diaMas = val(10);
-                const ocupacion = val(11);
+                const salas = val('salasMasReservadas');
+                const menos = val('salasMenosUtilizadas');
+                const participantes = val('participantesMasActivos');
+                const turnos = val('turnosMasDemandados');
+                const porcentaje = val('porcentajeReservasUtilizadas');
+                const porEstado = val('reservasPorEstado');
+                const dias = val('reservasPorDiaSemana');
+                const porCarrera = val('reservasPorCarreraFacultad');
+                const asistencias = val('reservasAsistenciasPorRol');
+                const sanciones = val('sancionesPorRol');
+                const promedios = val('promedioParticipantesPorSala');
+                let diaMas = val('diaConMasCreacionesReservas');
+                const ocupacion = val('ocupacionSalasPorEdificio');
 
                 if (Array.isArray(diaMas) && diaMas.length > 0) diaMas = diaMas[0];
 
@@ -115,6 +91,7 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = () => {
                 setSalasMenos(menos || []);
                 setParticipantesActivos(participantes || []);
                 setTurnosDemandados(turnos || []);
+                setReservasPorEstado(porEstado || []);
                 const pct = Array.isArray(porcentaje) ? (porcentaje[0] && (porcentaje[0].porcentaje ?? porcentaje[0].porcentaje)) : (porcentaje && (porcentaje.porcentaje ?? porcentaje));
                 setPorcentajeUtilizadas(typeof pct === 'number' ? pct : (typeof pct === 'string' ? parseFloat(pct) : null));
                 setReservasPorDia(dias || []);
@@ -150,9 +127,11 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = () => {
         fetchReports();
     }, []);
 
-    const totalReservations = reservations.length;
-    const activeReservations = reservations.filter(r => r.estado === ReservationStatus.ACTIVA && r.fecha === new Date().toISOString().split('T')[0]).length;
-    const noShowRate = totalReservations > 0 ? ((reservations.filter(r => r.estado === ReservationStatus.NO_ASISTENCIA).length / totalReservations) * 100).toFixed(1) : "0.0";
+    // conteos calculados en el servidor (reporte reservas_por_estado)
+    const countByStatus = (estado: ReservationStatus) => Number(reservasPorEstado.find(r => r.estado === estado)?.reservas ?? 0);
+    const totalReservations = reservasPorEstado.reduce((total, r) => total + Number(r.reservas ?? 0), 0);
+    const activeReservations = Number(reservasPorEstado.find(r => r.estado === ReservationStatus.ACTIVA)?.reservasHoy ?? 0);
+    const noShowRate = totalReservations > 0 ? ((countByStatus(ReservationStatus.NO_ASISTENCIA) / totalReservations) * 100).toFixed(1) : "0.0";
 
     useEffect(() => {
         let turnos=[];    
@@ -179,15 +158,14 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = () => {
 
     const statusData = [
         { name: 'Activas', value: activeReservations },
-        { name: 'Finalizadas', value: reservations.filter(r => r.estado === ReservationStatus.FINALIZADA).length },
-        { name: 'Sin Asistencia', value: reservations.filter(r => r.estado === ReservationStatus.NO_ASISTENCIA).length },
-        { name: 'Canceladas', value: reservations.filter(r => r.estado === ReservationStatus.CANCELADA).length },
+        { name: 'Finalizadas', value: countByStatus(ReservationStatus.FINALIZADA) },
+        { name: 'Sin Asistencia', value: countByStatus(ReservationStatus.NO_ASISTENCIA) },
+        { name: 'Canceladas', value: countByStatus(ReservationStatus.CANCELADA) },
     ];
     const COLORS = ['#3b82f6', '#16a34a', '#ef4444', '#6b7280'];
 
 
-    const ocupacionTotal = ocupacionPorEdificio.reduce((s, e) => s + Number(e.reservas ?? e.cantidad ?? 0), 0);
-    const ocupacionSorted = [...ocupacionPorEdificio].sort((a, b) => (Number(b.reservas ?? b.cantidad ?? 0) - Number(a.reservas ?? a.cantidad ?? 0)));
+    const ocupacionSorted = [...ocupacionPorEdificio].sort((a, b) => (Number(b.porcentajeOcupacion ?? 0) - Number(a.porcentajeOcupacion ?? 0)));
 
     return (
         <div className="space-y-6">
@@ -311,8 +289,9 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = () => {
                     <h3 className="text-sm font-medium text-gray-500">Ocupación de Salas por Edificio</h3>
                     <ul className="mt-3 text-sm space-y-2">
                         {ocupacionSorted.map((e, i) => {
-                            const count = Number(e.reservas ?? e.cantidad ?? 0);
-                            const pct = ocupacionTotal > 0 ? ((count / ocupacionTotal) * 100) : 0;
+                            const count = Number(e.reservas ?? 0);
+                            // turnos reservados sobre turnos disponibles del edificio (últimos 30 días)
+                            const pct = Number(e.porcentajeOcupacion ?? 0);
                             return (
                                 <li key={i} className="py-1">
                                     <div className="flex justify-between items-center">
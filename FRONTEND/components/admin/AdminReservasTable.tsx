@@ -4,7 +4,7 @@ import { EditReservationModal } from "./EditReservationModal";
 import { AppContext } from "../../App";
 import {
   deleteReservation,
-  getAllReservations,
+  getReservationsPage,
   updateReservation,
 } from "../../services/api";
 import {
@@ -48,18 +48,22 @@ export const AdminReservasTable: React.FC<AdminReservasTableProps> = () => {
   const [reservations, setReservations] = useState<Reservation[]>([]);
   const { users, rooms, timeSlots } = appContext || {};
   const [isLoading, setIsLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
+
+  const fetchReservations = async (cursor: number | null = null) => {
+    try {
+      setIsLoading(true);
+      const page = await getReservationsPage(cursor);
+      setReservations((prev) => (cursor == null ? page.items : [...prev, ...page.items]));
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error("Error fetching reservations:", error);
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
   useEffect(() => {
-    const fetchReservations = async () => {
-      try {
-        setIsLoading(true);
-        const data = await getAllReservations();
-        setReservations(data);
-      } catch (error) {
-        console.error("Error fetching reservations:", error);
-      } finally {
-        setIsLoading(false);
-      }
-    };
     fetchReservations();
   }, []);
 
@@ -200,7 +204,7 @@ export const AdminReservasTable: React.FC<AdminReservasTableProps> = () => {
       alert(`Error al guardar la reserva: ${error.message}`);
     }
   };
-  if (isLoading) {
+  if (isLoading && reservations.length === 0) {
     return <Loader />;
   }
 
@@ -406,6 +410,17 @@ export const AdminReservasTable: React.FC<AdminReservasTableProps> = () => {
             seleccionados.
           </div>
         )}
+        {nextCursor != null && (
+          <div className="text-center p-4">
+            <button
+              onClick={() => fetchReservations(nextCursor)}
+              disabled={isLoading}
+              className="text-blue-600 hover:underline font-medium disabled:opacity-50"
+            >
+              Cargar más
+            </button>
+          </div>
+        )}
       </div>
       {isDeleteModalOpen && (
         <div className="fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center z-50 p-4">
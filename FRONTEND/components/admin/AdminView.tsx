@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { AdminDashboard } from './AdminDashboard';
 import { AdminReservasTable } from './AdminReservasTable';
 import { AppContext } from '../../App';
@@ -6,8 +6,6 @@ import { BuildingManagement } from './BuildingManagement';
 import { RoomManagement } from './RoomManagement';
 import { UserManagement } from './UserManagement';
 import { ProgramManagement } from './ProgramManagement';
-import { getAllReservations } from '../../services/api';
-import { Loader } from '../common/Loader';
 
 
 type AdminViewTab = 'dashboard' | 'reservations' | 'rooms' | 'buildings' | 'programs' | 'users';
@@ -15,25 +13,8 @@ type AdminViewTab = 'dashboard' | 'reservations' | 'rooms' | 'buildings' | 'prog
 export const AdminView: React.FC = () => {
     const [activeTab, setActiveTab] = useState<AdminViewTab>('dashboard');
     const appContext = React.useContext(AppContext);
-    const [isLoading, setIsLoading] = useState(true);
-    const [error, setError] = useState<string | null>(null);
-
-    useEffect(() => {
-        if (!appContext) return;
-        const fetchAdminData = async () => {
-            setIsLoading(true);
-            setError(null);
-            try {
-                const reservationsData = await getAllReservations();
-                appContext.setReservations(reservationsData);
-            } catch (err: any) {
-                setError(`Failed to load admin data: ${err.message}`);
-            } finally {
-                setIsLoading(false);
-            }
-        };
-        fetchAdminData();
-    }, [appContext?.setReservations]);
+    // Cada pestaña trae sus propios datos: el dashboard usa los conteos del
+    // servidor y la tabla de reservas pide páginas por cursor.
 
 
     if (!appContext) return null;
@@ -41,13 +22,6 @@ export const AdminView: React.FC = () => {
 
 
     const renderContent = () => {
-        if (isLoading) {
-            return <div className="bg-white p-6 rounded-lg shadow-sm flex justify-center"><Loader /></div>;
-        }
-        if (error) {
-            return <div className="bg-white p-6 rounded-lg shadow-sm text-center text-red-500">Error: {error}</div>;
-        }
-
         switch (activeTab) {
             case 'dashboard':
                 return <AdminDashboard reservations={reservations} />;
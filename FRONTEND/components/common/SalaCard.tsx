@@ -3,11 +3,11 @@ import React from 'react';
 import { ReservationStatus, Room, RoomType } from '../../types';
 import { UserGroupIcon, ClockIcon } from '../icons';
 import { AppContext } from '../../App';
-import { getIsRoomOcuppied } from '@/services/api';
 import { getReservationRoomId, getRoomId, getUserId } from '../../utils';
 
 interface SalaCardProps {
   room: Room;
+  isOccupied?: boolean;
   onReserve: () => void;
 }
 
@@ -24,7 +24,7 @@ const getRoomTypeColor = (type: RoomType) => {
   }
 };
 
-export const SalaCard: React.FC<SalaCardProps> = ({ room, onReserve }) => {
+export const SalaCard: React.FC<SalaCardProps> = ({ room, isOccupied = false, onReserve }) => {
 
   const appContext = useContext(AppContext);
   if (!appContext) {
@@ -34,9 +34,7 @@ export const SalaCard: React.FC<SalaCardProps> = ({ room, onReserve }) => {
     const reservations = appContext?.reservations;
     const timeSlots = appContext?.timeSlots;
 
-  const tiempo = new Date().toISOString().split('T')[0];
-
-  const [isAvailableNow, setAvail] = useState(true)
+  const isAvailableNow = !isOccupied
   const [puedeReservar, setPuedeReservar] = useState(false)
 
   // ver que salas puede usar
@@ -55,18 +53,6 @@ export const SalaCard: React.FC<SalaCardProps> = ({ room, onReserve }) => {
       }
     }, [user])
 
-    useEffect(() => {
-      const verificacionOcupada = async () => {
-        try {
-          const salaOcupada = await getIsRoomOcuppied(room.idSala, tiempo)
-          setAvail(!salaOcupada)
-        } catch (error) {
-          return error;
-        }
-      }
-      verificacionOcupada();
-    }, [])
-
   return (
     <div className="border border-gray-200 rounded-lg p-4 flex flex-col justify-between shadow-sm hover:shadow-lg hover:border-ucu-primary transition-all duration-300 bg-white">
       <div>
@@ -4,7 +4,6 @@ import {
   User,
   ReservationParticipant,
   ParticipantStatus,
-  ReservationStatus,
   Role,
   AttendanceStatus,
 } from "../../types";
@@ -12,10 +11,10 @@ import { CalendarIcon } from "../icons";
 import { AppContext } from "../../App";
 import {
   createReservation,
-  getAllReservations,
+  getOccupiedTurns,
   getParticipantSanctions,
 } from "../../services/api";
-import { getReservationRoomId, getRoomId, getUserId } from "../../utils";
+import { getRoomId, getUserId } from "../../utils";
 
 interface ReservationModalProps {
   room: Room;
@@ -52,7 +51,7 @@ export const ReservationModal: React.FC<ReservationModalProps> = ({
       : []
   );
   const [searchTerm, setSearchTerm] = useState("");
-  const [allReservations, setAllReservations] = useState([]);
+  const [occupiedTurnIds, setOccupiedTurnIds] = useState<number[]>([]);
 
   if (!currentUser || !appContext) {
     return null;
@@ -89,46 +88,21 @@ export const ReservationModal: React.FC<ReservationModalProps> = ({
   }, []);
 
   useEffect(() => {
-    const fetchReservations = async () => {
+    const fetchOccupiedTurns = async () => {
       try {
-        const data = await getAllReservations();
-        setAllReservations(data);
+        const data = await getOccupiedTurns(getRoomId(room), selectedDate);
+        setOccupiedTurnIds(data ?? []);
       } catch (error) {
-        console.error("Error fetching reservations:", error);
+        console.error("Error fetching occupied turns:", error);
       }
     };
-    fetchReservations();
-  }, []);
+    fetchOccupiedTurns();
+  }, [selectedDate]);
 
   const getTimeFromTurn = (turnId: number) => {
     const turn = timeSlots.find((t) => t.idTurno === turnId);
     return turn ? turn.startTime.substring(0, 5) : "N/A";
   };
-  const occupiedTurnIds = allReservations
-    .filter((r) => {
-      if (
-        getReservationRoomId(r) === getRoomId(room) &&
-        r.fecha === selectedDate &&
-        (r.estado === ReservationStatus.ACTIVA ||
-          r.estado === ReservationStatus.CONFIRMADA)
-      )
-        return true;
-
-      return false;
-    })
-    .flatMap((r) => {
-      const start =
-        r.start_turn_id ?? r.startTurnId ?? r.startTurnId ?? undefined;
-      const end = r.end_turn_id ?? r.endTurnId ?? r.endTurnId ?? undefined;
-      const turns: number[] = [];
-      if (typeof start === "number" && typeof end === "number") {
-        for (let i = start; i <= end; i++) {
-          turns.push(i);
-        }
-      }
-      return turns;
-    });
-
   const addParticipant = (userToAdd: User) => {
     const uid = getUserId(userToAdd);
     if (!uid) return;
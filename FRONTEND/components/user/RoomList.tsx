@@ -1,9 +1,10 @@
-import React, { useState, useContext } from 'react';
+import React, { useState, useContext, useEffect } from 'react';
 import { Building, Room } from '../../types';
 import { SalaCard } from '../common/SalaCard';
 import { ReservationModal } from './ReservationModal';
 import { AppContext } from '../../App';
 import { getBuildingId, getRoomId } from '../../utils';
+import { getAvailabilityGrid } from '../../services/api';
 
 interface RoomListProps {
   building: Building;
@@ -15,6 +16,21 @@ export const RoomList: React.FC<RoomListProps> = ({ building }) => {
 
   const buildingIdValue = getBuildingId(building);
   const roomsInBuilding = (appContext?.rooms || []).filter(room => getBuildingId(room) === buildingIdValue);
+  const [occupiedToday, setOccupiedToday] = useState<Record<number, boolean>>({});
+
+  // una sola consulta con la ocupación de hoy de todas las salas del edificio
+  useEffect(() => {
+    const today = new Date().toISOString().split('T')[0];
+    getAvailabilityGrid(today, today, buildingIdValue)
+      .then((grid) => {
+        const occupied: Record<number, boolean> = {};
+        (grid?.salas ?? []).forEach((s: any) => {
+          occupied[s.idSala] = (s.ocupacion ?? []).some((row: string) => row.includes('1'));
+        });
+        setOccupiedToday(occupied);
+      })
+      .catch((error) => console.error('Error fetching availability:', error));
+  }, [buildingIdValue]);
 
   const handleReserveClick = (room: Room) => {
     setSelectedRoom(room);
@@ -34,7 +50,7 @@ export const RoomList: React.FC<RoomListProps> = ({ building }) => {
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6">
         {roomsInBuilding.length > 0 ? (
             roomsInBuilding.map((room, idx) => (
-              <SalaCard key={String(getRoomId(room) ?? idx)} room={room} onReserve={() => handleReserveClick(room)} />
+              <SalaCard key={String(getRoomId(room) ?? idx)} room={room} isOccupied={occupiedToday[getRoomId(room)] ?? false} onReserve={() => handleReserveClick(room)} />
             ))
         ) : (
           <p className="text-gray-500 col-span-full">No hay salas disponibles en este edificio.</p>
@@ -259,13 +259,41 @@ export const createBuilding = (buildingData: Omit<Building, 'id'>) => apiRequest
 export const updateBuilding = (id: number, buildingData: Partial<Building>) => apiRequest<Building>('PUT', `edificios/${id}`, buildingData);
 export const deleteBuilding = (id: number) => apiRequest<void>('DELETE', `edificios/${id}`);
 
-export const getRooms = () => apiRequest<Room[]>('GET', 'salas');
+// Los listados devuelven { items, next_cursor } (paginación por cursor).
+export interface Page<T> {
+    items: T[];
+    nextCursor: number | null;
+}
+
+const getItems = async <T>(endpoint: string) => (await apiRequest<Page<T>>('GET', endpoint)).items;
+
+// El servidor devuelve a lo sumo `limit` filas por pedido (100 por defecto).
+// Recorrer todas las páginas solo en listados acotados por naturaleza
+// (catálogos, sanciones vigentes, reservas de un participante); para la
+// tabla de reservas usar getReservationsPage y los reportes del servidor.
+const getAllItems = async <T>(endpoint: string, limit = 500) => {
+    const all: T[] = [];
+    // misma convención que apiRequest: barra final antes de la query
+    const base = endpoint.includes('?') ? `${endpoint}&` : `${endpoint}/?`;
+    let cursor: number | null = null;
+    do {
+        const page = await apiRequest<Page<T>>('GET', `${base}limit=${limit}${cursor != null ? `&cursor=${cursor}` : ''}`);
+        all.push(...page.items);
+        cursor = page.nextCursor;
+    } while (cursor != null);
+    return all;
+};
+
+export const getRooms = () => getAllItems<Room>('salas');
 export const getIsRoomOcuppied = (id_sala, fecha) => apiRequest<boolean>('GET', `salas/${id_sala}/${fecha}`);
+export const getOccupiedTurns = (idSala: number, fecha: string) => apiRequest<number[]>('GET', `salas/${idSala}/${fecha}/ocupados`);
+export const getAvailabilityGrid = (desde: string, hasta: string, idEdificio?: number) =>
+    apiRequest<any>('GET', `salas/disponibilidad?desde=${desde}&hasta=${hasta}${idEdificio != null ? `&id_edificio=${idEdificio}` : ''}`);
 export const createRoom = (roomData: Omit<Room, 'id'>) => apiRequest<Room>('POST', 'salas', roomData);
 export const updateRoom = (id: number, roomData: Partial<Room>) => apiRequest<Room>('PUT', `salas/${id}`, roomData);
 export const deleteRoom = (id: number) => apiRequest<void>('DELETE', `salas/${id}`);
 
-export const getUsers = () => apiRequest<User[]>('GET', 'participantes');
+export const getUsers = () => getAllItems<User>('participantes');
 export const createUser = (userData: Omit<User, 'id'>) => apiRequest<User>('POST', 'participantes', userData);
 export const updateUser = (id: number, userData: Partial<User>) => apiRequest<User>('PUT', `participantes/${id}`, userData);
 export const deleteUser = (id: number) => apiRequest<void>('DELETE', `participantes/${id}`);
@@ -273,9 +301,10 @@ export const deleteUser = (id: number) => apiRequest<void>('DELETE', `participan
 
 export const getAuthMe = () => apiRequest<User>('GET', 'auth/me');
 
-export const getMyReservations = () => apiRequest<Reservation[]>('GET', 'reservas/mis-reservas');
+export const getMyReservations = () => getAllItems<Reservation>('reservas/mis-reservas');
 
-export const getAllReservations = () => apiRequest<Reservation[]>('GET', 'reservas');
+export const getReservationsPage = (cursor?: number | null, limit = 100) =>
+    apiRequest<Page<Reservation>>('GET', `reservas/?limit=${limit}${cursor != null ? `&cursor=${cursor}` : ''}`);
 
 export const getParticipantReservations = (idParticipante: number) => apiRequest<Reservation[]>('GET', `participantes/${idParticipante}/reservas`);
 export const getReservations = () => getMyReservations();
@@ -287,8 +316,11 @@ export const deleteReservation = (id: number) => apiRequest<void>('DELETE', `res
 
 export const getReservationParticipants = (reservationId: number) => apiRequest<number[]>('GET', `reservas/${reservationId}/participantes`);
 
-export const getSanctions = () => apiRequest<any[]>('GET', 'sanciones');
-export const getActiveSanctions = (vigentes = 'vigente_solo=true') => apiRequest<any[]>('GET', `sanciones/?${vigentes}`);
+export const getSanctions = () => getItems<any>('sanciones');
+// Solo las sanciones en curso: antes se mandaba `vigente_solo`, que el
+// servidor ignoraba, y se marcaban como sancionados también a quienes ya la
+// habían cumplido.
+export const getActiveSanctions = (vigentes = 'vigentes_solo=true') => getAllItems<any>(`sanciones/?${vigentes}`);
 export const getParticipantSanctions = (idParticipante: number) => apiRequest<any[]>('GET', `sanciones/participantes/${idParticipante}`);
 export const createSanction = (sanctionData: Omit<any, 'id'>) => apiRequest<any>('POST', 'sanciones', sanctionData);
 export const deleteSanction = (id: number) => apiRequest<void>('DELETE', `sanciones/${id}`);
@@ -302,6 +334,8 @@ export const getFaculties = () => apiRequest<Faculty[]>('GET', 'facultades');
 export const getTimeSlots = () => apiRequest<TimeSlot[]>('GET', 'turnos');
 
 // Reportes / Analytics endpoints
+// Todos los reportes en un request: { reportes: { [nombre]: { ok, datos?, error? } }, ms }
+export const getReportesDashboard = (limit: number = 5) => apiRequest<any>('GET', `reportes/dashboard?limit=${limit}`);
 export const getSalasMasReservadas = (limit: number = 10) => apiRequest<any[]>('GET', `reportes/salas-mas-reservadas?limit=${limit}`);
 export const getTurnosMasDemandados = () => apiRequest<any[]>('GET', 'reportes/turnos-mas-demandados');
 export const getPromedioParticipantesPorSala = () => apiRequest<any[]>('GET', 'reportes/promedio-participantes-sala');
@@ -310,6 +344,7 @@ export const getOcupacionSalasPorEdificio = () => apiRequest<any[]>('GET', 'repo
 export const getReservasAsistenciasPorRol = () => apiRequest<any[]>('GET', 'reportes/reservas-asistencias-por-rol');
 export const getSancionesPorRol = () => apiRequest<any[]>('GET', 'reportes/sanciones-por-rol');
 export const getPorcentajeReservasUtilizadas = () => apiRequest<any>('GET', 'reportes/porcentaje-reservas-utilizadas');
+export const getReservasPorEstado = () => apiRequest<any[]>('GET', 'reportes/reservas-por-estado');
 export const getReservasPorDiaSemana = () => apiRequest<any[]>('GET', 'reportes/reservas-por-dia-semana');
 export const getDiaMasCreacionReservas = () => apiRequest<any>('GET', 'reportes/dia-mas-creacion');
 export const getSalasMenosUtilizadas = (limit: number = 10) => apiRequest<any[]>('GET', `reportes/salas-menos-utilizadas?limit=${limit}`);
@@ -133,19 +133,33 @@ CREATE TABLE IF NOT EXISTS sancion_participante (
   FOREIGN KEY (id_participante) REFERENCES participante(id_participante) ON DELETE CASCADE
 );
 
+-- Turnos ocupados por reservas activas/confirmadas. La UNIQUE KEY impide
+-- que dos reservas ocupen la misma sala, fecha y turno.
+CREATE TABLE IF NOT EXISTS sala_turno_ocupado (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  id_sala INT NOT NULL,
+  fecha DATE NOT NULL,
+  id_turno INT NOT NULL,
+  id_reserva INT NOT NULL,
+  UNIQUE KEY uq_sala_fecha_turno (id_sala, fecha, id_turno),
+  KEY idx_ocupado_reserva (id_reserva),
+  FOREIGN KEY (id_sala) REFERENCES sala(id_sala) ON DELETE CASCADE,
+  FOREIGN KEY (id_turno) REFERENCES turno(id_turno),
+  FOREIGN KEY (id_reserva) REFERENCES reserva(id_reserva) ON DELETE CASCADE
+);
+
 CREATE OR REPLACE VIEW sanciones_vigentes AS
 SELECT id_sancion, id_participante, fecha_inicio, fecha_fin
 FROM sancion_participante
 WHERE CURDATE() BETWEEN fecha_inicio AND fecha_fin;
 
--- Trigger para prevenir solapamiento de reservas
+-- Trigger de validación de reservas. El solapamiento lo controla la
+-- UNIQUE KEY de sala_turno_ocupado.
 DELIMITER $$
 CREATE TRIGGER trg_reserva_before_insert
 BEFORE INSERT ON reserva
 FOR EACH ROW
 BEGIN
-  DECLARE v_conflictos INT DEFAULT 0;
-
   IF NEW.start_turn_id > NEW.end_turn_id THEN
     SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Error: start_turn_id debe ser <= end_turn_id';
   END IF;
@@ -154,17 +168,6 @@ BEGIN
     SIGNAL SQLSTATE '45000'
       SET MESSAGE_TEXT = 'La fecha debe ser hoy o futura';
   END IF;
-
-  SELECT COUNT(*) INTO v_conflictos
-  FROM reserva
-  WHERE id_sala = NEW.id_sala
-    AND fecha = NEW.fecha
-    AND estado IN ('activa','confirmada')
-    AND NOT (end_turn_id < NEW.start_turn_id OR start_turn_id > NEW.end_turn_id);
-
-  IF v_conflictos > 0 THEN
-    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Conflicto: ya existe reserva solapada';
-  END IF;
 END$$
 DELIMITER ;
 
@@ -202,6 +205,7 @@ GRANT SELECT, INSERT ON reserva_salas.participante_programa TO 'user'@'%';
 
 GRANT SELECT, INSERT, UPDATE ON reserva_salas.reserva TO 'user'@'%';
 GRANT SELECT, INSERT, UPDATE ON reserva_salas.reserva_participante TO 'user'@'%';
+GRANT SELECT, INSERT, DELETE ON reserva_salas.sala_turno_ocupado TO 'user'@'%';
 
 GRANT SELECT ON reserva_salas.sancion_participante TO 'user'@'%';
 